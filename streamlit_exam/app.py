@@ -1,9 +1,25 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from segcore.store import load_table
+from segcore.shared import open_shared_dataset, process_memory, shared_enabled, shared_path_for
+from segcore.memo import QueryCache, dataset_fingerprint, filter_key
+from segcore.figures import FigureCache
+from segcore.manifest import distinct_values, open_manifest
+from segcore.distinct import DistinctIndex
+from segcore.filters import FilterIndex
+from segcore.customers import CustomerTable
+from segcore.parallel import default_workers, parallel_segment_aggregates, parallel_workers
+from segcore.panels import PanelProfile, fragments_enabled
+from segcore.sources import SourceRegistry
+from segcore.scoring import DEFAULT_WEIGHTS, FORMULAS, ScoreMatrix, top_n_indices
+from segcore.warmup import AccessLog, Warmup, access_log_path, warmup_plan, warmup_top_n
+
 # 페이지 설정
 st.set_page_config(
     page_title="Customer Segmentation Dashboard",
@@ -149,11 +165,12 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+DATA_PATH = './data/walmart.csv'
+
 # 데이터 로딩 및 전처리 함수
-@st.cache_data
-def load_and_process_data():
+def process_data():
     """데이터 로드 및 세그먼테이션 처리"""
-    df = pd.read_csv('./data/walmart.csv')
+    df = load_table(DATA_PATH)  # Arrow 캐시 공유 (walmart.py와 동일)
     
     # 연령 그룹 정리
     age_order = ['0-17', '18-25', '26-35', '36-45', '46-50', '51-55', '55+']
@@ -174,20 +191,104 @@ def load_and_process_data():
     
     return df
 
-@st.cache_data
-def create_segment_summary(df):
-    """세그먼트별 요약 통계"""
-    seg_summary = (
-        df.groupby('Segment_AGOP')
-        .agg(
-            customers=('User_ID', 'nunique'),
+@st.cache_resource
+def load_and_process_data():
+    """
+    전처리 결과를 data/.segcache/walmart.csv.app/ 에 컬럼별 memory-map 으로 두고 읽기 전용으로 연다.
+    cache_data 처럼 세션마다 복사하지 않고, 같은 호스트의 모든 서버 프로세스가 같은 페이지를 공유한다.
+    """
+    return open_shared_dataset(DATA_PATH, process_data, tag='app')
+
+@st.cache_resource
+def load_manifest():
+    """컬럼/행 수/distinct 값 sidecar (data/.segcache/walmart.csv.manifest.json, 데이터 버전당 한 번 생성)"""
+    return open_manifest(DATA_PATH)
+
+def city_options_from_manifest():
+    """사이드바 City 선택지 - manifest 에서 (데이터 스캔 없음)"""
+    return distinct_values(load_manifest(), 'City_Category') or sorted(df['City_Category'].unique().tolist())
+
+@st.cache_resource
+def load_customer_index():
+    """필터(City/Gender/Age) x Segment_AGOP 셀별 User_ID 비트맵 - 고유 고객 수를 nunique 없이 계산"""
+    return DistinctIndex.build(load_and_process_data(), ['City_Category', 'Gender', 'Age', 'Segment_AGOP'])
+
+@st.cache_resource
+def load_filter_index():
+    """사이드바 필터용 (컬럼, 값)별 행 비트마스크"""
+    return FilterIndex.build(load_and_process_data(), ['City_Category', 'Gender', 'Age'])
+
+@st.cache_resource
+def load_customer_table():
+    """고객 단위 rollup (User_ID 당 1행) - 고객 KPI 를 거래 행 대신 ~6천 행에서 계산"""
+    return CustomerTable.build(load_and_process_data())
+
+@st.cache_resource
+def load_figure_cache():
+    """(차트, fingerprint, 필터 튜플) -> 직렬화된 plotly figure (프로세스 내 모든 세션 공유)"""
+    return FigureCache(maxsize=256)
+
+@st.cache_resource
+def load_access_log():
+    """세션별 필터 조합 요청 기록 (data/.segcache/walmart.csv.app.access.jsonl)"""
+    return AccessLog(access_log_path(DATA_PATH, 'app'))
+
+@st.cache_resource
+def load_panel_profile():
+    """패널별 실행 횟수/시간 (프로세스 내 모든 세션 공유)"""
+    return PanelProfile()
+
+@st.cache_resource
+def load_dataset_fingerprint():
+    """load_and_process_data 와 같은 수명 (프로세스당 한 번) - 요약 캐시 키"""
+    return dataset_fingerprint(DATA_PATH)
+
+@st.cache_resource
+def load_source_registry():
+    """DATA_PATH 버전 감시 - 파일 내용이 바뀌면 그 파일에서 파생된 캐시만 다시 만든다"""
+    return SourceRegistry()
+
+DERIVED_LOADERS = [load_and_process_data, load_manifest, load_customer_index, load_filter_index,
+                   load_customer_table, load_dataset_fingerprint]
+
+def invalidate_derived(event):
+    for loader in DERIVED_LOADERS:
+        loader.clear()
+    # 요약/figure LRU 는 이전 버전 fingerprint 항목만 (다른 항목/통계는 유지)
+    load_summary_cache().discard(event['old_fingerprint'])
+    load_figure_cache().discard(event['old_fingerprint'])
+
+@st.cache_resource
+def load_summary_cache():
+    """(fingerprint, 필터 튜플, workers) -> 세그먼트 요약 LRU (DataFrame 해싱 없이 조회)"""
+    return QueryCache(maxsize=256)
+
+def create_segment_summary(df, customers=None, workers=1):
+    """
+    세그먼트별 요약 통계 (customers: 비트맵 인덱스로 미리 센 세그먼트별 고객 수)
+    workers > 1 이면 User_ID shard 병렬 집계 (결과 스키마 동일)
+    """
+    if workers > 1:
+        seg_summary = parallel_segment_aggregates(df, workers)
+        if customers is not None:
+            seg_summary = seg_summary.drop(columns='customers')
+        seg_summary = seg_summary.reset_index()
+    else:
+        aggs = dict(
             transactions=('Segment_AGOP', 'size'),
             revenue=('Purchase', 'sum'),
             avg_purchase=('Purchase', 'mean'),
             median_purchase=('Purchase', 'median')
         )
-        .reset_index()
-    )
+        if customers is None:
+            aggs = dict(customers=('User_ID', 'nunique'), **aggs)
+        seg_summary = (
+            df.groupby('Segment_AGOP')
+            .agg(**aggs)
+            .reset_index()
+        )
+    if customers is not None:
+        seg_summary.insert(1, 'customers', seg_summary['Segment_AGOP'].map(customers).fillna(0).astype(int))
     
     # 매출 비중 계산
     total_revenue = seg_summary['revenue'].sum()
@@ -213,9 +314,26 @@ def create_segment_summary(df):
     
     return seg_summary
 
-# 데이터 로드
-df = load_and_process_data()
-seg_summary = create_segment_summary(df)
+def summarize_filtered(filters, workers, filter_index, customer_index):
+    """필터 적용 (비트마스크 AND -> 필요한 컬럼만 한 번 추출) 후 세그먼트 재계산 (고객 수는 비트맵 합집합으로)"""
+    filtered_df = filter_index.take(df, filters, columns=['Segment_AGOP', 'User_ID', 'Purchase'])
+    return create_segment_summary(filtered_df, customer_index.count(filters, by='Segment_AGOP'), workers)
+
+def cached_summary(summary_cache, fingerprint, filters, workers, filter_index, customer_index):
+    """
+    캐시 키 = dataset fingerprint + 필터 튜플 -> 같은 조합이면 필터/집계/해싱 없이 바로 반환.
+    정규화 지표 행렬도 필터 조합당 한 번만 (가중치/식 변경 시 재집계 없음).
+    """
+    key = filter_key(filters)
+    filtered_seg = summary_cache.get_or_compute(
+        (fingerprint, key, workers),
+        lambda: summarize_filtered(filters, workers, filter_index, customer_index),
+    )
+    score_matrix = summary_cache.get_or_compute(
+        (fingerprint, 'score_matrix', key, workers),
+        lambda: ScoreMatrix.from_segments(filtered_seg),
+    )
+    return filtered_seg, score_matrix
 
 # 버킷별 색상 매핑
 bucket_colors = {
@@ -224,95 +342,14 @@ bucket_colors = {
     'Expand': '#16a34a'
 }
 
-# 사이드바 - 필터
-with st.sidebar:
-    st.markdown('<div class="filter-header">FILTERS</div>', unsafe_allow_html=True)
-    
-    # 날짜 필터 (시각적으로만)
-    st.markdown("**Date**")
-    st.markdown("📅 2023 전체")
-    st.markdown("")
-    
-    # City Category 필터
-    st.markdown("**City Category**")
-    city_options = ['All'] + sorted(df['City_Category'].unique().tolist())
-    selected_city = st.selectbox("도시 카테고리", city_options, label_visibility="collapsed")
-    
-    st.markdown("")
-    
-    # 성별 필터
-    st.markdown("**Gender**")
-    gender_options = ['All', 'M', 'F']
-    selected_gender = st.selectbox("성별", gender_options, label_visibility="collapsed")
-    
-    st.markdown("")
-    
-    # 연령대 필터
-    st.markdown("**Age Group**")
-    age_options = ['All'] + ['0-17', '18-25', '26-35', '36-45', '46-50', '51-55', '55+']
-    selected_age = st.selectbox("연령대", age_options, label_visibility="collapsed")
-    
-    st.markdown("---")
-    st.markdown("""
-    <div style='padding: 1rem; background-color: #f0f9ff; border-radius: 6px; border-left: 3px solid #2563eb;'>
-        <p style='margin: 0; font-size: 0.85rem; color: #1e40af; font-weight: 600;'>Strategy Buckets</p>
-        <p style='margin: 0.5rem 0 0 0; font-size: 0.75rem; color: #334155;'>
-            <strong>Defend:</strong> 충성고객<br>
-            <strong>Grow:</strong> 성장 고객 (업셀 전략)<br>
-            <strong>Expand:</strong> 잠재고객 (프로모션, 크로스셀 전략)
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
-
-# 메인 컨텐츠
-st.markdown('<div class="dashboard-header">CUSTOMER SEGMENTATION DASHBOARD</div>', unsafe_allow_html=True)
-
-# 필터 적용
-filtered_df = df.copy()
-if selected_city != 'All':
-    filtered_df = filtered_df[filtered_df['City_Category'] == selected_city]
-if selected_gender != 'All':
-    filtered_df = filtered_df[filtered_df['Gender'] == selected_gender]
-if selected_age != 'All':
-    filtered_df = filtered_df[filtered_df['Age'] == selected_age]
-
-# 필터링된 데이터로 세그먼트 재계산
-filtered_seg = create_segment_summary(filtered_df)
-
-# KPI 섹션 - 4개만
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    total_customers = filtered_df['User_ID'].nunique()
-    st.metric("Total Customers", f"{total_customers:,}")
-
-with col2:
-    total_revenue = filtered_df['Purchase'].sum()
-    st.metric("Total Revenue", f"{total_revenue:,}")
-
-with col3:
-    avg_revenue = filtered_df.groupby('User_ID')['Purchase'].sum().mean()
-    st.metric("AVG Revenue", f"{avg_revenue:,.0f}")
-
-with col4:
-    avg_order_value = filtered_df['Purchase'].mean()
-    st.metric("Avg Order Value", f"{avg_order_value:,.0f}")
-
-st.markdown("<br>", unsafe_allow_html=True)
-
-# 메인 차트 섹션
-col1, col2 = st.columns([1, 1])
-
-with col1:
-    # Total Amount Spent by Segment - 세그먼트별 다른 색상
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    
+# 차트 figure (FigureCache miss 일 때만 호출, warm-up 스레드도 같은 함수 사용)
+def build_amount(filtered_seg):
     bucket_revenue = filtered_seg[filtered_seg['bucket'] != 'Other'].groupby('bucket')['revenue'].sum().reset_index()
     bucket_revenue = bucket_revenue.sort_values('revenue', ascending=False)
-    
+
     # 버킷별 색상 리스트
     colors = [bucket_colors.get(bucket, '#999999') for bucket in bucket_revenue['bucket']]
-    
+
     fig_amount = go.Figure(data=[
         go.Bar(
             x=bucket_revenue['bucket'],
@@ -323,7 +360,7 @@ with col1:
             textfont=dict(size=12, color='#1a1a1a', family='Arial Black')
         )
     ])
-    
+
     fig_amount.update_layout(
         title={
             'text': 'Total Amount Spent by Segment',
@@ -346,26 +383,21 @@ with col1:
         ),
         showlegend=False
     )
-    
-    st.plotly_chart(fig_amount, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    return fig_amount
 
-with col2:
-    # Segment Wise Growth Rate (모의 데이터)
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    
-    # 주별 성장률 시뮬레이션
+def build_growth():
+    """주별 성장률 시뮬레이션 (모의 데이터: 필터 무관)"""
     import numpy as np
     weeks = list(range(26, 40))
-    
+
     # 각 버킷별 성장 패턴 생성
     np.random.seed(42)
     grow_growth = [15000 + i*500 + np.random.randint(-1000, 1000) for i in range(len(weeks))]
     defend_growth = [3000 + i*50 + np.random.randint(-200, 200) for i in range(len(weeks))]
     expand_growth = [10000 + i*300 + np.random.randint(-500, 500) for i in range(len(weeks))]
-    
+
     fig_growth = go.Figure()
-    
+
     fig_growth.add_trace(go.Scatter(
         x=weeks, y=grow_growth,
         mode='lines+markers',
@@ -373,7 +405,7 @@ with col2:
         line=dict(color=bucket_colors['Grow'], width=3),
         marker=dict(size=6)
     ))
-    
+
     fig_growth.add_trace(go.Scatter(
         x=weeks, y=defend_growth,
         mode='lines+markers',
@@ -381,7 +413,7 @@ with col2:
         line=dict(color=bucket_colors['Defend'], width=3),
         marker=dict(size=6)
     ))
-    
+
     fig_growth.add_trace(go.Scatter(
         x=weeks, y=expand_growth,
         mode='lines+markers',
@@ -389,7 +421,7 @@ with col2:
         line=dict(color=bucket_colors['Expand'], width=3),
         marker=dict(size=6)
     ))
-    
+
     fig_growth.update_layout(
         title={
             'text': 'Segment Wise Growth Rate',
@@ -418,24 +450,14 @@ with col2:
             tickfont=dict(size=11, color='#666666')
         )
     )
-    
-    st.plotly_chart(fig_growth, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    return fig_growth
 
-st.markdown("<br>", unsafe_allow_html=True)
-
-# 하단 차트 섹션
-col1, col2 = st.columns([1, 2])
-
-with col1:
-    # Total Customers by Segment (Pie Chart)
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    
+def build_pie(filtered_seg):
     bucket_customers = filtered_seg[filtered_seg['bucket'] != 'Other'].groupby('bucket')['customers'].sum().reset_index()
-    
+
     # 색상 매핑
     colors = [bucket_colors.get(b, '#999999') for b in bucket_customers['bucket']]
-    
+
     fig_pie = go.Figure(data=[go.Pie(
         labels=bucket_customers['bucket'],
         values=bucket_customers['customers'],
@@ -445,7 +467,7 @@ with col1:
         textfont=dict(size=12, color='white'),
         showlegend=True
     )])
-    
+
     fig_pie.update_layout(
         title={
             'text': 'Total Customers by Segment',
@@ -462,183 +484,407 @@ with col1:
         ),
         paper_bgcolor='white'
     )
+    return fig_pie
+
+def build_avg_rev(filtered_seg):
+    bucket_avg_revenue = filtered_seg[filtered_seg['bucket'] != 'Other'].copy()
+    bucket_avg_revenue['avg_revenue_per_customer'] = bucket_avg_revenue['revenue'] / bucket_avg_revenue['customers']
+    bucket_avg_revenue = bucket_avg_revenue.sort_values('avg_revenue_per_customer', ascending=True)
+
+    colors = [bucket_colors.get(b, '#999999') for b in bucket_avg_revenue['bucket']]
+
+    fig_avg_rev = go.Figure(data=[
+        go.Bar(
+            y=bucket_avg_revenue['bucket'],
+            x=bucket_avg_revenue['avg_revenue_per_customer'],
+            orientation='h',
+            marker_color=colors,
+            text=bucket_avg_revenue['avg_revenue_per_customer'].apply(lambda x: f"{x/1e3:.1f}K"),
+            textposition='outside',
+            textfont=dict(size=11)
+        )
+    ])
+
+    fig_avg_rev.update_layout(
+        title='AVG. Revenue by Segment',
+        height=300,
+        margin=dict(l=100, r=20, t=40, b=20),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='#f0f0f0',
+            tickformat=',.0f'
+        ),
+        yaxis=dict(
+            tickfont=dict(size=10)
+        ),
+        showlegend=False
+    )
+    return fig_avg_rev
+
+def build_aov(filtered_seg):
+    bucket_aov = filtered_seg[filtered_seg['bucket'] != 'Other'].copy()
+    bucket_aov = bucket_aov.sort_values('avg_purchase', ascending=True)
+
+    colors = [bucket_colors.get(b, '#999999') for b in bucket_aov['bucket']]
+
+    fig_aov = go.Figure(data=[
+        go.Bar(
+            y=bucket_aov['bucket'],
+            x=bucket_aov['avg_purchase'],
+            orientation='h',
+            marker_color=colors,
+            text=bucket_aov['avg_purchase'].apply(lambda x: f"{x/1e3:.1f}K"),
+            textposition='outside'
+        )
+    ])
+
+    fig_aov.update_layout(
+        title='AVG. Order Value by Segment',
+        height=300,
+        margin=dict(l=100, r=20, t=40, b=20),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
+        showlegend=False
+    )
+    return fig_aov
+
+def build_freq(filtered_seg):
+    bucket_freq = filtered_seg[filtered_seg['bucket'] != 'Other'].copy()
+    bucket_freq['avg_purchases_per_customer'] = bucket_freq['transactions'] / bucket_freq['customers']
+    bucket_freq = bucket_freq.sort_values('avg_purchases_per_customer', ascending=True)
+
+    colors = [bucket_colors.get(b, '#999999') for b in bucket_freq['bucket']]
+
+    fig_freq = go.Figure(data=[
+        go.Bar(
+            y=bucket_freq['bucket'],
+            x=bucket_freq['avg_purchases_per_customer'],
+            orientation='h',
+            marker_color=colors,
+            text=bucket_freq['avg_purchases_per_customer'].apply(lambda x: f"{x:.1f}"),
+            textposition='outside'
+        )
+    ])
+
+    fig_freq.update_layout(
+        title='Avg. No. of Purchases by Segment',
+        height=300,
+        margin=dict(l=100, r=20, t=40, b=20),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
+        showlegend=False
+    )
+    return fig_freq
+
+# chart id -> figure 함수 (필터별 차트만, growth 는 모의 데이터라 필터 무관)
+CHART_BUILDERS = {
+    'bucket_revenue': build_amount,
+    'bucket_customers': build_pie,
+    'avg_revenue': build_avg_rev,
+    'avg_order_value': build_aov,
+    'avg_purchases': build_freq,
+}
+
+@st.cache_resource(show_spinner=False)
+def start_warmup(fingerprint, _summary_cache, _figures, _filter_index, _customer_index, _access_log):
+    """
+    데이터셋당 한 번, 첫 화면을 그린 뒤 시작: 기본 화면 + 접근 로그 상위 N 개 필터 조합의
+    세그먼트 요약/점수 행렬/차트를 daemon 스레드에서 미리 계산 (세션은 기다리지 않음)
+    """
+    n = warmup_top_n()
+    city_options = city_options_from_manifest()  # 스레드 밖에서 (cache_resource 호출)
+    workers = default_workers()  # 사이드바 기본 엔진 (SEGCORE_WORKERS > 1 이면 parallel, 그 값 그대로)
+
+    def warm_view(filters):
+        filtered_seg, _ = cached_summary(_summary_cache, fingerprint, filters, workers, _filter_index, _customer_index)
+        for chart_id, build in CHART_BUILDERS.items():
+            _figures.get_or_build(chart_id, fingerprint, filters, lambda: build(filtered_seg))
+        _figures.get_or_build('growth', fingerprint, (), build_growth)
+
+    def plan():
+        options = {
+            'City_Category': city_options,
+            'Gender': ['M', 'F'],
+            'Age': ['0-17', '18-25', '26-35', '36-45', '46-50', '51-55', '55+'],
+        }
+        return [(label, lambda f=f: warm_view(f)) for label, f in warmup_plan(_access_log, options, n)]
+
+    warmup = Warmup(plan, name='app-warmup')
+    return warmup.start() if n is not None else warmup
+
+# 데이터 로드 (원본이 바뀌었으면 파생 캐시부터 무효화, stat 은 1초에 한 번)
+sources = load_source_registry()
+sources.watch(os.path.abspath(DATA_PATH), 'derived', invalidate_derived)
+sources.check(os.path.abspath(DATA_PATH))
+df = load_and_process_data()
+
+# 사이드바 - 필터
+with st.sidebar:
+    st.markdown('<div class="filter-header">FILTERS</div>', unsafe_allow_html=True)
     
-    st.plotly_chart(fig_pie, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    # 날짜 필터 (시각적으로만)
+    st.markdown("**Date**")
+    st.markdown("📅 2023 전체")
+    st.markdown("")
+    
+    # City Category 필터
+    st.markdown("**City Category**")
+    city_options = ['All'] + city_options_from_manifest()
+    selected_city = st.selectbox("도시 카테고리", city_options, label_visibility="collapsed")
+    
+    st.markdown("")
+    
+    # 성별 필터
+    st.markdown("**Gender**")
+    gender_options = ['All', 'M', 'F']
+    selected_gender = st.selectbox("성별", gender_options, label_visibility="collapsed")
+    
+    st.markdown("")
+    
+    # 연령대 필터
+    st.markdown("**Age Group**")
+    age_options = ['All'] + ['0-17', '18-25', '26-35', '36-45', '46-50', '51-55', '55+']
+    selected_age = st.selectbox("연령대", age_options, label_visibility="collapsed")
+    
+    st.markdown("")
+    
+    # 집계 엔진 (기본값: SEGCORE_WORKERS 환경변수)
+    st.markdown("**Engine**")
+    engine_options = ['pandas', 'parallel']
+    selected_engine = st.selectbox("집계 엔진", engine_options, index=int(default_workers() > 1), label_visibility="collapsed")
+    workers = parallel_workers() if selected_engine == 'parallel' else 1
+    
+    
+    st.markdown("---")
+    st.markdown("""
+    <div style='padding: 1rem; background-color: #f0f9ff; border-radius: 6px; border-left: 3px solid #2563eb;'>
+        <p style='margin: 0; font-size: 0.85rem; color: #1e40af; font-weight: 600;'>Strategy Buckets</p>
+        <p style='margin: 0.5rem 0 0 0; font-size: 0.75rem; color: #334155;'>
+            <strong>Defend:</strong> 충성고객<br>
+            <strong>Grow:</strong> 성장 고객 (업셀 전략)<br>
+            <strong>Expand:</strong> 잠재고객 (프로모션, 크로스셀 전략)
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+# 메인 컨텐츠
+st.markdown('<div class="dashboard-header">CUSTOMER SEGMENTATION DASHBOARD</div>', unsafe_allow_html=True)
+
+filters = {'City_Category': selected_city, 'Gender': selected_gender, 'Age': selected_age}
+# 필터 조합이 바뀔 때만 접근 로그에 한 줄 (다음 서버 시작 시 warm-up 대상)
+if st.session_state.get('_access_key') != filter_key(filters):
+    st.session_state['_access_key'] = filter_key(filters)
+    load_access_log().record(filter_key(filters))
+
+customer_index = load_customer_index()
+customer_table = load_customer_table()
+summary_cache = load_summary_cache()
+filtered_seg, score_matrix = cached_summary(
+    summary_cache, load_dataset_fingerprint(), filters, workers, load_filter_index(), customer_index
+)
+cs = summary_cache.stats()
+st.sidebar.caption(f"Summary cache: {cs['hits']} hit / {cs['misses']} miss · {cs['size']}/{cs['maxsize']} entries")
+with st.sidebar.expander(f"Data source ({len(sources.events())} invalidations)"):
+    st.json({**sources.stats(), "events": sources.events()[-5:]})
+with st.sidebar.expander("Memory (this process)"):
+    # /proc/self/smaps 파싱은 진단용 -> 버튼을 눌렀을 때만 (expander 안쪽도 rerun 마다 실행됨)
+    if st.button("Measure", key="measure_memory"):
+        st.json(process_memory(shared_path_for(DATA_PATH, 'app') if shared_enabled() else None))
+
+# 패널 단위 함수 (위젯이 있는 패널은 st.fragment: 그 위젯을 바꾸면 그 패널만 다시 실행)
+profile = load_panel_profile()
+figure_cache = load_figure_cache()
+fragment = st.fragment if fragments_enabled() else (lambda fn: fn)
+
+# KPI 섹션 - 4개만 (고객 rollup 테이블에서)
+@profile.track("kpis")
+def kpi_panel(customer_index, customer_table, filters):
+    col1, col2, col3, col4 = st.columns(4)
+    _, total_revenue, avg_order_value, _, _ = customer_table.kpis(filters)
+
+    with col1:
+        total_customers = customer_index.count(filters)
+        st.metric("Total Customers", f"{total_customers:,}")
+
+    with col2:
+        st.metric("Total Revenue", f"{total_revenue:,}")
 
-with col2:
-    # Revenue Breakdown with Tabs
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    with col3:
+        avg_revenue = customer_table.avg_revenue(filters)
+        st.metric("AVG Revenue", f"{avg_revenue:,.0f}")
+
+    with col4:
+        st.metric("Avg Order Value", f"{avg_order_value:,.0f}")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+
+# 메인 차트 섹션
+@profile.track("main_charts")
+def main_charts_panel(filtered_seg, figures, fingerprint, filters):
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        # Total Amount Spent by Segment - 세그먼트별 다른 색상
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     
-    tab1, tab2, tab3 = st.tabs(["AVG. Revenue", "AVG. Order Value", "Avg. No. of Purchases"])
+        fig_amount = figures.get_or_build("bucket_revenue", fingerprint, filters, lambda: build_amount(filtered_seg))
+        st.plotly_chart(fig_amount, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with col2:
+        # Segment Wise Growth Rate (모의 데이터)
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     
-    with tab1:
-        # AVG. Revenue by Segment
-        bucket_avg_revenue = filtered_seg[filtered_seg['bucket'] != 'Other'].copy()
-        bucket_avg_revenue['avg_revenue_per_customer'] = bucket_avg_revenue['revenue'] / bucket_avg_revenue['customers']
-        bucket_avg_revenue = bucket_avg_revenue.sort_values('avg_revenue_per_customer', ascending=True)
-        
-        colors = [bucket_colors.get(b, '#999999') for b in bucket_avg_revenue['bucket']]
-        
-        fig_avg_rev = go.Figure(data=[
-            go.Bar(
-                y=bucket_avg_revenue['bucket'],
-                x=bucket_avg_revenue['avg_revenue_per_customer'],
-                orientation='h',
-                marker_color=colors,
-                text=bucket_avg_revenue['avg_revenue_per_customer'].apply(lambda x: f"{x/1e3:.1f}K"),
-                textposition='outside',
-                textfont=dict(size=11)
-            )
-        ])
-        
-        fig_avg_rev.update_layout(
-            title='AVG. Revenue by Segment',
-            height=300,
-            margin=dict(l=100, r=20, t=40, b=20),
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            xaxis=dict(
-                showgrid=True,
-                gridcolor='#f0f0f0',
-                tickformat=',.0f'
-            ),
-            yaxis=dict(
-                tickfont=dict(size=10)
-            ),
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig_avg_rev, use_container_width=True)
+        fig_growth = figures.get_or_build("growth", fingerprint, (), build_growth)  # 모의 데이터: 필터 무관
+        st.plotly_chart(fig_growth, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+
+# 하단 차트 섹션
+@profile.track("bottom_charts")
+def bottom_charts_panel(filtered_seg, figures, fingerprint, filters):
+    col1, col2 = st.columns([1, 2])
+
+    with col1:
+        # Total Customers by Segment (Pie Chart)
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     
-    with tab2:
-        # AVG. Order Value by Segment
-        bucket_aov = filtered_seg[filtered_seg['bucket'] != 'Other'].copy()
-        bucket_aov = bucket_aov.sort_values('avg_purchase', ascending=True)
-        
-        colors = [bucket_colors.get(b, '#999999') for b in bucket_aov['bucket']]
-        
-        fig_aov = go.Figure(data=[
-            go.Bar(
-                y=bucket_aov['bucket'],
-                x=bucket_aov['avg_purchase'],
-                orientation='h',
-                marker_color=colors,
-                text=bucket_aov['avg_purchase'].apply(lambda x: f"{x/1e3:.1f}K"),
-                textposition='outside'
-            )
-        ])
-        
-        fig_aov.update_layout(
-            title='AVG. Order Value by Segment',
-            height=300,
-            margin=dict(l=100, r=20, t=40, b=20),
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig_aov, use_container_width=True)
+        fig_pie = figures.get_or_build("bucket_customers", fingerprint, filters, lambda: build_pie(filtered_seg))
+        st.plotly_chart(fig_pie, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with col2:
+        # Revenue Breakdown with Tabs
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     
-    with tab3:
-        # Avg. No. of Purchases by Segment
-        bucket_freq = filtered_seg[filtered_seg['bucket'] != 'Other'].copy()
-        bucket_freq['avg_purchases_per_customer'] = bucket_freq['transactions'] / bucket_freq['customers']
-        bucket_freq = bucket_freq.sort_values('avg_purchases_per_customer', ascending=True)
-        
-        colors = [bucket_colors.get(b, '#999999') for b in bucket_freq['bucket']]
-        
-        fig_freq = go.Figure(data=[
-            go.Bar(
-                y=bucket_freq['bucket'],
-                x=bucket_freq['avg_purchases_per_customer'],
-                orientation='h',
-                marker_color=colors,
-                text=bucket_freq['avg_purchases_per_customer'].apply(lambda x: f"{x:.1f}"),
-                textposition='outside'
-            )
-        ])
-        
-        fig_freq.update_layout(
-            title='Avg. No. of Purchases by Segment',
-            height=300,
-            margin=dict(l=100, r=20, t=40, b=20),
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            xaxis=dict(showgrid=True, gridcolor='#f0f0f0'),
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig_freq, use_container_width=True)
+        tab1, tab2, tab3 = st.tabs(["AVG. Revenue", "AVG. Order Value", "Avg. No. of Purchases"])
+    
+        with tab1:
+            # AVG. Revenue by Segment
+            fig_avg_rev = figures.get_or_build("avg_revenue", fingerprint, filters, lambda: build_avg_rev(filtered_seg))
+            st.plotly_chart(fig_avg_rev, use_container_width=True)
     
-    st.markdown('</div>', unsafe_allow_html=True)
+        with tab2:
+            # AVG. Order Value by Segment
+            fig_aov = figures.get_or_build("avg_order_value", fingerprint, filters, lambda: build_aov(filtered_seg))
+            st.plotly_chart(fig_aov, use_container_width=True)
+    
+        with tab3:
+            # Avg. No. of Purchases by Segment
+            fig_freq = figures.get_or_build("avg_purchases", fingerprint, filters, lambda: build_freq(filtered_seg))
+            st.plotly_chart(fig_freq, use_container_width=True)
+    
+        st.markdown('</div>', unsafe_allow_html=True)
+
 
 # 상위 타겟 세그먼트 테이블
-st.markdown("<br>", unsafe_allow_html=True)
-st.markdown('<div class="section-title">Top Priority Target Segments</div>', unsafe_allow_html=True)
+WEIGHT_LABELS = {'rev_n': 'Revenue', 'cust_n': 'Customers', 'tx_n': 'Transactions', 'aov_n': 'AOV'}
 
-tab1, tab2, tab3 = st.tabs(["Defend", "Grow", "Expand"])
+@fragment
+@profile.track("top_targets")
+def top_targets_panel(filtered_seg, score_matrix):
+    """스코어 식/가중치 위젯은 이 패널 안에만 -> 바꿔도 이 패널만 다시 실행 (KPI/차트/집계 그대로)"""
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown('<div class="section-title">Top Priority Target Segments</div>', unsafe_allow_html=True)
 
-with tab1:
-    defend_top = (
-        filtered_seg[filtered_seg['bucket'] == 'Defend']
-        .sort_values('target_score', ascending=False)
-        .head(5)
-    )
+    # 타겟 스코어 식 (what-if: 가중치 변경은 행렬-벡터 곱 한 번으로 재정렬)
+    col_formula, col_weights = st.columns([1, 2])
+    with col_formula:
+        score_formula = st.selectbox("Target Score", list(FORMULAS), index=list(FORMULAS).index('share_x_aov'),
+                                     format_func=FORMULAS.get)
+    with col_weights.expander("Weights", expanded=False):
+        weight_cols = st.columns(len(WEIGHT_LABELS))
+        score_weights = {
+            k: weight_cols[i].slider(label, 0.0, 1.0, DEFAULT_WEIGHTS[k], 0.05, disabled=score_formula != 'weighted')
+            for i, (k, label) in enumerate(WEIGHT_LABELS.items())
+        }
+    filtered_seg = filtered_seg.assign(target_score=score_matrix.score(score_weights, score_formula))
+    segment_buckets = filtered_seg['bucket'].to_numpy()
+
+    tab1, tab2, tab3 = st.tabs(["Defend", "Grow", "Expand"])
+
+    with tab1:
+        defend_top = filtered_seg.iloc[
+            top_n_indices(filtered_seg['target_score'].to_numpy(), 5, segment_buckets == 'Defend')
+        ]
     
-    if not defend_top.empty:
-        st.markdown("**최고 가치 고객 - 관계 유지 및 VIP 혜택 제공**")
+        if not defend_top.empty:
+            st.markdown("**최고 가치 고객 - 관계 유지 및 VIP 혜택 제공**")
         
-        display_cols = ['Segment_AGOP', 'customers', 'transactions', 'revenue', 'avg_purchase', 'target_score']
-        defend_display = defend_top[display_cols].copy()
-        defend_display['revenue'] = defend_display['revenue'].apply(lambda x: f"${x:,.0f}")
-        defend_display['avg_purchase'] = defend_display['avg_purchase'].apply(lambda x: f"${x:,.0f}")
-        defend_display['target_score'] = defend_display['target_score'].apply(lambda x: f"{x:.3f}")
+            display_cols = ['Segment_AGOP', 'customers', 'transactions', 'revenue', 'avg_purchase', 'target_score']
+            defend_display = defend_top[display_cols].copy()
+            defend_display['revenue'] = defend_display['revenue'].apply(lambda x: f"${x:,.0f}")
+            defend_display['avg_purchase'] = defend_display['avg_purchase'].apply(lambda x: f"${x:,.0f}")
+            defend_display['target_score'] = defend_display['target_score'].apply(lambda x: f"{x:.3f}")
         
-        defend_display.columns = ['Segment', 'Customers', 'Transactions', 'Revenue', 'Avg Purchase', 'Target Score']
+            defend_display.columns = ['Segment', 'Customers', 'Transactions', 'Revenue', 'Avg Purchase', 'Target Score']
         
-        st.dataframe(defend_display, use_container_width=True, hide_index=True)
+            st.dataframe(defend_display, use_container_width=True, hide_index=True)
 
-with tab2:
-    grow_top = (
-        filtered_seg[filtered_seg['bucket'] == 'Grow']
-        .sort_values('target_score', ascending=False)
-        .head(5)
-    )
+    with tab2:
+        grow_top = filtered_seg.iloc[
+            top_n_indices(filtered_seg['target_score'].to_numpy(), 5, segment_buckets == 'Grow')
+        ]
     
-    if not grow_top.empty:
-        st.markdown("**성장 잠재력 고객 - 프로모션 및 크로스셀 기회**")
+        if not grow_top.empty:
+            st.markdown("**성장 잠재력 고객 - 프로모션 및 크로스셀 기회**")
         
-        display_cols = ['Segment_AGOP', 'customers', 'transactions', 'revenue', 'avg_purchase', 'target_score']
-        grow_display = grow_top[display_cols].copy()
-        grow_display['revenue'] = grow_display['revenue'].apply(lambda x: f"${x:,.0f}")
-        grow_display['avg_purchase'] = grow_display['avg_purchase'].apply(lambda x: f"${x:,.0f}")
-        grow_display['target_score'] = grow_display['target_score'].apply(lambda x: f"{x:.3f}")
+            display_cols = ['Segment_AGOP', 'customers', 'transactions', 'revenue', 'avg_purchase', 'target_score']
+            grow_display = grow_top[display_cols].copy()
+            grow_display['revenue'] = grow_display['revenue'].apply(lambda x: f"${x:,.0f}")
+            grow_display['avg_purchase'] = grow_display['avg_purchase'].apply(lambda x: f"${x:,.0f}")
+            grow_display['target_score'] = grow_display['target_score'].apply(lambda x: f"{x:.3f}")
         
-        grow_display.columns = ['Segment', 'Customers', 'Transactions', 'Revenue', 'Avg Purchase', 'Target Score']
+            grow_display.columns = ['Segment', 'Customers', 'Transactions', 'Revenue', 'Avg Purchase', 'Target Score']
         
-        st.dataframe(grow_display, use_container_width=True, hide_index=True)
+            st.dataframe(grow_display, use_container_width=True, hide_index=True)
 
-with tab3:
-    expand_top = (
-        filtered_seg[filtered_seg['bucket'] == 'Expand']
-        .sort_values('target_score', ascending=False)
-        .head(5)
-    )
+    with tab3:
+        expand_top = filtered_seg.iloc[
+            top_n_indices(filtered_seg['target_score'].to_numpy(), 5, segment_buckets == 'Expand')
+        ]
     
-    if not expand_top.empty:
-        st.markdown("**확장 기회 고객 - 업셀링 및 가치 제안**")
+        if not expand_top.empty:
+            st.markdown("**확장 기회 고객 - 업셀링 및 가치 제안**")
         
-        display_cols = ['Segment_AGOP', 'customers', 'transactions', 'revenue', 'avg_purchase', 'target_score']
-        expand_display = expand_top[display_cols].copy()
-        expand_display['revenue'] = expand_display['revenue'].apply(lambda x: f"${x:,.0f}")
-        expand_display['avg_purchase'] = expand_display['avg_purchase'].apply(lambda x: f"${x:,.0f}")
-        expand_display['target_score'] = expand_display['target_score'].apply(lambda x: f"{x:.3f}")
+            display_cols = ['Segment_AGOP', 'customers', 'transactions', 'revenue', 'avg_purchase', 'target_score']
+            expand_display = expand_top[display_cols].copy()
+            expand_display['revenue'] = expand_display['revenue'].apply(lambda x: f"${x:,.0f}")
+            expand_display['avg_purchase'] = expand_display['avg_purchase'].apply(lambda x: f"${x:,.0f}")
+            expand_display['target_score'] = expand_display['target_score'].apply(lambda x: f"{x:.3f}")
         
-        expand_display.columns = ['Segment', 'Customers', 'Transactions', 'Revenue', 'Avg Purchase', 'Target Score']
+            expand_display.columns = ['Segment', 'Customers', 'Transactions', 'Revenue', 'Avg Purchase', 'Target Score']
         
-        st.dataframe(expand_display, use_container_width=True, hide_index=True)
+            st.dataframe(expand_display, use_container_width=True, hide_index=True)
+
+
+kpi_panel(customer_index, customer_table, filters)
+main_charts_panel(filtered_seg, figure_cache, load_dataset_fingerprint(), filters)
+bottom_charts_panel(filtered_seg, figure_cache, load_dataset_fingerprint(), filters)
+top_targets_panel(filtered_seg, score_matrix)
+
+warmup = start_warmup(load_dataset_fingerprint(), summary_cache, figure_cache,
+                      load_filter_index(), customer_index, load_access_log())
+
+fs = figure_cache.stats()
+st.sidebar.caption(
+    f"Figure cache: {fs['hits']} hit / {fs['misses']} miss · {fs['size']}/{fs['maxsize']} figures · {fs['payload_kb']:,.0f} KB"
+)
+ws = warmup.status()
+if warmup_top_n() is None:
+    st.sidebar.caption("Warm-up: off")
+else:
+    st.sidebar.caption(f"Warm-up: {ws['state']} · {ws['done']}/{ws['total']} views"
+                       + (f" · {ws['elapsed_s']:.1f}s" if ws['state'] == 'done' else ""))
+with st.sidebar.expander(f"Rerun profile (fragments {'on' if fragments_enabled() else 'off'})"):
+    st.json(profile.stats())
 
 # Footer
 st.markdown("<br><br>", unsafe_allow_html=True)
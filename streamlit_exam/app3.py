@@ -43,6 +43,13 @@ import numpy as np
 import altair as alt
 from datetime import datetime, timedelta
 
+from segcore.panels import PanelProfile, fragments_enabled
+from segcore.exports import EXPORT_FORMATS, ExportCache
+from segcore.kpistore import ALL, KpiStore, default_inbox_dir, default_sources
+from segcore.anomaly import AnomalyDetector
+from segcore.downsample import downsample
+from segcore.pager import EditOverlay, TablePager
+
 # -----------------------------
 # Page Config + Global Styling
 # -----------------------------
@@ -100,10 +107,61 @@ def safe_toast(msg: str, icon: str = "✨"):
     if hasattr(st, "toast"):
         st.toast(msg, icon=icon)
 
-@st.cache_data(show_spinner=False)
-def make_daily_kpi(days: int = 30, seed: int = 7) -> pd.DataFrame:
+@st.cache_resource
+def load_panel_profile():
+    # 패널별 실행 횟수/시간 (프로세스 내 모든 세션 공유)
+    return PanelProfile()
+
+@st.cache_resource
+def load_export_cache():
+    # 다운로드 파일은 클릭 시에만 생성, 내용 해시로 재사용 (프로세스 내 모든 세션 공유)
+    return ExportCache()
+
+@st.cache_resource
+def load_kpi_store():
+    # 이벤트 append-only 저장소 + 캠페인별 일/주/월 rollup (data/.kpistore, 프로세스 내 모든 세션 공유)
+    return KpiStore()
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def campaign_alerts(store_version: int, threshold: float, method: str) -> pd.DataFrame:
+    # 모든 캠페인을 한 번에 점수화 (저장소 버전이 같으면 재사용). 알림은 마지막 날만 보므로
+    # 기준선 window 일 + 마지막 날만 읽고 마지막 날만 점수화 (자동 새로고침마다 버전이 바뀌어도 가벼움)
+    # 데이터가 window 일이 안 되면 점수가 전부 NaN -> 알림 없음
+    detector = AnomalyDetector(window=7, threshold=threshold, method=method)
+    names, dates, views = load_kpi_store().matrix("D", periods=detector.window + 1)
+    z, baseline = detector.score_matrix(views, last=1)
+    return detector.alerts(z, views, baseline, names, pd.to_datetime(dates).date, last_days=1)
+
+def series_alerts(kpi_df: pd.DataFrame, name: str, threshold: float, method: str) -> pd.DataFrame:
+    detector = AnomalyDetector(window=7, threshold=threshold, method=method)
+    views = kpi_df["views"].to_numpy()[None, :]
+    z, baseline = detector.score_matrix(views)
+    return detector.alerts(z, views, baseline, [name], kpi_df["date"].to_numpy(), last_days=1)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_viewer_pager(table_key, _viewer_df: pd.DataFrame):
+    # 시청자 표는 서버에 한 벌 (세션 간 공유, 정렬/필터 결과 캐시) -> 브라우저에는 현재 페이지만
+    return TablePager(_viewer_df)
+
+def viewer_overlay(table_key) -> EditOverlay:
+    # 편집 내용은 세션별 overlay (표가 바뀌면 새로)
+    if st.session_state.get("_viewer_edits_key") != table_key:
+        st.session_state["_viewer_edits_key"] = table_key
+        st.session_state["_viewer_edits"] = EditOverlay()
+    return st.session_state["_viewer_edits"]
+
+REPORT_UNITS = {"일간": "D", "주간": "W", "월간": "M"}
+
+def mock_rollup(kpi_df: pd.DataFrame, grain: str) -> pd.DataFrame:
+    # Mock 데이터(최대 60일)는 그 자리에서 주/월 합계
+    start = pd.to_datetime(kpi_df["date"]).dt.to_period(grain).dt.start_time.dt.date
+    return kpi_df.groupby(start)[["views", "likes"]].sum().rename_axis("date").reset_index()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def make_daily_kpi(days: int = 30, seed: int = 7, end=None) -> pd.DataFrame:
+    # end(기준일)가 캐시 키에 들어가므로 날짜가 바뀌면 자동으로 새 데이터 (수동 캐시 클리어 불필요)
     rng = np.random.default_rng(seed)
-    end = datetime.now().date()
+    end = end or datetime.now().date()
     dates = pd.date_range(end=end, periods=days, freq="D")
 
     base_views = np.linspace(120_000, 420_000, days)
@@ -117,7 +175,7 @@ def make_daily_kpi(days: int = 30, seed: int = 7) -> pd.DataFrame:
     df["views_ma7"] = df["views"].rolling(7, min_periods=1).mean().round(0).astype(int)
     return df
 
-@st.cache_data(show_spinner=False)
+@st.cache_data(show_spinner=False, max_entries=8)
 def make_viewer_table(kpi_df: pd.DataFrame, seed: int = 11) -> pd.DataFrame:
     rng = np.random.default_rng(seed)
     dates = kpi_df["date"].tolist()
@@ -166,12 +224,16 @@ def kpi_delta(curr: int, prev: int) -> str:
     sign = "+" if pct >= 0 else ""
     return f"{sign}{pct:.1f}%"
 
-def build_views_chart(kpi_df: pd.DataFrame):
+CHART_POINTS = 800  # 차트 폭(px) 정도: 이보다 긴 구간은 LTTB 로 줄여서 보낸다
+
+def build_views_chart(kpi_df: pd.DataFrame, max_points: int = CHART_POINTS):
     base = pd.DataFrame({
         "date": pd.to_datetime(kpi_df["date"]),
         "views": kpi_df["views"],
         "views_ma7": kpi_df["views_ma7"],
     })
+    # 세 레이어(선/이동평균/영역)가 같은 행을 쓰므로 조회수 모양 기준으로 한 번만 줄인다
+    base = downsample(base, "date", "views", max_points)
 
     line = (
         alt.Chart(base)
@@ -226,21 +288,42 @@ with st.sidebar:
 
     # UX 느낌: 필터/컨트롤
     st.markdown("### 🧪 Quick Controls")
-    DAYS = st.slider("분석 기간(일)", 7, 60, 30, step=1)
-    show_ma = st.toggle("7일 이동평균 표시", value=True)
-    mock_mode = st.toggle("Mock Data 모드", value=True, help="현재는 샘플 데이터로 동작합니다.")
+    DAYS = st.slider("분석 기간(일)", 7, 1095, 30, step=1)  # 차트는 LTTB 로 점 수 제한 -> 긴 기간도 전송량 일정
+    mock_mode = st.toggle("Mock Data 모드", value=True, help="끄면 data/kpi_events/*.csv 이벤트를 ingest 해서 사용합니다.")
+    campaign = ALL
+    if not mock_mode:
+        # 새 파일/새 줄만 append (변화 없으면 stat 만) -> 화면은 rollup 만 읽는다
+        kpi_store = load_kpi_store()
+        # 새 데이터만 (inbox 파일의 새 줄 + SQLite high-water mark 이후 행), 1초에 한 번까지
+        ingest = kpi_store.refresh(sources=default_sources(), min_interval_s=1.0)
+        campaign = st.selectbox("캠페인", [ALL] + kpi_store.campaigns())
+        for err in ingest["errors"]:
+            st.warning(err)
 
     st.divider()
     st.markdown("### 🔔 Signals")
     anomaly_guard = st.checkbox("급등/급락 감지(알림)", value=True)
-    auto_refresh = st.checkbox("자동 새로고침(데모)", value=False)
-    st.caption("※ 자동 새로고침은 실제 배포 시 st_autorefresh 등으로 연결 권장")
+    if anomaly_guard:
+        z_threshold = st.slider("감지 민감도 (|z| 기준)", 2.0, 5.0, 3.0, step=0.5)
+        detect_method = st.radio("기준선", ["zscore", "robust"], horizontal=True,
+                                 format_func=lambda m: {"zscore": "평균/표준편차", "robust": "중앙값/MAD"}[m])
+    auto_refresh = st.checkbox("자동 새로고침", value=False, disabled=mock_mode,
+                               help="저장소 모드에서 주기마다 새 데이터만 가져옵니다 (Mock 데이터는 새 데이터 없음).")
+    refresh_s = st.select_slider("새로고침 주기(초)", [5, 10, 30, 60, 300], value=30, disabled=not auto_refresh)
 
 # -----------------------------
 # Data
 # -----------------------------
-kpi_df = make_daily_kpi(days=DAYS, seed=7)
+if mock_mode:
+    kpi_df = make_daily_kpi(days=DAYS, seed=7, end=datetime.now().date())
+else:
+    st.session_state["_kpi_version"] = kpi_store.version  # 이 rerun 이 읽은 저장소 버전 (자동 새로고침 비교용)
+    kpi_df = kpi_store.frame("D", campaign, periods=DAYS)
+    if kpi_df.empty:
+        st.info(f"ingest 된 이벤트가 없습니다. {default_inbox_dir()}/ 에 이벤트 CSV(ts, campaign, views, likes)를 넣어주세요.", icon="📥")
+        st.stop()
 viewer_df = make_viewer_table(kpi_df, seed=11)
+table_key = (mock_mode, campaign, len(kpi_df), str(kpi_df["date"].iloc[-1]), int(kpi_df["views"].sum()))
 
 # KPI 요약
 curr_views = int(kpi_df["views"].iloc[-1])
@@ -248,16 +331,22 @@ prev_views = int(kpi_df["views"].iloc[-2]) if len(kpi_df) >= 2 else 0
 curr_likes = int(kpi_df["likes"].iloc[-1])
 prev_likes = int(kpi_df["likes"].iloc[-2]) if len(kpi_df) >= 2 else 0
 
-# Anomaly (간단 룰 기반)
-if anomaly_guard and len(kpi_df) >= 8:
-    v_today = kpi_df["views"].iloc[-1]
-    v_ma7 = kpi_df["views"].rolling(7).mean().iloc[-2]  # 전일까지의 MA7
-    if pd.notna(v_ma7) and v_ma7 > 0:
-        ratio = v_today / v_ma7
-        if ratio >= 1.35:
-            safe_toast("조회수가 평소 대비 크게 상승했어요.", icon="🚀")
-        elif ratio <= 0.70:
-            safe_toast("조회수가 평소 대비 크게 하락했어요.", icon="🧊")
+# Anomaly: 직전 7일 기준선 대비 오늘 값의 z 점수 (저장소 모드면 모든 캠페인을 한 번에)
+alerts = None
+if anomaly_guard:
+    if mock_mode:
+        alerts = series_alerts(kpi_df, "조회수", z_threshold, detect_method) if len(kpi_df) >= 8 else None
+    else:
+        alerts = campaign_alerts(kpi_store.version, z_threshold, detect_method)
+    if alerts is not None and not alerts.empty:
+        top = alerts.iloc[0]
+        toast_key = (top["series"], str(top["date"]), top["direction"])
+        if st.session_state.get("_alert_toast") != toast_key:  # 같은 알림은 rerun 마다 다시 띄우지 않음
+            st.session_state["_alert_toast"] = toast_key
+            if top["direction"] == "spike":
+                safe_toast(f"{top['series']}: 조회수가 평소 대비 크게 상승했어요. (x{top['change']})", icon="🚀")
+            else:
+                safe_toast(f"{top['series']}: 조회수가 평소 대비 크게 하락했어요. (x{top['change']})", icon="🧊")
 
 # -----------------------------
 # Header (Title + Image)
@@ -265,13 +354,33 @@ if anomaly_guard and len(kpi_df) >= 8:
 st.title("🐬 Dolphiners Films — KPI Dashboard")
 st.caption("광고 성과(YouTube) 모니터링용 데모 대시보드 · UI/UX 프로토타입 (Streamlit)")
 
+# 자동 새로고침: 이 조각만 refresh_s 마다 실행 -> 저장소 버전이 바뀌었을 때만 전체 화면 rerun
+# (rollup 에서 다시 읽기만, 캐시 전체 비우기 없음). 동기화 자체는 세션이 여럿이어도 주기당 한 번.
+if auto_refresh and not mock_mode:
+    @st.fragment(run_every=refresh_s)
+    def live_refresh():
+        info = kpi_store.refresh(sources=default_sources(), min_interval_s=refresh_s / 2)
+        if st.session_state["_kpi_version"] != kpi_store.version:
+            st.session_state["_kpi_version"] = kpi_store.version
+            st.rerun()
+        st.caption(f"🟢 자동 새로고침 {refresh_s}초 · 확인 {datetime.now():%H:%M:%S} · "
+                   f"저장소 v{info['version']}" + (f" · +{info['rows']:,} rows" if info["rows"] else ""))
+
+    live_refresh()
+
 with st.expander("📌 Hero Image (광고 스틸컷)", expanded=True):
     st.image(HERO_IMAGE_URL, use_container_width=True, caption="Dolphiners Films 관련 광고 스틸컷(기사 이미지)")
 
 # =============================
-# Page: Main
+# Panels
+# - 위젯이 있는 패널은 st.fragment: 그 위젯을 바꾸면 그 패널만 다시 실행
+#   (차트 옵션/표 편집/설정 체크박스가 KPI 카드나 다른 탭을 다시 만들지 않음)
 # =============================
-if page == "메인 페이지":
+profile = load_panel_profile()
+fragment = st.fragment if fragments_enabled() else (lambda fn: fn)
+
+@profile.track("snapshot")
+def snapshot_panel(kpi_df, curr_views, prev_views, curr_likes, prev_likes):
     st.subheader("📊 Executive Snapshot")
 
     # 2 컬럼 KPI 구성
@@ -285,8 +394,7 @@ if page == "메인 페이지":
         )
 
         # 보너스: 미니 트렌드
-        chart_df = kpi_df.copy()
-        chart_df["date"] = pd.to_datetime(chart_df["date"])
+        chart_df = downsample(kpi_df.assign(date=pd.to_datetime(kpi_df["date"])), "date", "views", 200)
         mini = alt.Chart(chart_df).mark_line().encode(
             x=alt.X("date:T", title=""),
             y=alt.Y("views:Q", title=""),
@@ -310,19 +418,27 @@ if page == "메인 페이지":
             delta=f"{(like_rate_today - like_rate_prev):+.2f}pp" if prev_views else "—",
         )
 
+
+@profile.track("health")
+def health_panel(curr_views, alerts):
     st.divider()
 
     # 살짝 기발한 UI: 상태 배지 + 진행바
     st.markdown("### 🧭 Health Check")
     h1, h2, h3 = st.columns(3)
     with h1:
-        st.info("Signal: **Stable** · 노이즈 내 변동", icon="🟦")
+        if alerts is not None and not alerts.empty:
+            st.error(f"Signal: **{len(alerts)} alerts** · 최대 |z| {alerts['z'].abs().max():.1f}", icon="🟥")
+        else:
+            st.info("Signal: **Stable** · 노이즈 내 변동", icon="🟦")
     with h2:
         st.success("Pipeline: **Ready** · 데이터 생성 OK", icon="🟩")
     with h3:
         st.warning("Action: **Connect API** · 설정에서 연결", icon="🟨")
 
     st.progress(min(1.0, max(0.0, curr_views / 500_000)), text="목표(500k views) 대비 진행률")
+    if alerts is not None and not alerts.empty:
+        st.dataframe(alerts, use_container_width=True, hide_index=True)
 
     st.divider()
     st.markdown("### 🧩 Notes")
@@ -332,74 +448,133 @@ if page == "메인 페이지":
             "- 실제 구현 시 YouTube Analytics API 연결 + 캠페인/영상별 드릴다운 구조를 추천."
         )
 
-# =============================
-# Page: Analytics Report
-# =============================
-elif page == "분석보고서":
-    st.subheader("🧪 분석보고서")
-
-    tab_chart, tab_data, tab_settings = st.tabs(["📈 차트", "🗃️ 데이터", "⚙️ 설정"])
 
-    with tab_chart:
-        st.markdown("#### 일별 YouTube 광고 조회수 현황")
-        if not show_ma:
-            # 이동평균 숨김 옵션
-            tmp = kpi_df.copy()
-            tmp["views_ma7"] = np.nan
-
-        fig = build_views_chart(kpi_df if show_ma else tmp)
-        st.altair_chart(fig, use_container_width=True)
+@fragment
+@profile.track("views_chart")
+def views_chart_panel(kpi_df):
+    unit = st.session_state.get("report_unit", "일간")
+    grain = REPORT_UNITS[unit]
+    st.markdown(f"#### {unit} YouTube 광고 조회수 현황")
+    if grain != "D":
+        # 주/월 버킷: 저장소 rollup (또는 Mock 일별 합계), 이동평균 없음
+        periods = -(-DAYS // (7 if grain == "W" else 30)) + 1
+        rolled = mock_rollup(kpi_df, grain) if mock_mode else kpi_store.frame(grain, campaign, periods=periods)
+        st.altair_chart(build_views_chart(rolled.assign(views_ma7=np.nan)), use_container_width=True)
+        st.caption(f"실선: {unit} 조회수 합계 · 기본 리포트 단위는 설정에서 변경")
+        return
+    c_ma, c_res = st.columns([1, 1])
+    show_ma = c_ma.toggle("7일 이동평균 표시", value=True)
+    # 해상도 = 차트에 보낼 최대 점 수 (대략 차트 폭 px), 구간을 좁히면 그 구간 안에서 다시 이만큼
+    max_points = c_res.select_slider("차트 해상도(점)", [200, 400, 800, 1600], value=CHART_POINTS)
+    view = kpi_df
+    if len(kpi_df) > 60:
+        first, last = kpi_df["date"].iloc[0], kpi_df["date"].iloc[-1]
+        zoom = st.slider("표시 구간", min_value=first, max_value=last, value=(first, last), format="YYYY-MM-DD")
+        view = kpi_df[(kpi_df["date"] >= zoom[0]) & (kpi_df["date"] <= zoom[1])]
+    if not show_ma:
+        # 이동평균 숨김 옵션
+        view = view.assign(views_ma7=np.nan)
+
+    fig = build_views_chart(view, max_points)
+    st.altair_chart(fig, use_container_width=True)
+
+    shown = min(len(view), max_points)
+    st.caption(f"실선: 일별 조회수 · 점선: 7일 이동평균 · 표시 {shown:,}점 / 원본 {len(view):,}점")
+
+
+@fragment
+@profile.track("viewer_table")
+def viewer_table_panel(viewer_df, table_key):
+    st.markdown("#### 광고 시청자(샘플) — 일자별 테이블")
+    st.caption("컬럼 예시: 성별, 연령대, 시청시간대, 평균시청시간, TOP 기기/지역 등 (5개 이상 구성)")
+
+    pager = load_viewer_pager(table_key, viewer_df)
+    overlay = viewer_overlay(table_key)
+    all_cols = list(pager.df.columns)
+
+    # 정렬/필터/컬럼 선택은 서버에서 (결과 행 번호만 캐시), 브라우저에는 현재 페이지만 보낸다
+    c1, c2, c3 = st.columns([2, 1, 1])
+    columns = c1.multiselect("표시 컬럼", all_cols, default=all_cols) or all_cols
+    sort = c2.selectbox("정렬", ["(원래 순서)"] + all_cols)
+    descending = c3.toggle("내림차순", value=False, disabled=sort == "(원래 순서)")
+
+    f1, f2 = st.columns([1, 2])
+    filter_col = f1.selectbox("필터 컬럼", ["(없음)"] + all_cols)
+    filters = {}
+    if filter_col != "(없음)":
+        lo, hi = pager.value_range(filter_col) if pd.api.types.is_numeric_dtype(pager.df[filter_col]) else (None, None)
+        if lo is not None and lo < hi:
+            filters[filter_col] = f2.slider("범위", float(lo), float(hi), (float(lo), float(hi)))
+        elif pager.distinct(filter_col) is not None:
+            filters[filter_col] = f2.multiselect("값", pager.distinct(filter_col))
+        else:
+            filters[filter_col] = f2.text_input("포함 문자열", value="")
+
+    rows = pager.rows(filters, None if sort == "(원래 순서)" else sort, not descending)
+    p1, p2, p3 = st.columns([1, 1, 2])
+    page_size = p1.selectbox("페이지 크기", [25, 50, 100, 200], index=1)
+    n_pages = pager.n_pages(rows, page_size)
+    page = p2.number_input("페이지", min_value=1, max_value=n_pages, value=1, step=1) - 1
+    p3.caption(f"{len(rows):,} / {len(pager):,}행 · {page + 1}/{n_pages} 페이지 · 편집 {len(overlay):,}셀")
+
+    # 데이터 편집 가능한 UI (예쁨 + 실무 감각) - 페이지/조건마다 별도 key (편집 상태가 다른 행에 섞이지 않게)
+    shown = pager.page(rows, page, page_size, columns, overlay)
+    edited = st.data_editor(
+        shown,
+        use_container_width=True,
+        hide_index=True,
+        num_rows="fixed",
+        key=f"viewer_{hash((table_key, tuple(columns), sort, descending, str(filters), page_size, page))}",
+    )
+    overlay.record(shown, edited)
+
+    # 다운로드 (편집할 때마다 CSV 를 만들지 않고, 버튼을 눌렀을 때만 생성) - 현재 조건의 전체 행 + 편집 반영
+    col_fmt, col_btn = st.columns([1, 3])
+    export_fmt = col_fmt.selectbox(
+        "파일 형식",
+        list(EXPORT_FORMATS),
+        format_func=lambda f: EXPORT_FORMATS[f][0],
+        label_visibility="collapsed",
+    )
+    label, ext, mime = EXPORT_FORMATS[export_fmt]
+    col_btn.download_button(
+        f"⬇️ {label} 다운로드 ({len(rows):,}행)",
+        data=load_export_cache().deferred(lambda: pager.frame(rows, columns, overlay), export_fmt),
+        file_name=f"dolphiners_viewer_daily{ext}",
+        mime=mime,
+        use_container_width=True,
+    )
 
-        st.caption("실선: 일별 조회수 · 점선: 7일 이동평균")
 
-    with tab_data:
-        st.markdown("#### 광고 시청자(샘플) — 일자별 테이블")
-        st.caption("컬럼 예시: 성별, 연령대, 시청시간대, 평균시청시간, TOP 기기/지역 등 (5개 이상 구성)")
-
-        # 데이터 편집 가능한 UI (예쁨 + 실무 감각)
-        edited = st.data_editor(
-            viewer_df,
-            use_container_width=True,
-            hide_index=True,
-            num_rows="fixed",
-        )
+@fragment
+@profile.track("connect_options")
+def connect_options_panel():
+    st.markdown("#### 연결 시 옵션")
+    colA, colB = st.columns(2, gap="large")
+    with colA:
+        st.checkbox("YouTube Analytics API 연결", value=False)
+        st.checkbox("캠페인/영상별 세그먼트 가져오기", value=True)
+        st.checkbox("실시간(near real-time) 지표 포함", value=False)
+    with colB:
+        st.checkbox("개인정보 마스킹(PII 제거)", value=True)
+        st.checkbox("이상치 알림(Webhook/Slack)", value=True)
+        st.checkbox("자동 리포트 스냅샷(PDF)", value=False)
 
-        # 다운로드
-        csv = edited.to_csv(index=False).encode("utf-8-sig")
-        st.download_button(
-            "⬇️ CSV 다운로드",
-            data=csv,
-            file_name="dolphiners_viewer_daily.csv",
-            mime="text/csv",
-            use_container_width=True,
-        )
+    st.info("체크 항목은 데모 UI입니다. 실제 구현 시 설정값을 secrets.toml + DB로 관리하세요.", icon="🧠")
 
-    with tab_settings:
-        st.markdown("#### 연결 시 옵션")
-        colA, colB = st.columns(2, gap="large")
-        with colA:
-            st.checkbox("YouTube Analytics API 연결", value=False)
-            st.checkbox("캠페인/영상별 세그먼트 가져오기", value=True)
-            st.checkbox("실시간(near real-time) 지표 포함", value=False)
-        with colB:
-            st.checkbox("개인정보 마스킹(PII 제거)", value=True)
-            st.checkbox("이상치 알림(Webhook/Slack)", value=True)
-            st.checkbox("자동 리포트 스냅샷(PDF)", value=False)
-
-        st.info("체크 항목은 데모 UI입니다. 실제 구현 시 설정값을 secrets.toml + DB로 관리하세요.", icon="🧠")
-
-# =============================
-# Page: Settings
-# =============================
-else:  # "설정"
-    st.subheader("⚙️ 설정")
 
+@fragment
+@profile.track("workspace")
+def workspace_panel():
     st.markdown("### Workspace")
     col1, col2 = st.columns(2, gap="large")
 
     with col1:
         st.text_input("프로젝트 이름", value="Dolphiners KPI Dashboard")
-        st.selectbox("기본 리포트 단위", ["일간", "주간", "월간"], index=0)
+        # 위젯 key 는 다른 페이지로 가면 지워지므로 값은 별도 키에 보관
+        unit = st.selectbox("기본 리포트 단위", list(REPORT_UNITS),
+                            index=list(REPORT_UNITS).index(st.session_state.get("report_unit", "일간")))
+        st.session_state["report_unit"] = unit
         st.multiselect("기본 필터(데모)", ["캠페인", "영상", "지역", "기기", "연령대"], default=["캠페인", "영상"])
         st.toggle("다크 모드 최적화(시각적)", value=True)
 
@@ -410,7 +585,10 @@ else:  # "설정"
         st.toggle("캐시 활성화(st.cache_data)", value=True)
         st.toggle("서버 로그(디버그)", value=False)
 
-    st.divider()
+
+@fragment
+@profile.track("actions")
+def actions_panel():
     st.markdown("### Actions")
     a1, a2, a3 = st.columns(3)
     with a1:
@@ -418,14 +596,55 @@ else:  # "설정"
             safe_toast("설정을 저장했어요.", icon="💾")
             st.balloons()
     with a2:
-        if st.button("🔄 데이터 새로고침(데모)", use_container_width=True):
-            st.cache_data.clear()
-            safe_toast("데이터를 새로고침했어요.", icon="🔄")
+        if st.button("🔄 데이터 새로고침", use_container_width=True):
+            if mock_mode:
+                # KPI/시청자 표만 다시 생성 (다른 cache_data/cache_resource 는 유지)
+                make_daily_kpi.clear()
+                make_viewer_table.clear()
+                safe_toast("데이터를 새로고침했어요.", icon="🔄")
+            else:
+                # 저장소: 새 행만 가져와 rollup 에 합침 (이전 데이터 재계산 없음)
+                info = kpi_store.refresh(sources=default_sources(), force=True)
+                safe_toast(f"새 이벤트 {info['rows']:,}건을 반영했어요.", icon="🔄")
             st.rerun()
     with a3:
-        if st.button("🧹 캐시 클리어", use_container_width=True):
-            st.cache_data.clear()
-            safe_toast("캐시를 비웠어요.", icon="🧼")
+        # 전체 캐시 클리어 버튼 대신: 데이터는 기준일이 바뀌면 자동 갱신
+        st.caption(f"데이터 기준일: {kpi_df['date'].iloc[-1]} · 날짜가 바뀌면 자동 갱신")
+
+
+# =============================
+# Page: Main
+# =============================
+if page == "메인 페이지":
+    snapshot_panel(kpi_df, curr_views, prev_views, curr_likes, prev_likes)
+    health_panel(curr_views, alerts)
+
+# =============================
+# Page: Analytics Report
+# =============================
+elif page == "분석보고서":
+    st.subheader("🧪 분석보고서")
+
+    tab_chart, tab_data, tab_settings = st.tabs(["📈 차트", "🗃️ 데이터", "⚙️ 설정"])
+
+    with tab_chart:
+        views_chart_panel(kpi_df)
+
+    with tab_data:
+        viewer_table_panel(viewer_df, table_key)
+
+    with tab_settings:
+        connect_options_panel()
+
+# =============================
+# Page: Settings
+# =============================
+else:  # "설정"
+    st.subheader("⚙️ 설정")
+    workspace_panel()
+
+    st.divider()
+    actions_panel()
 
     st.caption("실서비스에서는 역할(권한)·환경(dev/prod)·감사로그까지 묶어서 Settings를 설계하는 걸 추천.")
 
@@ -433,6 +652,12 @@ else:  # "설정"
 st.divider()
 st.caption("© Prototype Dashboard · Streamlit UI Demo")
 
+if not mock_mode:
+    with st.sidebar.expander("KPI store"):
+        st.json(kpi_store.stats())
+with st.sidebar.expander(f"Rerun profile (fragments {'on' if fragments_enabled() else 'off'})"):
+    st.json(profile.stats())
+
 
 
 
@@ -0,0 +1,276 @@
+"""
+세그멘테이션 파이프라인 벤치마크 (walmart.py / app.py 뒤의 계산 경로)
+
+    python bench.py                          # 1x
+    python bench.py --scales 1 10 100 --repeat 3 --out bench_results.json
+    python bench.py --compare old.json       # 이전 결과 대비 느려진 단계 표시 (있으면 exit 1)
+
+합성 데이터는 data/.bench/walmart_<scale>x_s<seed>.csv 에 한 번만 생성된다 (seed 고정).
+단계마다 fork 한 자식 프로세스에서 실행해 peak RSS 를 단계별로 분리해서 잰다.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from segcore.store import load_table, read_csv_typed
+from segcore.prep import preprocess
+from segcore.segments import build_segment_table, calc_kpis
+from segcore.filters import FilterIndex
+from segcore.distinct import DistinctIndex
+from segcore.cube import CubeView, SegmentCube
+from segcore.synth import write_synthetic_csv
+from segcore.parallel import shutdown_pool
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", ".bench")
+FILTERS = {"City_Category": "B", "Gender": "M", "Age": "26-35"}
+SCHEMA_VERSION = 1
+
+
+# =========================
+# RSS helpers
+# =========================
+def _proc_status_kb(key: str):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Linux: VmHWM 을 현재 RSS 로 초기화"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb():
+    hwm = _proc_status_kb("VmHWM")
+    if hwm is not None:
+        return hwm
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS 는 bytes
+
+
+# =========================
+# Cases
+# =========================
+def make_cases(path: str, workers: int):
+    """(이름, 입력 준비 함수, 측정 함수) 목록. 입력은 부모에서 한 번 준비해 자식에 fork 로 공유."""
+    state = {}
+
+    def raw():
+        if "raw" not in state:
+            state["raw"] = load_table(path)  # Arrow 캐시 생성/확인
+        return state["raw"]
+
+    def pre():
+        if "pre" not in state:
+            state["pre"] = preprocess(raw())
+        return state["pre"]
+
+    def filter_index():
+        if "fidx" not in state:
+            state["fidx"] = FilterIndex.build(pre(), list(FILTERS))
+        return state["fidx"]
+
+    def customer_index():
+        if "cidx" not in state:
+            state["cidx"] = DistinctIndex.build(pre(), list(FILTERS) + ["Segment_AGOP"])
+        return state["cidx"]
+
+    def cube():
+        if "cube" not in state:
+            state["cube"] = SegmentCube.build(pre())
+        return state["cube"]
+
+    def filter_chain():
+        part = filter_index().take(pre(), FILTERS, columns=["Segment_AGOP", "User_ID", "Purchase"])
+        return part, customer_index().count(FILTERS, by="Segment_AGOP")
+
+    cases = [
+        ("read_csv_typed", lambda: None, lambda: read_csv_typed(path)),
+        ("load_csv_any", raw, lambda: load_table(path)),
+        ("preprocess", raw, lambda: preprocess(raw())),
+        ("build_segment_table", pre, lambda: build_segment_table(pre(), workers=1)),
+        ("calc_kpis", pre, lambda: calc_kpis(pre())),
+        ("filter_index_build", pre, lambda: FilterIndex.build(pre(), list(FILTERS))),
+        ("filter_chain", lambda: (filter_index(), customer_index()), filter_chain),
+        ("cube_build", pre, lambda: SegmentCube.build(pre())),
+        ("cube_query", cube, lambda: CubeView(cube(), FILTERS).segment_table()),
+    ]
+    if workers > 1:
+        cases.insert(4, (f"build_segment_table_w{workers}", pre,
+                         lambda: build_segment_table(pre(), workers=workers)))
+    return cases
+
+
+def _measure(fn, repeat: int) -> dict:
+    reset = _reset_peak_rss()
+    base = _proc_status_kb("VmRSS")
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    peak = _peak_rss_kb()
+    return {
+        "wall_s": float(np.median(times)),
+        "wall_min_s": float(min(times)),
+        "times_s": times,
+        "peak_rss_mb": peak / 1024 if peak is not None else None,
+        "peak_rss_delta_mb": (peak - base) / 1024 if (reset and peak is not None and base is not None) else None,
+    }
+
+
+def run_case(fn, repeat: int) -> dict:
+    """fork 가능하면 자식 프로세스에서 측정 (단계별 peak RSS 분리)"""
+    if "fork" not in mp.get_all_start_methods():
+        return _measure(fn, repeat)
+    ctx = mp.get_context("fork")
+    recv, send = ctx.Pipe(duplex=False)
+
+    def child():
+        try:
+            send.send(_measure(fn, repeat))
+        except BaseException as e:  # noqa: BLE001 - 부모에 에러 전달
+            send.send({"error": repr(e)})
+        finally:
+            send.close()
+            shutdown_pool()
+
+    proc = ctx.Process(target=child)
+    proc.start()
+    send.close()
+    try:
+        result = recv.recv()
+    except EOFError:
+        result = {"error": f"worker exited with code {proc.exitcode}"}
+    proc.join()
+    return result
+
+
+# =========================
+# Runner
+# =========================
+def dataset_path(scale: float, data_dir: str = BENCH_DIR, seed: int = 0) -> str:
+    path = os.path.join(data_dir, f"walmart_{scale:g}x_s{seed}.csv")
+    if not os.path.exists(path):
+        print(f"[bench] generating {path} ...", file=sys.stderr)
+        write_synthetic_csv(path, scale, seed)
+    return path
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run(scales, repeat=3, data_dir=BENCH_DIR, seed=0, workers=1, only=None) -> dict:
+    results = []
+    for scale in scales:
+        path = dataset_path(scale, data_dir, seed)
+        rows = len(load_table(path))
+        for name, setup, fn in make_cases(path, workers):
+            if only and name not in only:
+                continue
+            setup()
+            r = run_case(fn, repeat)
+            r.update(name=name, scale=scale, rows=rows)
+            if "wall_s" in r:
+                r["rows_per_s"] = rows / r["wall_s"] if r["wall_s"] > 0 else None
+            results.append(r)
+            _print_row(r)
+    return {"schema": SCHEMA_VERSION, "env": environment(), "repeat": repeat, "seed": seed, "results": results}
+
+
+def _print_row(r: dict):
+    if "error" in r:
+        print(f"{r['scale']:>6g}x  {r['name']:<28} ERROR {r['error']}", file=sys.stderr)
+        return
+    rps = r.get("rows_per_s")
+    delta = r.get("peak_rss_delta_mb")
+    print(
+        f"{r['scale']:>6g}x  {r['name']:<28} {r['wall_s']*1000:>10.1f} ms"
+        f"  {(rps or 0)/1e6:>8.2f} Mrows/s"
+        f"  peak {r['peak_rss_mb'] or 0:>8.1f} MB"
+        f"  (+{delta if delta is not None else float('nan'):.1f} MB)",
+        file=sys.stderr,
+    )
+
+
+def compare(current: dict, baseline: dict, threshold: float = 1.10) -> list:
+    """wall_s 가 baseline 대비 threshold 배 이상 느려진 (scale, name) 목록"""
+    old = {(r["scale"], r["name"]): r for r in baseline.get("results", []) if "wall_s" in r}
+    regressions = []
+    for r in current["results"]:
+        prev = old.get((r["scale"], r["name"]))
+        if prev is None or "wall_s" not in r:
+            continue
+        ratio = r["wall_s"] / prev["wall_s"] if prev["wall_s"] > 0 else float("inf")
+        flag = "REGRESSION" if ratio >= threshold else ""
+        print(f"{r['scale']:>6g}x  {r['name']:<28} {prev['wall_s']*1000:>10.1f} -> {r['wall_s']*1000:>10.1f} ms"
+              f"  x{ratio:.2f} {flag}", file=sys.stderr)
+        if flag:
+            regressions.append({"scale": r["scale"], "name": r["name"], "ratio": ratio})
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scales", type=float, nargs="+", default=[1.0], help="원본(550,068행) 대비 배수 (예: 1 10 100)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=1, help=">1 이면 병렬 build_segment_table 도 측정")
+    ap.add_argument("--only", nargs="*", help="측정할 단계 이름")
+    ap.add_argument("--data-dir", default=BENCH_DIR)
+    ap.add_argument("--out", help="결과 JSON 경로 (생략 시 stdout)")
+    ap.add_argument("--compare", help="비교할 이전 결과 JSON")
+    ap.add_argument("--threshold", type=float, default=1.10, help="회귀 판정 배수")
+    args = ap.parse_args(argv)
+
+    report = run(args.scales, args.repeat, args.data_dir, args.seed, args.workers, args.only)
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(report, json.load(f), args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
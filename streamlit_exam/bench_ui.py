@@ -0,0 +1,261 @@
+"""
+대시보드 rerun 벤치마크: 위젯 하나를 바꿨을 때 다시 실행되는 패널 수 / rerun 지연 (fragment on/off 비교)
+
+    python bench_ui.py                              # walmart.py, app.py, app3.py (1x 합성 데이터)
+    python bench_ui.py --apps walmart.py --repeat 10 --out ui_bench.json
+
+앱마다 headless `streamlit run` 서버를 SEGCORE_FRAGMENTS=1 / 0 으로 띄우고, 브라우저와 같은
+websocket rerun 요청(위젯 상태 + 위젯이 속한 fragment id)을 보낸다.
+  latency = 요청 전송 ~ script_finished 수신 (서버 실행 + 직렬화 + 전송)
+  panels  = 그 사이 SEGCORE_PANEL_LOG 에 기록된 패널 실행 수
+st.tabs 전환은 브라우저 안에서만 일어나 서버 rerun 이 없으므로 측정 대상이 아니다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from bench import BENCH_DIR, dataset_path, environment
+from segcore.panels import FRAGMENTS_ENV, PANEL_LOG_ENV
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# setup: 측정 전에 한 번 넣는 위젯 값 / interactions: (이름, 위젯 label, 번갈아 넣을 두 값)
+SCENARIOS = {
+    "walmart.py": {
+        "setup": [("Data path", "{csv}")],
+        "interactions": [
+            ("top_n", "Top N", ["10", "20"]),
+            ("rank_by", "Ranking Metric", ["revenue", "target_score"]),
+            ("score_weight", "w · AOV", [0.5, 0.1]),
+            ("filter", "Gender", ["F", "All"]),
+        ],
+    },
+    "app.py": {
+        "setup": [],
+        "interactions": [
+            ("score_formula", "Target Score", ["Weighted (normalized metrics)", "Revenue share × relative AOV"]),
+            ("filter", "성별", ["F", "All"]),
+        ],
+    },
+    "app3.py": {
+        "setup": [("메뉴 이동", "분석보고서")],
+        "interactions": [
+            ("chart_option", "7일 이동평균 표시", [False, True]),
+            ("settings_checkbox", "YouTube Analytics API 연결", [True, False]),
+            ("period", "분석 기간(일)", [45.0, 30.0]),
+        ],
+    },
+}
+
+
+# =========================
+# Server
+# =========================
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app: str, workdir: str, fragments: bool, panel_log: str):
+    port = _free_port()
+    env = dict(os.environ, **{FRAGMENTS_ENV: "1" if fragments else "0", PANEL_LOG_ENV: panel_log})
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.join(APP_DIR, app),
+         "--server.headless", "true", "--server.port", str(port),
+         "--server.enableXsrfProtection", "false", "--server.enableCORS", "false",
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{app}: streamlit server did not start")
+
+
+# =========================
+# Websocket client (브라우저 대신)
+# =========================
+class Session:
+    def __init__(self, ws, panel_log: str):
+        self.ws = ws
+        self.panel_log = panel_log
+        self.widgets = {}  # label -> (kind, id, fragment_id)
+        self.states = {}   # id -> WidgetState (브라우저처럼 매 요청에 전부 보냄)
+
+    def _panels_since(self, offset: int):
+        if not os.path.exists(self.panel_log):
+            return []
+        with open(self.panel_log, "rb") as f:
+            f.seek(offset)
+            return [json.loads(line)["panel"] for line in f if line.strip()]
+
+    async def rerun(self, fragment_id: str = "") -> dict:
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+        offset = os.path.getsize(self.panel_log) if os.path.exists(self.panel_log) else 0
+
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        deltas = 0
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta":
+                deltas += 1
+                self._register(fwd)
+            elif kind == "script_finished":
+                break
+        elapsed = time.perf_counter() - t0
+        return {"ms": elapsed * 1e3, "deltas": deltas, "panels": self._panels_since(offset)}
+
+    def _register(self, fwd):
+        if fwd.delta.WhichOneof("type") != "new_element":
+            return
+        el = fwd.delta.new_element
+        kind = el.WhichOneof("type")
+        proto = getattr(el, kind, None)
+        if proto is not None and hasattr(proto, "id") and hasattr(proto, "label") and proto.id:
+            self.widgets[proto.label] = (kind, proto.id, fwd.delta.fragment_id)
+
+    def set(self, label: str, value) -> str:
+        """위젯 값 지정 -> 그 위젯이 속한 fragment id ('' = 전체 rerun)"""
+        if label not in self.widgets:
+            raise KeyError(f"widget not found: {label!r} (seen: {sorted(self.widgets)})")
+        kind, wid, fragment_id = self.widgets[label]
+        state = WidgetState(id=wid)
+        if isinstance(value, bool):
+            state.bool_value = value
+        elif isinstance(value, (int, float)):
+            state.double_array_value.data.append(float(value))
+        else:
+            state.string_value = str(value)
+        self.states[wid] = state
+        return fragment_id
+
+
+async def _drive(port: int, panel_log: str, scenario: dict, csv: str, repeat: int) -> dict:
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None,
+                                  origin=f"http://127.0.0.1:{port}") as ws:
+        s = Session(ws, panel_log)
+        out = {"initial": await s.rerun()}
+        for label, value in scenario["setup"]:
+            s.set(label, value.format(csv=csv) if isinstance(value, str) else value)
+            await s.rerun()
+
+        interactions = {}
+        for name, label, values in scenario["interactions"]:
+            runs = []
+            for i in range(repeat + 1):  # 첫 번은 워밍업 (캐시 채우기)
+                fragment_id = s.set(label, values[i % 2])
+                r = await s.rerun(fragment_id)
+                if i:
+                    runs.append(r)
+            # 다음 interaction 을 위해 기본값 쪽으로 되돌림
+            if repeat % 2 == 0:
+                await s.rerun(s.set(label, values[1]))
+            ms = np.array([r["ms"] for r in runs])
+            interactions[name] = {
+                "widget": label,
+                "fragment": bool(fragment_id),
+                "p50_ms": round(float(np.median(ms)), 1),
+                "min_ms": round(float(ms.min()), 1),
+                "panels": round(float(np.mean([len(r["panels"]) for r in runs])), 2),
+                "panel_names": sorted({p for r in runs for p in r["panels"]}),
+                "deltas": round(float(np.mean([r["deltas"] for r in runs])), 1),
+            }
+        out["interactions"] = interactions
+        out["initial"] = {"ms": round(out["initial"]["ms"], 1), "panels": len(out["initial"]["panels"])}
+        return out
+
+
+def bench_app(app: str, csv: str, repeat: int, fragments: bool) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        # app.py 는 ./data/walmart.csv 고정 -> 작업 디렉터리에 합성 데이터 링크
+        os.makedirs(os.path.join(workdir, "data"))
+        os.symlink(csv, os.path.join(workdir, "data", "walmart.csv"))
+        panel_log = os.path.join(workdir, "panels.jsonl")
+        proc, port = start_server(app, workdir, fragments, panel_log)
+        try:
+            return asyncio.run(_drive(port, panel_log, SCENARIOS[app], csv, repeat))
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def run(apps, scale=1.0, repeat=5, data_dir=BENCH_DIR, seed=0) -> dict:
+    csv = dataset_path(scale, data_dir, seed)
+    results = []
+    for app in apps:
+        for fragments in (False, True):
+            r = bench_app(app, csv, repeat, fragments)
+            results.append({"app": app, "fragments": fragments, **r})
+            print(f"[bench_ui] {app} fragments={'on' if fragments else 'off'} done", file=sys.stderr)
+    return {"env": environment(), "scale": scale, "repeat": repeat, "results": results}
+
+
+def _print_table(report: dict):
+    rows = {}
+    for r in report["results"]:
+        for name, m in r["interactions"].items():
+            rows.setdefault((r["app"], name), {})[r["fragments"]] = m
+    print(f"{'app':<12} {'interaction':<18} {'panels off→on':>14} {'p50 ms off→on':>18}  rerun scope (on)", file=sys.stderr)
+    for (app, name), m in rows.items():
+        off, on = m.get(False), m.get(True)
+        if not (off and on):
+            continue
+        scope = "fragment: " + ",".join(on["panel_names"]) if on["fragment"] else "full"
+        print(f"{app:<12} {name:<18} {off['panels']:>6g} → {on['panels']:<5g} "
+              f"{off['p50_ms']:>8.1f} → {on['p50_ms']:<7.1f}  {scope}", file=sys.stderr)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--apps", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    ap.add_argument("--scale", type=float, default=1.0, help="합성 데이터 배수 (원본 550,068행 기준)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dir", default=BENCH_DIR)
+    ap.add_argument("--out", help="결과 JSON 경로 (생략 시 stdout)")
+    args = ap.parse_args(argv)
+
+    report = run(args.apps, args.scale, args.repeat, args.data_dir, args.seed)
+    _print_table(report)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
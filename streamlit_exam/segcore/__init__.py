@@ -0,0 +1,45 @@
+"""
+segcore: walmart.py / app.py 가 공유하는 세그멘테이션 계산 모듈 + app3.py KPI 저장소/표 페이징 (Streamlit/plotly 비의존)
+CLI: python -m segcore <csv> --out-dir <dir>
+"""
+from .store import load_table, read_csv_typed, apply_schema
+from .shared import open_shared_dataset, process_memory
+from .paths import resolve_path
+from .sources import SourceRegistry
+from .report import fmt_k, write_outputs
+from .prep import preprocess, assign_segments
+from .manifest import open_manifest
+from .segments import build_segment_table, calc_kpis
+from .cube import SegmentCube, load_or_build_cube
+from .distinct import DistinctIndex
+from .filters import FilterIndex
+from .customers import CustomerTable
+from .memo import QueryCache, filter_key, dataset_fingerprint
+from .figures import FigureCache
+from .exports import ExportCache
+from .uploads import UploadStore
+from .scoring import ScoreMatrix, top_n_indices
+from .panels import PanelProfile
+from .warmup import AccessLog, Warmup
+from .sketch import QuantileSketch
+from .streaming import stream_segment_table
+from .parallel import parallel_segment_aggregates
+from .kpistore import KpiStore
+from .anomaly import AnomalyDetector
+from .downsample import downsample
+from .pager import TablePager, EditOverlay
+from .synth import write_synthetic_csv, write_synthetic_events
+
+__all__ = [
+    "load_table", "read_csv_typed", "apply_schema",
+    "open_shared_dataset", "process_memory",
+    "resolve_path", "SourceRegistry", "fmt_k", "write_outputs",
+    "preprocess", "assign_segments", "open_manifest",
+    "build_segment_table", "calc_kpis",
+    "SegmentCube", "load_or_build_cube",
+    "DistinctIndex", "FilterIndex", "QuantileSketch", "CustomerTable",
+    "QueryCache", "filter_key", "dataset_fingerprint", "FigureCache", "ExportCache", "UploadStore",
+    "ScoreMatrix", "top_n_indices", "PanelProfile", "AccessLog", "Warmup",
+    "stream_segment_table", "parallel_segment_aggregates",
+    "KpiStore", "AnomalyDetector", "downsample", "TablePager", "EditOverlay", "write_synthetic_csv", "write_synthetic_events",
+]
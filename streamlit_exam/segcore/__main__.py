@@ -0,0 +1,67 @@
+"""
+CLI: 파일 하나의 세그먼트 테이블 + KPI 계산 (Streamlit/plotly 불필요, cron/배치용)
+
+    python -m segcore data/walmart.csv --out-dir out/
+    python -m segcore big.csv --stream --chunksize 2000000 --format parquet
+    python -m segcore data/walmart.csv --workers 8
+"""
+import argparse
+import sys
+import time
+
+from .paths import resolve_path
+from .prep import preprocess
+from .report import OUTPUT_FORMATS, fmt_k, write_outputs
+from .segments import build_segment_table, calc_kpis
+from .store import load_table
+from .streaming import DEFAULT_CHUNKSIZE, stream_segment_table
+
+
+def compute(path: str, stream: bool = False, chunksize: int = DEFAULT_CHUNKSIZE,
+            workers: int = None, use_cache: bool = True):
+    """-> (segment table, kpis). walmart.py 대시보드와 같은 계산."""
+    if stream:
+        return stream_segment_table(path, chunksize)
+    df = preprocess(load_table(path, use_cache=use_cache))
+    return build_segment_table(df, workers=workers), calc_kpis(df)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m segcore", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path", help="CSV 경로 (walmart.py 의 Data path 와 같은 규칙으로 찾음)")
+    ap.add_argument("--out-dir", default="segcore_out")
+    ap.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", help="segment table 형식")
+    ap.add_argument("--stream", action="store_true", help="chunk 단위 out-of-core 계산")
+    ap.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    ap.add_argument("--workers", type=int, default=None, help="병렬 집계 프로세스 수 (기본: SEGCORE_WORKERS)")
+    ap.add_argument("--no-cache", action="store_true", help="Arrow 캐시(.segcache) 사용 안 함")
+    args = ap.parse_args(argv)
+
+    try:
+        path = resolve_path(args.path)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    t0 = time.perf_counter()
+    seg, kpis = compute(path, args.stream, args.chunksize, args.workers, not args.no_cache)
+    elapsed = time.perf_counter() - t0
+
+    meta = {"source": path, "segments": len(seg), "elapsed_s": round(elapsed, 3)}
+    written = write_outputs(seg, kpis, args.out_dir, args.format, meta)
+
+    customers, revenue, aov, avg_purchases, clv_proxy = kpis
+    print(
+        f"{path}: {len(seg)} segments in {elapsed:.2f}s | "
+        f"customers {fmt_k(customers)} | revenue {fmt_k(revenue)} | "
+        f"AOV {fmt_k(aov)} | CLV {fmt_k(clv_proxy)}",
+        file=sys.stderr,
+    )
+    for p in written.values():
+        print(p)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# Multi-series anomaly scoring (series x day 행렬)
+# =========================
+# 캠페인/영상 수천 개를 한 번에: values[s, t] = series s 의 t 일 값.
+# t 일 점수 = t 일 값이 직전 window 일(t 일 제외) 기준선에서 얼마나 벗어났는지.
+#   - "zscore": (x - 평균) / 표준편차. 전체 기간 sweep 은 누적합으로 O(S x T) (10k x 365 ~ 0.2초)
+#   - "robust": (x - 중앙값) / (1.4826 * MAD). 이상치 하나가 기준선을 끌고 가지 않음
+#     (창마다 정렬이 필요 -> score_matrix(last=N) 으로 최근 N 일만 계산하는 용도)
+# 표준편차가 0 에 가까운 series (거의 일정한 값) 는 floor(평균의 rel_floor, 최소 abs_floor) 로 나눈다.
+# update(column): 하루치 열만 받아 최근 window 일 버퍼로 점수 계산 후 버퍼 갱신 (전체 재계산 없음).
+METHODS = ("zscore", "robust")
+MAD_SCALE = 1.4826
+
+
+class AnomalyDetector:
+    def __init__(self, window: int = 7, threshold: float = 3.0, method: str = "zscore",
+                 min_periods: int = None, rel_floor: float = 0.02, abs_floor: float = 1.0):
+        if method not in METHODS:
+            raise ValueError(f"지원하지 않는 method: {method} (가능: {', '.join(METHODS)})")
+        self.window = window
+        self.threshold = threshold
+        self.method = method
+        self.min_periods = window if min_periods is None else min_periods
+        self.rel_floor = rel_floor
+        self.abs_floor = abs_floor
+        self._buf = None  # (S, window) 최근 값 (원형 버퍼)
+        self._n = 0       # 버퍼에 들어간 일 수 (window 까지)
+        self._pos = 0
+
+    def _scale(self, center: np.ndarray, spread: np.ndarray) -> np.ndarray:
+        floor = np.maximum(np.abs(center) * self.rel_floor, self.abs_floor)
+        return np.maximum(spread, floor)
+
+    # ---- 전체 기간 ----
+    def _zscore_baseline(self, values: np.ndarray, first: int):
+        S, T = values.shape
+        w = self.window
+        # series 평균을 빼고 누적합 (큰 값의 제곱합 상쇄 오차 방지)
+        offset = values.mean(axis=1, keepdims=True)
+        x = values - offset
+        cs = np.zeros((S, T + 1))
+        cs2 = np.zeros((S, T + 1))
+        np.cumsum(x, axis=1, out=cs[:, 1:])
+        np.square(x, out=x)
+        np.cumsum(x, axis=1, out=cs2[:, 1:])
+        # t 일 기준선 = [max(t - w, 0), t) 합 / 일 수
+        k = min(w, T)
+        sums = np.empty((S, T))
+        sums2 = np.empty((S, T))
+        sums[:, :k], sums2[:, :k] = cs[:, :k], cs2[:, :k]
+        np.subtract(cs[:, k:T], cs[:, :T - k], out=sums[:, k:])
+        np.subtract(cs2[:, k:T], cs2[:, :T - k], out=sums2[:, k:])
+        n = np.minimum(np.arange(T), w).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.divide(sums, n, out=sums)
+            var = np.divide(sums2, n, out=sums2)
+            var -= mean * mean
+        mean += offset
+        return mean, np.sqrt(np.maximum(var, 0.0, out=var), out=var), n
+
+    def _robust_baseline(self, values: np.ndarray, first: int):
+        """중앙값/MAD 는 누적합으로 안 되므로 first 일부터만 (창마다 정렬: 전체 기간이면 S x T x window)"""
+        S, T = values.shape
+        w = self.window
+        center = np.full((S, T), np.nan)
+        spread = np.full((S, T), np.nan)
+        n = np.minimum(np.arange(T), w).astype(np.float64)
+        # 시작 부분 (window 미만): 있는 날만으로
+        for i in range(max(first, 1), min(w, T)):
+            med = np.median(values[:, :i], axis=1)
+            center[:, i] = med
+            spread[:, i] = MAD_SCALE * np.median(np.abs(values[:, :i] - med[:, None]), axis=1)
+        lo = max(first, w)
+        if T > lo:
+            win = np.lib.stride_tricks.sliding_window_view(values[:, lo - w:], w, axis=1)[:, :-1]  # t 일 직전 w 일
+            med = np.median(win, axis=2)
+            center[:, lo:] = med
+            spread[:, lo:] = MAD_SCALE * np.median(np.abs(win - med[..., None]), axis=2)
+        return center, spread, n
+
+    def score_matrix(self, values: np.ndarray, last: int = None):
+        """
+        values (S, T) -> (점수, 기준선) 둘 다 (S, T). 기준 일수가 min_periods 미만인 칸은 NaN.
+        last: 마지막 last 일만 점수 계산 (나머지 NaN, robust 는 이 구간만 정렬하므로 빠름)
+        마지막 window 일은 버퍼에 남겨 이후 update() 로 이어서 계산.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[None, :]
+        T = values.shape[1]
+        first = 0 if last is None else max(0, T - last)
+        if self.method == "zscore":
+            center, spread, n = self._zscore_baseline(values, first)
+        else:
+            center, spread, n = self._robust_baseline(values, first)
+        with np.errstate(invalid="ignore"):
+            z = (values - center) / self._scale(center, spread)
+        z[:, (n < self.min_periods) | (np.arange(T) < first)] = np.nan
+        self._prime(values)
+        return z, center
+
+    def _prime(self, values: np.ndarray):
+        S, T = values.shape
+        self._buf = np.zeros((S, self.window))
+        k = min(T, self.window)
+        self._buf[:, :k] = values[:, T - k:]
+        self._n = k
+        self._pos = k % self.window
+
+    # ---- 하루씩 ----
+    def update(self, column: np.ndarray):
+        """하루치 값 (S,) -> (점수 (S,), 기준선 (S,)). 이 값은 다음 날부터 기준선에 들어간다."""
+        column = np.asarray(column, dtype=np.float64)
+        if self._buf is None:
+            self._buf = np.zeros((len(column), self.window))
+        if self._n == 0:
+            z = center = np.full(len(column), np.nan)
+        else:
+            hist = self._buf[:, :self._n]  # 순서 무관 (평균/중앙값)
+            if self.method == "zscore":
+                center, spread = hist.mean(axis=1), hist.std(axis=1)
+            else:
+                center = np.median(hist, axis=1)
+                spread = MAD_SCALE * np.median(np.abs(hist - center[:, None]), axis=1)
+            z = (column - center) / self._scale(center, spread)
+            if self._n < self.min_periods:
+                z = np.full(len(column), np.nan)
+        self._buf[:, self._pos] = column
+        self._pos = (self._pos + 1) % self.window
+        self._n = min(self._n + 1, self.window)
+        return z, center
+
+    # ---- 결과 ----
+    def alerts(self, z: np.ndarray, values: np.ndarray, baseline: np.ndarray, names,
+               dates=None, last_days: int = 1, top: int = 20) -> pd.DataFrame:
+        """
+        마지막 last_days 일 중 |점수| >= threshold 인 칸 -> |점수| 큰 순 DataFrame
+        (series, date, value, baseline, change(배율), z, direction "spike"/"drop")
+        """
+        z = np.atleast_2d(z)
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        baseline = np.atleast_2d(baseline)
+        T = z.shape[1]
+        cols = slice(max(0, T - last_days), T)
+        zz = np.abs(z[:, cols])
+        s_idx, t_idx = np.nonzero(np.nan_to_num(zz, nan=0.0) >= self.threshold)
+        order = np.argsort(-zz[s_idx, t_idx], kind="stable")[:top]
+        s_idx, t_idx = s_idx[order], t_idx[order] + cols.start
+        base = baseline[s_idx, t_idx]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            change = np.where(base > 0, values[s_idx, t_idx] / base, np.nan)
+        return pd.DataFrame({
+            "series": np.asarray(names, dtype=object)[s_idx] if len(s_idx) else np.array([], dtype=object),
+            "date": (np.asarray(dates)[t_idx] if dates is not None else t_idx),
+            "value": values[s_idx, t_idx],
+            "baseline": base.round(1),
+            "change": np.round(change, 2),
+            "z": z[s_idx, t_idx].round(2),
+            "direction": np.where(z[s_idx, t_idx] > 0, "spike", "drop"),
+        })
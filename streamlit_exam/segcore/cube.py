@@ -0,0 +1,306 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from .distinct import DistinctIndex
+from .memo import QueryCache, filter_key
+from .prep import age_mid
+from .segments import finish_segment_table, kpis_from_totals
+from .store import cache_path_for, source_signature
+
+# =========================
+# Pre-aggregated segment cube
+# =========================
+FILTER_DIMS = ["Age", "Gender", "Marital_Status", "City_Category", "Stay_In_Current_City_Years"]
+N_PRICE_BINS = 256
+CUBE_VERSION = "5"
+
+
+def _is_all(v) -> bool:
+    return v is None or (isinstance(v, str) and v == "All")
+
+
+def _price_bins(purchase: pd.Series, n_bins: int):
+    """
+    median 용 Purchase 구간:
+    - distinct 값이 n_bins 이하이면 값 자체를 구간으로 (median 정확)
+    - 아니면 전체 분위수 기준 구간 (구간 안에서 선형 보간)
+    """
+    x = purchase.dropna().to_numpy(dtype=np.float64)
+    uniq = np.unique(x)
+    if len(uniq) <= n_bins:
+        edges = uniq
+    else:
+        edges = np.unique(np.quantile(x, np.linspace(0, 1, n_bins + 1))[:-1])
+    b = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, len(edges) - 1)
+    s = pd.Series(x).groupby(b)
+    lo = np.full(len(edges), np.nan)
+    hi = np.full(len(edges), np.nan)
+    lo[s.min().index] = s.min().values
+    hi[s.max().index] = s.max().values
+    return edges, lo, hi
+
+
+def _median_from_hist(counts: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """counts: (n_seg, n_bins) -> 구간 히스토그램 기반 median (각 행)."""
+    total = counts.sum(axis=1)
+    cum = np.cumsum(counts, axis=1)
+
+    def value_at(rank):
+        b = np.minimum((cum <= rank[:, None]).sum(axis=1), counts.shape[1] - 1)
+        rows = np.arange(len(rank))
+        before = cum[rows, b] - counts[rows, b]
+        frac = (rank - before + 0.5) / np.maximum(counts[rows, b], 1)
+        l, h = np.nan_to_num(lo[b]), np.nan_to_num(hi[b])
+        return l + (h - l) * frac
+
+    k1 = np.maximum((total - 1) // 2, 0)
+    k2 = total // 2
+    out = (value_at(k1) + value_at(np.minimum(k2, np.maximum(total - 1, 0)))) / 2
+    return np.where(total > 0, out, np.nan)
+
+
+class SegmentCube:
+    """
+    (필터 차원 x Segment_AGOP) 단위로 가법(additive) 측정값을 미리 합산해 둔 큐브.
+    사이드바 필터 조합은 큐브 셀을 더해서 답하므로 원본 행 수와 무관하다.
+
+    views:
+      segment : dims + Segment_AGOP  -> transactions, revenue, purchase_n
+      cell    : dims                 -> transactions, revenue, purchase_n
+      bucket  : dims + bucket        -> transactions, revenue
+      product : dims + bucket + Product_Category -> revenue
+
+    hist: segment 뷰 행마다 Purchase 구간 개수 (n_cells x N_PRICE_BINS, 전체 분위수 구간 공유).
+    median 은 셀 간에 더할 수 없으므로 선택된 셀의 구간 개수를 합쳐 구간 안에서 보간한다.
+    크기는 셀 수 x 구간 수로 고정 (행 수와 무관). distinct Purchase 가 N_PRICE_BINS 이하이면
+    구간 = 값이라 정확, 아니면 근사 (meta["median_exact"] = False -> 화면에 근사 표시).
+
+    고유 고객 수(customers)는 셀 간에 더할 수 없으므로
+    dims + Segment_AGOP + bucket 셀별 User_ID 비트맵(DistinctIndex)의 합집합으로 센다.
+    (User_ID 가 없으면 기존과 같이 customers = transactions)
+    """
+
+    def __init__(self, views: dict, meta: dict, customers: DistinctIndex = None, hist: np.ndarray = None):
+        self.views = views
+        self.meta = meta
+        self.customers = customers
+        self.hist = hist
+
+    @property
+    def dims(self):
+        return self.meta["dims"]
+
+    # ---------- build ----------
+    @classmethod
+    def build(cls, df: pd.DataFrame, n_bins: int = N_PRICE_BINS) -> "SegmentCube":
+        dims = [c for c in FILTER_DIMS if c in df.columns]
+
+        def agg(keys):
+            return (
+                df.groupby(keys, observed=True, dropna=False, sort=False)
+                  .agg(
+                      transactions=("Purchase", "size"),
+                      revenue=("Purchase", "sum"),
+                      purchase_n=("Purchase", "count"),
+                  )
+                  .reset_index()
+            )
+
+        seg_keys = dims + ["Segment_AGOP"]
+        # segment 뷰는 Segment_AGOP 순으로 정렬해 둔다 (선택된 셀의 hist 를 segment 별 reduceat 으로 합산)
+        segment = agg(seg_keys)
+        order = np.argsort(segment["Segment_AGOP"].cat.codes.to_numpy(), kind="stable")
+        views = {
+            "segment": segment.iloc[order].reset_index(drop=True),
+            "cell": agg(dims) if dims else pd.DataFrame([{
+                "transactions": len(df), "revenue": df["Purchase"].sum(), "purchase_n": df["Purchase"].count(),
+            }]),
+            "bucket": agg(dims + ["bucket"]),
+        }
+        if "Product_Category" in df.columns:
+            views["product"] = agg(dims + ["bucket", "Product_Category"])
+
+        edges, lo, hi = _price_bins(df["Purchase"], n_bins)
+        purchase = df["Purchase"].to_numpy(dtype=np.float64, na_value=np.nan)
+        ok = ~np.isnan(purchase)
+        pbin = np.clip(np.searchsorted(edges, purchase[ok], side="right") - 1, 0, len(edges) - 1)
+        # 원본 행 -> segment 뷰 행 번호 (agg 와 같은 sort=False 그룹 순서 -> 위 정렬 반영)
+        cell = df.groupby(seg_keys, observed=True, dropna=False, sort=False).ngroup().to_numpy()[ok]
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        hist = np.bincount(position[cell] * len(edges) + pbin, minlength=len(order) * len(edges))
+        hist = hist.reshape(len(order), len(edges)).astype(np.uint32)
+
+        meta = {
+            "version": CUBE_VERSION,
+            "dims": dims,
+            "rows": int(len(df)),
+            "bin_lo": lo.tolist(),
+            "bin_hi": hi.tolist(),
+            "median_exact": bool(len(edges) == len(np.unique(purchase[ok]))),
+        }
+        customers = None
+        if "User_ID" in df.columns:
+            customers = DistinctIndex.build(df, dims + ["Segment_AGOP", "bucket"])
+        return cls(views, meta, customers, hist)
+
+    # ---------- persist ----------
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        for name, frame in self.views.items():
+            frame.to_feather(os.path.join(path, f"{name}.arrow"))
+        if self.customers is not None:
+            self.customers.save(os.path.join(path, "customers"))
+        if self.hist is not None:
+            np.save(os.path.join(path, "hist.npy"), self.hist)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, path: str) -> "SegmentCube":
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        views = {
+            fn[:-len(".arrow")]: pd.read_feather(os.path.join(path, fn))
+            for fn in os.listdir(path) if fn.endswith(".arrow")
+        }
+        customers = None
+        if os.path.isdir(os.path.join(path, "customers")):
+            customers = DistinctIndex.load(os.path.join(path, "customers"))
+        hist = np.load(os.path.join(path, "hist.npy"))
+        return cls(views, meta, customers, hist)
+
+    # ---------- query ----------
+    def _mask(self, name: str, filters: dict) -> np.ndarray:
+        frame = self.views[name]
+        mask = np.ones(len(frame), dtype=bool)
+        for col, val in (filters or {}).items():
+            if _is_all(val) or col not in self.dims:
+                continue
+            mask &= (frame[col] == val).to_numpy()
+        return mask
+
+    def _select(self, name: str, filters: dict) -> pd.DataFrame:
+        return self.views[name][self._mask(name, filters)]
+
+    def segment_table(self, filters: dict = None) -> pd.DataFrame:
+        """build_segment_table(df_f) 와 같은 스키마 (median_purchase 는 meta["median_exact"] 가 아니면 구간 근사)."""
+        mask = self._mask("segment", filters)
+        cells = self.views["segment"][mask]
+        seg = cells.groupby("Segment_AGOP", observed=True)[["transactions", "revenue", "purchase_n"]].sum()
+        if self.customers is not None:
+            customers = self.customers.count(filters, by="Segment_AGOP")
+            customers.index = customers.index.astype(str)
+            seg.insert(0, "customers", customers.reindex(seg.index.astype(str)).to_numpy())
+        else:
+            seg.insert(0, "customers", seg["transactions"])
+        seg["avg_purchase"] = seg["revenue"] / seg["purchase_n"]
+
+        # 선택된 셀 (Segment_AGOP 순 정렬 유지) 의 구간 개수를 segment 별로 합산
+        lo, hi = np.asarray(self.meta["bin_lo"]), np.asarray(self.meta["bin_hi"])
+        codes = cells["Segment_AGOP"].cat.codes.to_numpy()
+        counts = np.zeros((len(seg.index.categories), len(lo)), dtype=np.int64)
+        if len(codes):
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            counts[codes[starts]] = np.add.reduceat(self.hist[mask], starts, axis=0, dtype=np.int64)
+        seg["median_purchase"] = _median_from_hist(counts[seg.index.codes], lo, hi)
+
+        seg = seg.drop(columns="purchase_n").reset_index()
+        return finish_segment_table(seg)
+
+    def kpis(self, filters: dict = None):
+        cells = self._select("cell", filters)
+        transactions = int(cells["transactions"].sum())
+        customers = self.customers.count(filters) if self.customers is not None else transactions
+        revenue = cells["revenue"].sum()
+        n = cells["purchase_n"].sum()
+        aov = revenue / n if n else np.nan
+        return kpis_from_totals(customers, transactions, revenue, aov)
+
+    def age_bucket_revenue(self, filters: dict = None) -> pd.DataFrame:
+        cells = self._select("bucket", filters)
+        if "Age" not in self.dims:
+            return pd.DataFrame(columns=["Age_mid", "bucket", "Purchase"])
+        mids = cells["Age"].map(age_mid).astype(np.float64)
+        return (
+            cells.assign(Age_mid=mids, Purchase=cells["revenue"])
+                 .dropna(subset=["Age_mid"])
+                 .groupby(["Age_mid", "bucket"], observed=True)["Purchase"].sum()
+                 .reset_index()
+                 .sort_values("Age_mid")
+        )
+
+    def bucket_customers(self, filters: dict = None) -> pd.DataFrame:
+        if self.customers is not None:
+            return self.customers.count(filters, by="bucket").reset_index(name="customers")
+        cells = self._select("bucket", filters)
+        return cells.groupby("bucket", observed=True)["transactions"].sum().reset_index(name="customers")
+
+    def product_revenue(self, filters: dict = None):
+        if "product" not in self.views:
+            return None
+        cells = self._select("product", filters)
+        return (
+            cells.groupby(["bucket", "Product_Category"], observed=True)["revenue"].sum()
+                 .reset_index(name="Purchase")
+        )
+
+
+class CubeView:
+    """
+    SegmentCube + 고정된 필터 조합.
+    cache(QueryCache) 를 주면 (fingerprint, 질의, 필터 튜플) 키로 결과를 재사용한다.
+    """
+
+    def __init__(self, cube: SegmentCube, filters: dict, cache: QueryCache = None, fingerprint: str = None):
+        self.cube = cube
+        self.filters = filters
+        self.cache = cache
+        self.fingerprint = fingerprint or cube.meta.get("source") or f"cube-{id(cube)}"
+
+    def _query(self, name: str, fn):
+        if self.cache is None:
+            return fn(self.filters)
+        return self.cache.get_or_compute((self.fingerprint, name, filter_key(self.filters)), lambda: fn(self.filters))
+
+    def segment_table(self):
+        return self._query("segment_table", self.cube.segment_table)
+
+    def kpis(self):
+        return self._query("kpis", self.cube.kpis)
+
+    def age_bucket_revenue(self):
+        return self._query("age_bucket_revenue", self.cube.age_bucket_revenue)
+
+    def bucket_customers(self):
+        return self._query("bucket_customers", self.cube.bucket_customers)
+
+    def product_revenue(self):
+        return self._query("product_revenue", self.cube.product_revenue)
+
+
+def load_or_build_cube(df: pd.DataFrame, source_path: str = None, cache_dir: str = None) -> SegmentCube:
+    """source_path 가 있으면 .segcache/<name>.cube/ 에 저장해 두고 원본이 바뀌지 않았으면 재사용."""
+    if source_path is None:
+        return SegmentCube.build(df)
+
+    path = cache_path_for(source_path, cache_dir, suffix=".cube")
+    sig = source_signature(source_path)
+    meta_path = os.path.join(path, "meta.json")
+    if os.path.exists(meta_path):
+        try:
+            cube = SegmentCube.load(path)
+            if cube.meta.get("source") == sig and cube.meta.get("version") == CUBE_VERSION:
+                return cube
+        except (OSError, ValueError):
+            pass
+
+    cube = SegmentCube.build(df)
+    cube.meta["source"] = sig
+    try:
+        cube.save(path)
+    except OSError:
+        pass
+    return cube
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from .segments import kpis_from_totals
+
+# =========================
+# Customer-level rollup (customer dimension table)
+# =========================
+# 거래 행(55만+) 대신 고객 행(~6천)으로 고객 단위 KPI 를 계산한다.
+# 키 = User_ID + 인구통계 컬럼. 원본처럼 고객 속성이 고정이면 고객당 1행이고,
+# 아니어도 (고객, 속성 조합) 단위로 나뉘어 필터 결과는 거래 행 기준과 정확히 같다.
+CUSTOMER_DIMS = ["Gender", "Age", "City_Category", "Stay_In_Current_City_Years", "Marital_Status", "Occupation"]
+
+
+def _is_all(v):
+    return v is None or (isinstance(v, str) and v == "All")
+
+
+class CustomerTable:
+    """
+    columns: User_ID, <dims>, transactions, revenue, purchase_n,
+             min_purchase, max_purchase, mean_purchase
+    """
+
+    def __init__(self, table: pd.DataFrame, dims: list, meta: dict = None):
+        self.table = table
+        self.dims = dims
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.table)
+
+    # ---------- build ----------
+    @classmethod
+    def build(cls, df: pd.DataFrame, dims=None) -> "CustomerTable":
+        dims = [c for c in (CUSTOMER_DIMS if dims is None else dims) if c in df.columns]
+        keys = ["User_ID"] + dims
+        table = (
+            df.groupby(keys, observed=True, sort=False)["Purchase"]
+              .agg(transactions="size", revenue="sum", purchase_n="count",
+                   min_purchase="min", max_purchase="max")
+              .reset_index()
+        )
+        table["mean_purchase"] = table["revenue"] / table["purchase_n"].replace(0, np.nan)
+
+        for c in dims:
+            # pandas 3 부터 문자열 컬럼은 object 가 아니라 StringDtype
+            if pd.api.types.is_string_dtype(table[c].dtype) or pd.api.types.is_object_dtype(table[c].dtype):
+                table[c] = table[c].astype("category")
+        return cls(table, dims, {"rows": int(len(df))})
+
+    # ---------- query ----------
+    def select(self, filters: dict = None) -> pd.DataFrame:
+        t = self.table
+        mask = np.ones(len(t), dtype=bool)
+        for col, val in (filters or {}).items():
+            if _is_all(val) or col not in self.dims:
+                continue
+            col_s = t[col]
+            if isinstance(val, str) and pd.api.types.is_numeric_dtype(col_s.dtype):
+                col_s = col_s.astype(str)
+            mask &= (col_s == val).to_numpy()
+        return t[mask]
+
+    def customers(self, filters: dict = None) -> int:
+        return int(self.select(filters)["User_ID"].nunique())
+
+    def per_customer(self, filters: dict = None) -> pd.DataFrame:
+        """User_ID 당 1행 (속성 조합이 나뉜 고객은 합쳐서)"""
+        rows = self.select(filters)
+        if not rows["User_ID"].duplicated().any():
+            return rows
+        return rows.groupby("User_ID", sort=False).agg(
+            transactions=("transactions", "sum"), revenue=("revenue", "sum"), purchase_n=("purchase_n", "sum"),
+            min_purchase=("min_purchase", "min"), max_purchase=("max_purchase", "max"),
+        ).reset_index()
+
+    def kpis(self, filters: dict = None):
+        """calc_kpis(df_f) 와 같은 튜플 (customers, revenue, aov, avg_purchases, clv_proxy)"""
+        rows = self.select(filters)
+        customers = int(rows["User_ID"].nunique())  # 고객당 1행이면 len(rows) 와 같음
+        revenue = rows["revenue"].sum()
+        n = rows["purchase_n"].sum()
+        aov = revenue / n if n else np.nan
+        return kpis_from_totals(customers, int(rows["transactions"].sum()), revenue, aov)
+
+    def avg_revenue(self, filters: dict = None) -> float:
+        """고객 1명당 평균 매출 (= groupby('User_ID')['Purchase'].sum().mean())"""
+        per = self.per_customer(filters)
+        return float(per["revenue"].mean()) if len(per) else np.nan
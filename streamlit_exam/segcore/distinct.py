@@ -0,0 +1,188 @@
+import os
+import numpy as np
+import pandas as pd
+
+# =========================
+# Exact distinct-customer index (User_ID per cell: sorted codes / bitset hybrid)
+# =========================
+# User_ID -> 0..n_users-1 로 사전 인코딩하고, 셀(= keys 조합)마다 그 셀 고객 code 를 둔다.
+#   - 기본: 정렬된 uint32 code 배열 (CSR: offsets + members). 셀마다 고객이 몇 명뿐이라 대부분 이 형태
+#   - 고객이 n_users / 32 명 이상인 셀만 uint64 bitset (이때는 bitset 이 code 배열보다 작다)
+# 크기는 (셀, 고객) 쌍 수에 비례 (셀 수 x 전체 고객 수 가 아님).
+# 필터 조합 / bucket 묶음의 고객 수 = 해당 셀들 고객 합집합의 크기 → 항상 정확
+DENSE_RATIO = 32  # uint32 code 4 bytes vs bitset 1/8 byte per user
+
+
+def _is_all(v) -> bool:
+    return v is None or (isinstance(v, str) and v == "All")
+
+
+if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+    def popcount(bits: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+else:
+    def popcount(bits: np.ndarray) -> np.ndarray:
+        return np.unpackbits(bits.view(np.uint8), axis=-1).sum(axis=-1, dtype=np.int64)
+
+
+def encode_users(user_ids: pd.Series):
+    """User_ID -> dense int code (0..n-1), uniques"""
+    codes, uniques = pd.factorize(user_ids, sort=True)
+    return codes, uniques
+
+
+def bitmaps_from_codes(group: np.ndarray, codes: np.ndarray, n_groups: int, n_users: int) -> np.ndarray:
+    """(group, user code) 쌍 -> (n_groups, n_words) uint64 bitset"""
+    n_words = max(1, (n_users + 63) // 64)
+    bits = np.zeros((n_groups, n_words), dtype=np.uint64)
+    keep = codes >= 0
+    pair = np.unique(group[keep].astype(np.int64) * n_users + codes[keep])
+    g, u = np.divmod(pair, n_users)
+    np.bitwise_or.at(bits, (g, u >> 6), np.left_shift(np.uint64(1), (u & 63).astype(np.uint64)))
+    return bits
+
+
+def _sorted_unique(a: np.ndarray) -> np.ndarray:
+    """np.unique 대신 정렬 + 인접 비교 (정수 key 는 numpy 2 의 hash unique 보다 빠르다)"""
+    a = np.sort(a)
+    return a[np.r_[True, a[1:] != a[:-1]]] if len(a) else a
+
+
+def _set_bits(bits: np.ndarray, members: np.ndarray) -> np.ndarray:
+    u = members.astype(np.int64)
+    np.bitwise_or.at(bits, u >> 6, np.left_shift(np.uint64(1), (u & 63).astype(np.uint64)))
+    return bits
+
+
+class DistinctIndex:
+    """
+    cells: keys 조합별 1행 (DataFrame). 셀 i 의 고객:
+      dense_row[i] < 0  -> members[offsets[i]:offsets[i+1]] (정렬된 user code)
+      dense_row[i] >= 0 -> dense[dense_row[i]] (bitset)
+    count(filters)              -> 필터 조건의 고유 고객 수
+    count(filters, by="bucket") -> bucket 별 고유 고객 수 (Series)
+    users(filters)              -> 필터 조건 고객 bitset (교집합/합집합 직접 연산용)
+    """
+
+    def __init__(self, cells: pd.DataFrame, n_users: int, offsets: np.ndarray, members: np.ndarray,
+                 dense_row: np.ndarray, dense: np.ndarray):
+        self.cells = cells
+        self.n_users = int(n_users)
+        self.offsets = offsets
+        self.members = members
+        self.dense_row = dense_row
+        self.dense = dense
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, keys, user_col: str = "User_ID") -> "DistinctIndex":
+        keys = list(keys)
+        codes, uniques = encode_users(df[user_col])
+        n_users = len(uniques)
+        g = df.groupby(keys, observed=True, dropna=False, sort=False)
+        cell_id = g.ngroup().to_numpy()
+        cells = g.size().reset_index()[keys]
+
+        keep = codes >= 0
+        pair = np.unique(cell_id[keep].astype(np.int64) * max(n_users, 1) + codes[keep])  # (셀, 고객) 순 정렬
+        cell, user = np.divmod(pair, max(n_users, 1))
+        sizes = np.bincount(cell, minlength=len(cells))
+
+        is_dense = sizes * DENSE_RATIO >= max(n_users, 1)
+        dense_row = np.full(len(cells), -1, dtype=np.int64)
+        dense_row[is_dense] = np.arange(int(is_dense.sum()))
+        in_dense = is_dense[cell]
+        dense = bitmaps_from_codes(dense_row[cell[in_dense]], user[in_dense], int(is_dense.sum()), n_users)
+
+        sparse_sizes = np.where(is_dense, 0, sizes)
+        offsets = np.concatenate([[0], np.cumsum(sparse_sizes)]).astype(np.int64)
+        members = user[~in_dense].astype(np.uint32)
+        return cls(cells, n_users, offsets, members, dense_row, dense)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets.nbytes + self.members.nbytes + self.dense_row.nbytes + self.dense.nbytes)
+
+    # ---------- persist ----------
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        self.cells.to_feather(os.path.join(path, "cells.arrow"))
+        for name in ("offsets", "members", "dense_row", "dense"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "n_users.txt"), "w", encoding="utf-8") as f:
+            f.write(str(self.n_users))
+
+    @classmethod
+    def load(cls, path: str) -> "DistinctIndex":
+        cells = pd.read_feather(os.path.join(path, "cells.arrow"))
+        with open(os.path.join(path, "n_users.txt"), encoding="utf-8") as f:
+            n_users = int(f.read())
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                  for name in ("offsets", "members", "dense_row", "dense")}
+        return cls(cells, n_users, **arrays)
+
+    # ---------- query ----------
+    def mask(self, filters: dict = None) -> np.ndarray:
+        m = np.ones(len(self.cells), dtype=bool)
+        for col, val in (filters or {}).items():
+            if _is_all(val) or col not in self.cells.columns:
+                continue
+            m &= (self.cells[col] == val).to_numpy()
+        return m
+
+    def _members(self, rows: np.ndarray) -> np.ndarray:
+        """rows 중 sparse 셀의 user code 를 이어 붙임 (중복 포함)"""
+        lo, hi = self.offsets[rows], self.offsets[rows + 1]
+        n = hi - lo
+        if n.sum() == 0:
+            return np.zeros(0, dtype=np.uint32)
+        # 셀별 [lo, hi) 구간을 한 번에: 각 위치 = 구간 시작 + 구간 안 순번
+        idx = np.repeat(lo - np.cumsum(n) + n, n) + np.arange(n.sum())
+        return np.asarray(self.members)[idx]
+
+    def _union_count(self, rows: np.ndarray) -> int:
+        members = self._members(rows)
+        dense = self.dense_row[rows]
+        dense = dense[dense >= 0]
+        if len(dense) == 0:
+            if len(members) * 8 < self.n_users:  # 작으면 정렬, 크면 n_users 크기 표시 배열
+                return len(_sorted_unique(members))
+            seen = np.zeros(self.n_users, dtype=bool)
+            seen[members] = True
+            return int(seen.sum())
+        bits = np.bitwise_or.reduce(self.dense[dense], axis=0)
+        return int(popcount(_set_bits(bits, members)))
+
+    def users(self, filters: dict = None) -> np.ndarray:
+        """필터 조건 고객 bitset (셀 합집합)"""
+        rows = np.flatnonzero(self.mask(filters))
+        bits = np.zeros(max(1, (self.n_users + 63) // 64), dtype=np.uint64)
+        dense = self.dense_row[rows]
+        dense = dense[dense >= 0]
+        if len(dense):
+            bits |= np.bitwise_or.reduce(self.dense[dense], axis=0)
+        return _set_bits(bits, self._members(rows))
+
+    def count(self, filters: dict = None, by=None):
+        rows = np.flatnonzero(self.mask(filters))
+        if by is None:
+            return self._union_count(rows)
+
+        if len(rows) == 0:
+            return pd.Series(dtype=np.int64, name="customers")
+        gid, labels = pd.factorize(self.cells[by].iloc[rows], sort=True)
+        out = np.zeros(len(labels), dtype=np.int64)
+        has_dense = np.zeros(len(labels), dtype=bool)
+        has_dense[gid[self.dense_row[rows] >= 0]] = True
+        # sparse 셀만 있는 그룹: (그룹, 고객) 쌍을 한 번에 unique -> 그룹별 개수
+        sparse = ~has_dense[gid]
+        if sparse.any():
+            r = rows[sparse]
+            n = self.offsets[r + 1] - self.offsets[r]
+            pair = _sorted_unique(np.repeat(gid[sparse].astype(np.int64), n) * max(self.n_users, 1)
+                             + self._members(r).astype(np.int64))
+            out += np.bincount(pair // max(self.n_users, 1), minlength=len(labels))
+        # bitset 셀이 섞인 그룹 (고객이 많은 셀 -> 그룹 수는 적다)
+        for k in np.flatnonzero(has_dense):
+            out[k] = self._union_count(rows[gid == k])
+        index = pd.Index(labels, name=by) if not isinstance(labels, pd.Index) else labels.rename(by)
+        return pd.Series(out, index=index, name="customers")
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# Time-series downsampling (차트 전송량 제한)
+# =========================
+# 긴 시계열을 차트에 그대로 넘기면 점 수만큼 JSON/Vega 렌더링 비용이 든다.
+# 화면 폭(px) 정도의 점만 남기되 모양(피크/골)은 유지:
+#   - "lttb"  : Largest-Triangle-Three-Buckets. 버킷마다 (이전 선택점, 다음 버킷 평균) 과 만드는 삼각형이
+#               가장 큰 점 하나 -> 선 모양이 가장 비슷하게 보임. 버킷 수만큼 반복 (1000점 ~ 수 ms)
+#   - "minmax": 버킷마다 최소/최대 점 (완전 벡터화, 극값 보존이 중요할 때)
+# 결과는 원본 행 index (정렬, 첫/마지막 점 포함) -> 다른 컬럼(이동평균 등)도 같은 행으로 자른다.
+METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    N = len(y)
+    if n_out >= N or n_out < 3:
+        return np.arange(N)
+    # 가운데 n_out - 2 개 버킷 [edges[i], edges[i+1]) + 마지막 점 하나짜리 버킷 (n_out < N 이면 빈 버킷 없음)
+    # 경계는 원 논문 구현과 같은 floor(i * every) + 1 (linspace 는 반올림 오차로 경계가 한 칸 어긋날 수 있음)
+    every = (N - 2) / (n_out - 2)
+    bounds = np.append((np.arange(n_out - 1) * every).astype(np.int64) + 1, N)
+    counts = np.diff(bounds)
+    avg_x = np.add.reduceat(x, bounds[:-1]) / counts
+    avg_y = np.add.reduceat(y, bounds[:-1]) / counts
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, N - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[i + 1] - ay))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    y = np.asarray(y, dtype=np.float64)
+    N = len(y)
+    if n_out >= N:
+        return np.arange(N)
+    if n_out < 4:
+        # 버킷 하나의 min/max + 양 끝 (최대 4점) 도 안 들어감 -> 양 끝, 남으면 최대값
+        idx = list(dict.fromkeys([0, N - 1, int(np.argmax(y))]))[:max(n_out, 0)]
+        return np.array(sorted(idx), dtype=np.int64)
+    n_buckets = (n_out - 2) // 2
+    bucket = np.arange(N) * n_buckets // N
+    order = np.lexsort((y, bucket))  # 버킷 순, 버킷 안에서는 값 순
+    starts = np.searchsorted(bucket, np.arange(n_buckets))
+    ends = np.append(starts[1:], N) - 1
+    return np.unique(np.concatenate([[0, N - 1], order[starts], order[ends]]))
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, max_points: int, method: str = "lttb") -> pd.DataFrame:
+    """df (x 순 정렬) -> 최대 max_points 행 (점이 적으면 그대로)"""
+    if method not in METHODS:
+        raise ValueError(f"지원하지 않는 method: {method} (가능: {', '.join(METHODS)})")
+    if len(df) <= max_points:
+        return df
+    ys = df[y].to_numpy()
+    if method == "minmax":
+        idx = minmax_indices(ys, max_points)
+    else:
+        xs = df[x].to_numpy()
+        if np.issubdtype(xs.dtype, np.datetime64):
+            xs = xs.astype("datetime64[s]").astype(np.int64)
+        elif xs.dtype == object:  # datetime.date
+            xs = pd.to_datetime(xs).to_numpy().astype("datetime64[s]").astype(np.int64)
+        idx = lttb_indices(xs, ys, max_points)
+    return df.iloc[idx]
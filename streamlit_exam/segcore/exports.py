@@ -0,0 +1,150 @@
+import os
+import gzip
+import hashlib
+import tempfile
+import threading
+
+import pandas as pd
+
+# =========================
+# Lazy export files
+# =========================
+# st.download_button 에 bytes 대신 callable 을 넘기면 (deferred data) 사용자가 클릭했을 때만 실행된다.
+# -> rerun 마다 to_csv().encode() 로 파일 전체를 메모리에 만들던 비용이 없어진다.
+# 파일은 chunk_rows 행씩 디스크에 이어 쓰고 (전체 CSV 문자열을 한 번에 만들지 않음)
+# 내용 해시(content key) 이름으로 저장 -> 같은 내용을 다시 받으면 쓰지 않고 파일을 읽기만 한다.
+#   SEGCORE_EXPORT_DIR: 저장 위치 (기본 <tmp>/segcore-exports), 합계가 max_bytes 를 넘으면 오래된 것부터 삭제
+EXPORT_DIR_ENV = "SEGCORE_EXPORT_DIR"
+CHUNK_ROWS = 50_000
+DEFAULT_MAX_BYTES = 256 << 20
+# format -> (표시 이름, 확장자, MIME)
+EXPORT_FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "csv.gz": ("CSV (gzip)", ".csv.gz", "application/gzip"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def content_key(df: pd.DataFrame, index: bool = False) -> str:
+    """컬럼 이름/dtype + 행 해시 -> sha1 (같은 내용이면 같은 키)"""
+    h = hashlib.sha1()
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    try:
+        rows = pd.util.hash_pandas_object(df, index=index)
+    except TypeError:  # list/dict 셀 등 해시 불가 값
+        rows = pd.util.hash_pandas_object(df.astype(str), index=index)
+    h.update(rows.to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _chunks(df: pd.DataFrame, chunk_rows: int):
+    for start in range(0, max(len(df), 1), chunk_rows):  # 빈 프레임도 헤더/스키마는 한 번
+        yield start, df.iloc[start:start + chunk_rows]
+
+
+def write_csv(df: pd.DataFrame, path: str, chunk_rows: int = CHUNK_ROWS, index: bool = False, compress: bool = False):
+    """utf-8-sig (엑셀 한글 호환) CSV. 결과 bytes 는 df.to_csv().encode('utf-8-sig') 와 같다."""
+    opener = gzip.open if compress else open
+    with opener(path, "wt", encoding="utf-8-sig", newline="") as f:
+        for start, chunk in _chunks(df, chunk_rows):
+            chunk.to_csv(f, header=start == 0, index=index)
+
+
+def write_parquet(df: pd.DataFrame, path: str, chunk_rows: int = CHUNK_ROWS, index: bool = False):
+    """chunk 하나 = row group 하나 (스키마는 전체 프레임 기준으로 한 번)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=index)
+    with pq.ParquetWriter(path, schema) as writer:
+        for _, chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=index))
+
+
+WRITERS = {
+    "csv": write_csv,
+    "csv.gz": lambda df, path, chunk_rows, index: write_csv(df, path, chunk_rows, index, compress=True),
+    "parquet": write_parquet,
+}
+
+
+class ExportCache:
+    """content key -> 디스크의 export 파일. 세션/프로세스 간 공유 (같은 디렉터리면)."""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = DEFAULT_MAX_BYTES, chunk_rows: int = CHUNK_ROWS):
+        self.cache_dir = cache_dir or os.environ.get(EXPORT_DIR_ENV) or os.path.join(tempfile.gettempdir(), "segcore-exports")
+        self.max_bytes = max_bytes
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, key + EXPORT_FORMATS[fmt][1])
+
+    def build(self, frame, fmt: str = "csv", index: bool = False) -> str:
+        """
+        frame: DataFrame 또는 DataFrame 을 돌려주는 callable (클릭 시점에 계산할 큰 표).
+        -> export 파일 경로 (같은 내용/형식이 이미 있으면 그대로)
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"지원하지 않는 export 형식: {fmt} (가능: {', '.join(EXPORT_FORMATS)})")
+        df = frame() if callable(frame) else frame
+        path = self.path(content_key(df, index), fmt)
+        if os.path.exists(path):
+            with self._lock:
+                self.hits += 1
+            os.utime(path)  # LRU 순서
+            return path
+
+        with self._lock:
+            self.misses += 1
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            WRITERS[fmt](df, tmp, self.chunk_rows, index)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._trim(keep=path)
+        return path
+
+    def read(self, frame, fmt: str = "csv", index: bool = False) -> bytes:
+        with open(self.build(frame, fmt, index), "rb") as f:
+            return f.read()
+
+    def deferred(self, frame, fmt: str = "csv", index: bool = False):
+        """st.download_button(data=...) 용: 클릭했을 때만 (별도 스레드에서) 파일을 만들고 bytes 반환"""
+        return lambda: self.read(frame, fmt, index)
+
+    def _files(self):
+        out = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for e in it:
+                    if e.is_file() and ".tmp-" not in e.name:
+                        s = e.stat()
+                        out.append((s.st_mtime, s.st_size, e.path))
+        except OSError:
+            pass
+        return out
+
+    def _trim(self, keep: str = None):
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        files = self._files()
+        return {"hits": self.hits, "misses": self.misses, "files": len(files),
+                "size_kb": round(sum(size for _, size, _ in files) / 1024, 1)}
@@ -0,0 +1,36 @@
+from .memo import QueryCache, filter_key
+
+# =========================
+# Rendered figure cache
+# =========================
+# px/go figure 생성(집계 + trace 검증)이 차트당 수십 ms. 같은 (차트, 데이터셋, 필터) 조합이면
+# 한 번 만든 figure 의 직렬화 JSON 을 저장해 두고, Figure 로 되살려 st.plotly_chart 에 넘긴다.
+# 프로세스 내 모든 세션 공유 -> 기본 화면(필터 All) 은 첫 세션 이후 바로 그려진다.
+# plotly 는 실제로 쓸 때만 import (segcore 자체는 plotly 비의존).
+DEFAULT_MAXSIZE = 256
+
+
+class FigureCache(QueryCache):
+    """(chart id, dataset fingerprint, filter tuple) -> plotly figure JSON (LRU, 항목 수 제한)"""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        super().__init__(maxsize=maxsize, copy=False)
+
+    @staticmethod
+    def key(chart_id: str, fingerprint: str, filters) -> tuple:
+        return (chart_id, fingerprint, filter_key(filters) if isinstance(filters, dict) else filters)
+
+    def get_or_build(self, chart_id: str, fingerprint: str, filters, build):
+        """build() -> go.Figure 는 miss 일 때만 호출. 반환 Figure 는 매번 새 객체 (수정해도 캐시 영향 없음)."""
+        import plotly.io as pio
+
+        payload = self.get_or_compute(
+            self.key(chart_id, fingerprint, filters), lambda: pio.to_json(build(), validate=False)
+        )
+        # 공개 API 로만 복원 (재검증 ~15ms 는 남지만 집계 + figure 생성은 건너뜀)
+        return pio.from_json(payload, skip_invalid=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            payload_bytes = sum(len(v) for v in self._data.values())
+        return {**super().stats(), "payload_kb": round(payload_bytes / 1024, 1)}
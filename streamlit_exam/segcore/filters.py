@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# Bitmap predicate index (row filters)
+# =========================
+# (column, value) 마다 행 비트마스크를 packbits(uint64 word) 로 미리 만들어 두고
+# 선택된 마스크를 AND 해서 행 번호만 돌려준다.
+#   df.copy() -> df[mask1] -> df[mask2] ... 처럼 중간 프레임을 만들지 않는다.
+
+
+def _is_all(v) -> bool:
+    return v is None or (isinstance(v, str) and v == "All")
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    packed = np.packbits(mask, bitorder="little")
+    pad = (-len(packed)) % 8
+    if pad:
+        packed = np.concatenate([packed, np.zeros(pad, dtype=np.uint8)])
+    return packed.view(np.uint64)
+
+
+class FilterIndex:
+    """
+    index = FilterIndex.build(df, ["City_Category", "Gender", "Age"])
+    rows = index.rows({"Gender": "F", "Age": "All"})   # np.ndarray (None = 전체)
+    sub  = index.take(df, filters, columns=[...])      # 필요한 컬럼만 한 번에 추출
+    """
+
+    def __init__(self, n_rows: int, masks: dict):
+        self.n_rows = n_rows
+        self.masks = masks  # {col: {value: packed uint64 mask}}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, columns) -> "FilterIndex":
+        masks = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[col])
+            masks[col] = {u: _pack(codes == i) for i, u in enumerate(uniques)}
+        return cls(len(df), masks)
+
+    def values(self, col):
+        return list(self.masks.get(col, {}))
+
+    def bits(self, filters: dict):
+        """선택된 (col, value) 마스크의 AND. 필터가 없으면 None."""
+        acc = None
+        for col, val in (filters or {}).items():
+            if _is_all(val) or col not in self.masks:
+                continue
+            m = self.masks[col].get(val)
+            if m is None:  # 데이터에 없는 값
+                return np.zeros((self.n_rows + 63) // 64, dtype=np.uint64)
+            acc = m.copy() if acc is None else np.bitwise_and(acc, m, out=acc)
+        return acc
+
+    def rows(self, filters: dict):
+        acc = self.bits(filters)
+        if acc is None:
+            return None
+        return np.flatnonzero(np.unpackbits(acc.view(np.uint8), count=self.n_rows, bitorder="little"))
+
+    def count(self, filters: dict) -> int:
+        rows = self.rows(filters)
+        return self.n_rows if rows is None else len(rows)
+
+    def take(self, df: pd.DataFrame, filters: dict, columns=None) -> pd.DataFrame:
+        """선택 행(+컬럼)만 한 번 복사. 필터가 없고 컬럼 지정도 없으면 원본을 그대로 돌려준다."""
+        rows = self.rows(filters)
+        if columns is not None:
+            df = df[list(columns)]
+        return df if rows is None else df.take(rows)
@@ -0,0 +1,478 @@
+import io
+import os
+import glob
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow 없으면 raw 이벤트 batch 는 pickle 로
+    feather = None
+
+# =========================
+# KPI event store (append-only) + incremental rollups
+# =========================
+# app3.py 의 조회수/좋아요 이벤트. 로컬 파일(inbox/*.csv)에서 읽은 raw 이벤트는 batch 파일로 append 만 하고,
+# 대시보드는 캠페인별 일/주/월 rollup 배열만 읽는다 (raw 스캔 없음).
+#   - 새 batch 는 batch 안에서만 groupby -> 해당 버킷에 np.add.at (기존 버킷은 건드리지 않음)
+#   - 7일 이동평균은 바뀐 날 ~ +6일 구간만 다시 계산
+#   - 모든 캠페인 합계는 ALL 캠페인으로 같이 유지 (읽을 때 합산 없음)
+#   - inbox 파일은 읽은 byte 위치를 기록 -> 파일 뒤에 줄이 추가되면 새 줄만 ingest
+#   - SQLite 소스는 읽은 마지막 rowid (high-water mark) 를 기록 -> rowid 가 더 큰 행만 가져온다
+#   - refresh(): 위 둘을 min_interval_s 에 한 번만 (여러 세션이 같은 주기로 불러도 동기화는 한 번)
+# 이벤트 CSV 컬럼: ts (또는 date), campaign (없으면 "default"),
+#   views / likes (횟수) 또는 event ("view"/"like", 한 줄 = 1회)
+#
+# <root>/
+#   events/000001.arrow ...     raw 이벤트 batch (append-only)
+#   ingested.json               inbox 파일별 읽은 위치 (path -> offset/header/size/mtime)
+#   rollups/index.json          캠페인 -> rollup 파일
+#   rollups/<sha1>.npz          캠페인별 일/주/월 버킷 + views_ma7
+KPI_STORE_ENV = "SEGCORE_KPI_STORE"
+KPI_INBOX_ENV = "SEGCORE_KPI_INBOX"
+KPI_SQLITE_ENV = "SEGCORE_KPI_SQLITE"  # "path" 또는 "path:table" (기본 table = events)
+ALL = "(all)"
+DEFAULT_CAMPAIGN = "default"
+GRAINS = {"D": "day", "W": "week", "M": "month"}
+MA_DAYS = 7
+
+
+def default_store_dir(base_dir: str = "data") -> str:
+    return os.environ.get(KPI_STORE_ENV) or os.path.join(base_dir, ".kpistore")
+
+
+def default_inbox_dir(base_dir: str = "data") -> str:
+    return os.environ.get(KPI_INBOX_ENV) or os.path.join(base_dir, "kpi_events")
+
+
+def default_sources(base_dir: str = "data") -> list:
+    """SEGCORE_KPI_SQLITE 가 있거나 data/kpi_events.sqlite 가 있으면 SQLite 소스 하나"""
+    spec = os.environ.get(KPI_SQLITE_ENV) or os.path.join(base_dir, "kpi_events.sqlite")
+    path, table = spec, "events"
+    if not os.path.exists(spec) and ":" in spec:
+        path, table = spec.rsplit(":", 1)
+    return [SqliteSource(path, table)] if os.path.exists(path) else []
+
+
+class SqliteSource:
+    """
+    SQLite 테이블 (ts, campaign, views, likes ...) 의 새 행만: rowid > high-water mark.
+    다른 프로세스가 INSERT 로 append 하는 수집기 stand-in (읽기 전용으로 연다).
+    """
+
+    def __init__(self, path: str, table: str = "events", batch_rows: int = 100_000):
+        self.path = path
+        self.table = table
+        self.batch_rows = batch_rows
+
+    @property
+    def key(self) -> str:
+        return f"sqlite:{os.path.abspath(self.path)}:{self.table}"
+
+    def fetch(self, hwm: int):
+        """-> (rowid > hwm 인 행 최대 batch_rows 개, 새 hwm)"""
+        con = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True)
+        try:
+            df = pd.read_sql_query(
+                f'SELECT rowid AS _rowid, * FROM "{self.table}" WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                con, params=(int(hwm), self.batch_rows),
+            )
+        finally:
+            con.close()
+        if df.empty:
+            return df, hwm
+        return df.drop(columns="_rowid"), int(df["_rowid"].iloc[-1])
+
+
+def normalize_events(df: pd.DataFrame) -> pd.DataFrame:
+    """이벤트 파일 프레임 -> (day: 1970-01-01 기준 일 번호, campaign, views, likes)"""
+    ts_col = "ts" if "ts" in df.columns else "date" if "date" in df.columns else None
+    if ts_col is None:
+        raise ValueError(f"이벤트에 ts/date 컬럼이 없습니다. 현재 컬럼: {list(df.columns)[:20]}")
+    day = pd.to_datetime(df[ts_col]).to_numpy().astype("datetime64[D]").astype(np.int64)
+    if "views" in df.columns or "likes" in df.columns:
+        views = df["views"].fillna(0).to_numpy(np.int64) if "views" in df.columns else np.zeros(len(df), np.int64)
+        likes = df["likes"].fillna(0).to_numpy(np.int64) if "likes" in df.columns else np.zeros(len(df), np.int64)
+    elif "event" in df.columns:
+        event = df["event"].astype(str).str.lower().to_numpy()
+        views = (event == "view").astype(np.int64)
+        likes = (event == "like").astype(np.int64)
+    else:
+        raise ValueError("이벤트에 views/likes 또는 event 컬럼이 필요합니다.")
+    campaign = df["campaign"].astype(str).to_numpy() if "campaign" in df.columns else np.full(len(df), DEFAULT_CAMPAIGN)
+    return pd.DataFrame({"day": day, "campaign": campaign, "views": views, "likes": likes})
+
+
+def _period_keys(day: np.ndarray, grain: str) -> np.ndarray:
+    """일 번호 -> 버킷 번호 (W: 월요일 시작 주, M: 1970-01 기준 월)"""
+    if grain == "D":
+        return day
+    if grain == "W":
+        return (day + 3) // 7  # 1970-01-01 은 목요일
+    return day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def _period_start(keys: np.ndarray, grain: str) -> np.ndarray:
+    if grain == "D":
+        return keys.astype("datetime64[D]")
+    if grain == "W":
+        return (keys * 7 - 3).astype("datetime64[D]")
+    return keys.astype("datetime64[M]").astype("datetime64[D]")
+
+
+class Buckets:
+    """정수 버킷 번호 -> 연속 배열 (views, likes). 범위 밖 번호가 오면 앞/뒤로 늘린다."""
+
+    def __init__(self, origin: int = 0, views: np.ndarray = None, likes: np.ndarray = None):
+        self.origin = int(origin)
+        self.views = np.zeros(0, np.int64) if views is None else views
+        self.likes = np.zeros(0, np.int64) if likes is None else likes
+
+    @property
+    def end(self) -> int:
+        return self.origin + len(self.views)
+
+    def _cover(self, lo: int, hi: int) -> int:
+        """[lo, hi) 가 들어가도록 확장 -> 앞쪽에 붙인 칸 수"""
+        if len(self.views) == 0:
+            self.origin = lo
+            self.views = np.zeros(hi - lo, np.int64)
+            self.likes = np.zeros(hi - lo, np.int64)
+            return 0
+        front = max(0, self.origin - lo)
+        back = max(0, hi - self.end)
+        if front or back:
+            self.views = np.pad(self.views, (front, back))
+            self.likes = np.pad(self.likes, (front, back))
+            self.origin -= front
+        return front
+
+    def add(self, keys: np.ndarray, views: np.ndarray, likes: np.ndarray):
+        """-> (lo, hi, 앞쪽 확장 칸 수)"""
+        lo, hi = int(keys.min()), int(keys.max()) + 1
+        front = self._cover(lo, hi)
+        idx = keys - self.origin
+        np.add.at(self.views, idx, views)
+        np.add.at(self.likes, idx, likes)
+        return lo, hi, front
+
+
+class CampaignRollup:
+    """캠페인 하나의 일/주/월 버킷 + 일별 views_ma7"""
+
+    def __init__(self):
+        self.buckets = {g: Buckets() for g in GRAINS}
+        self.ma7 = np.zeros(0, np.float64)
+
+    def add(self, day: np.ndarray, views: np.ndarray, likes: np.ndarray):
+        for g, b in self.buckets.items():
+            old_end = b.end if len(b.views) else None
+            lo, hi, front = b.add(_period_keys(day, g), views, likes)
+            if g == "D":
+                old_origin = b.origin + front
+                self.ma7 = np.pad(self.ma7, (front, len(b.views) - len(self.ma7) - front))
+                # 이동평균이 바뀌는 구간: 바뀐 날 ~ +6일
+                #   - 앞으로 늘었으면 기존 첫 6일의 분모도 바뀜 -> 기존 시작일 + 6 까지
+                #   - 뒤로 빈 날을 두고 늘었으면 그 사이 날(0 으로 채운 칸)도 기존 끝 6일이 창에 남음 -> 기존 끝부터
+                start = lo if old_end is None else min(lo, old_end)
+                self._update_ma(start, max(hi, old_origin if front else hi) + MA_DAYS - 1)
+
+    def _update_ma(self, lo: int, hi: int):
+        """[lo, hi) 의 7일 이동평균 (rolling(7, min_periods=1) 과 같음: 시작 부분은 있는 날만으로 평균)"""
+        b = self.buckets["D"]
+        lo, hi = max(lo, b.origin), min(hi, b.end)
+        if lo >= hi:
+            return
+        start = max(lo - (MA_DAYS - 1), b.origin)
+        cs = np.concatenate([[0], np.cumsum(b.views[start - b.origin:hi - b.origin])])
+        pos = np.arange(lo, hi)
+        first = np.maximum(pos - (MA_DAYS - 1), b.origin)
+        self.ma7[lo - b.origin:hi - b.origin] = (cs[pos - start + 1] - cs[first - start]) / (pos - first + 1)
+
+    def to_npz(self, path: str):
+        arrays = {"ma7": self.ma7}
+        for g, b in self.buckets.items():
+            arrays.update({f"{g}_origin": np.array(b.origin), f"{g}_views": b.views, f"{g}_likes": b.likes})
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_npz(cls, path: str) -> "CampaignRollup":
+        r = cls()
+        with np.load(path) as z:
+            for g in GRAINS:
+                r.buckets[g] = Buckets(int(z[f"{g}_origin"]), z[f"{g}_views"], z[f"{g}_likes"])
+            r.ma7 = z["ma7"]
+        return r
+
+
+class KpiStore:
+    """raw 이벤트 batch (append-only) + 캠페인별 rollup. 프로세스 내 모든 세션 공유 (쓰기는 lock)."""
+
+    def __init__(self, root: str = None):
+        self.root = root or default_store_dir()
+        self._lock = threading.RLock()
+        self._rollups = {}
+        self._files = {}
+        self._next_batch = 1
+        self.last_ingest = None
+        self._last_refresh = None  # monotonic
+        self._load()
+
+    # ---- 저장소 ----
+    def _path(self, *parts) -> str:
+        return os.path.join(self.root, *parts)
+
+    def _load(self):
+        try:
+            with open(self._path("rollups", "index.json"), encoding="utf-8") as f:
+                index = json.load(f)
+            self._rollups = {c: CampaignRollup.from_npz(self._path("rollups", fn)) for c, fn in index.items()}
+        except (OSError, ValueError, KeyError):
+            self._rollups = {}
+        try:
+            with open(self._path("ingested.json"), encoding="utf-8") as f:
+                self._files = json.load(f)
+        except (OSError, ValueError):
+            self._files = {}
+        batches = self._batches()
+        self._next_batch = int(os.path.basename(batches[-1]).split(".")[0]) + 1 if batches else 1
+
+    def _batches(self) -> list:
+        return sorted(glob.glob(self._path("events", "*.arrow")) + glob.glob(self._path("events", "*.pkl")))
+
+    def _write_json(self, obj, *parts):
+        path = self._path(*parts)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _rollup_file(campaign: str) -> str:
+        return hashlib.sha1(campaign.encode("utf-8")).hexdigest()[:16] + ".npz"
+
+    def _write_batch(self, events: pd.DataFrame) -> str:
+        os.makedirs(self._path("events"), exist_ok=True)
+        name = f"{self._next_batch:06d}"
+        self._next_batch += 1
+        if feather is not None:
+            path = self._path("events", name + ".arrow")
+            feather.write_feather(events.reset_index(drop=True), path, compression="uncompressed")
+        else:
+            path = self._path("events", name + ".pkl")
+            events.to_pickle(path)
+        return path
+
+    # ---- 쓰기 ----
+    def _apply(self, events: pd.DataFrame) -> list:
+        """batch -> rollup 갱신 (batch 안에서만 집계). -> 바뀐 캠페인 목록"""
+        g = events.groupby(["campaign", "day"], sort=False)[["views", "likes"]].sum().reset_index()
+        totals = g.groupby("day", sort=False)[["views", "likes"]].sum().reset_index()
+        touched = []
+        for campaign, part in [(ALL, totals)] + list(g.groupby("campaign", sort=False)):
+            rollup = self._rollups.setdefault(campaign, CampaignRollup())
+            rollup.add(part["day"].to_numpy(np.int64), part["views"].to_numpy(np.int64), part["likes"].to_numpy(np.int64))
+            touched.append(campaign)
+        return touched
+
+    def _persist(self, touched: list):
+        os.makedirs(self._path("rollups"), exist_ok=True)
+        for campaign in touched:
+            self._rollups[campaign].to_npz(self._path("rollups", self._rollup_file(campaign)))
+        self._write_json({c: self._rollup_file(c) for c in self._rollups}, "rollups", "index.json")
+
+    def append(self, events: pd.DataFrame) -> int:
+        """정규화된 이벤트 (normalize_events 결과) append -> 행 수"""
+        if events.empty:
+            return 0
+        with self._lock:
+            self._write_batch(events)
+            self._persist(self._apply(events))
+        return len(events)
+
+    def _read_new(self, path: str):
+        """inbox 파일에서 아직 읽지 않은 완전한 줄만 -> (프레임 또는 None, 갱신할 기록)"""
+        st_ = os.stat(path)
+        rec = self._files.get(path)
+        if rec is not None and rec["size"] == st_.st_size and rec["mtime_ns"] == st_.st_mtime_ns:
+            return None, None
+        offset = rec["offset"] if rec is not None and st_.st_size >= rec["offset"] else 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # 쓰는 중인 마지막 줄은 다음에
+        if offset == 0:
+            header, _, body = data[:end].partition(b"\n")
+            header += b"\n"
+        else:
+            header, body = rec["header"].encode("utf-8"), data[:end]
+        new_rec = {"offset": offset + end, "header": header.decode("utf-8"),
+                   "size": st_.st_size, "mtime_ns": st_.st_mtime_ns}
+        if not body.strip():
+            return None, new_rec
+        return pd.read_csv(io.BytesIO(header + body)), new_rec
+
+    def ingest_dir(self, inbox: str = None, pattern: str = "*.csv") -> dict:
+        """
+        inbox 의 새 파일 / 파일에 새로 추가된 줄만 ingest. 변화 없는 파일은 stat 만.
+        (파일이 기록보다 작아졌으면 처음부터 다시 읽으므로, inbox 파일은 append 만 할 것)
+        """
+        inbox = inbox or default_inbox_dir()
+        t0 = time.perf_counter()
+        out = {"files": 0, "rows": 0, "errors": []}
+        with self._lock:
+            batches, records = [], {}
+            for path in sorted(glob.glob(os.path.join(inbox, pattern))):
+                try:
+                    df, rec = self._read_new(path)
+                    if df is not None:
+                        batches.append(normalize_events(df))
+                        out["files"] += 1
+                    if rec is not None:
+                        records[path] = rec
+                except (OSError, ValueError) as e:
+                    out["errors"].append(f"{os.path.basename(path)}: {e}")
+            if batches:
+                out["rows"] = self.append(pd.concat(batches, ignore_index=True))
+            if records:
+                self._files.update(records)
+                os.makedirs(self.root, exist_ok=True)
+                self._write_json(self._files, "ingested.json")
+            out["ms"] = round((time.perf_counter() - t0) * 1e3, 2)
+            if out["rows"] or out["errors"]:
+                self.last_ingest = {**out, "ts": round(time.time(), 3)}
+        return out
+
+    def ingest_source(self, source) -> dict:
+        """source.fetch(hwm) 로 high-water mark 이후 행만 가져와 append (batch_rows 씩 끝까지)"""
+        t0 = time.perf_counter()
+        out = {"rows": 0, "errors": []}
+        with self._lock:
+            rec = self._files.get(source.key, {"hwm": 0})
+            hwm = rec["hwm"]
+            try:
+                while True:
+                    df, new_hwm = source.fetch(hwm)
+                    if df.empty:
+                        break
+                    out["rows"] += self.append(normalize_events(df))
+                    hwm = new_hwm
+                    if len(df) < getattr(source, "batch_rows", len(df) + 1):
+                        break
+            except (sqlite3.Error, OSError, ValueError) as e:
+                out["errors"].append(f"{source.key}: {e}")
+            if hwm != rec["hwm"]:
+                self._files[source.key] = {"hwm": hwm}
+                os.makedirs(self.root, exist_ok=True)
+                self._write_json(self._files, "ingested.json")
+        out["hwm"] = hwm
+        out["ms"] = round((time.perf_counter() - t0) * 1e3, 2)
+        return out
+
+    def refresh(self, inbox: str = None, sources=(), min_interval_s: float = 0.0, force: bool = False) -> dict:
+        """
+        inbox 파일 + 소스들의 새 데이터만 ingest. 마지막 refresh 후 min_interval_s 가 안 지났으면 건너뜀.
+        -> {"rows", "errors", "ms", "version", "skipped"}
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_refresh is not None and now - self._last_refresh < min_interval_s:
+                return {"rows": 0, "errors": [], "ms": 0.0, "version": self.version, "skipped": True}
+            self._last_refresh = now
+            t0 = time.perf_counter()
+            out = self.ingest_dir(inbox)
+            for source in sources:
+                r = self.ingest_source(source)
+                out["rows"] += r["rows"]
+                out["errors"] += r["errors"]
+            out.update(ms=round((time.perf_counter() - t0) * 1e3, 2), version=self.version, skipped=False)
+            if out["rows"] or out["errors"]:
+                self.last_ingest = {**out, "ts": round(time.time(), 3)}
+        return out
+
+    def rebuild(self) -> int:
+        """raw batch 전체로 rollup 을 다시 만든다 (rollup 파일 손상/형식 변경 시). -> 이벤트 행 수"""
+        with self._lock:
+            self._rollups = {}
+            rows = 0
+            for path in self._batches():
+                events = feather.read_feather(path) if path.endswith(".arrow") else pd.read_pickle(path)
+                self._apply(events)
+                rows += len(events)
+            self._persist(list(self._rollups))
+        return rows
+
+    # ---- 읽기 (rollup 만) ----
+    def campaigns(self) -> list:
+        with self._lock:
+            return sorted(c for c in self._rollups if c != ALL)
+
+    def frame(self, grain: str = "D", campaign: str = ALL, periods: int = None) -> pd.DataFrame:
+        """
+        -> date / views / likes (+ 일간이면 views_ma7) 프레임, 마지막 periods 개 버킷.
+        make_daily_kpi 와 같은 모양 (date 는 datetime.date, 주/월은 시작일).
+        """
+        if grain not in GRAINS:
+            raise ValueError(f"지원하지 않는 grain: {grain} (가능: {', '.join(GRAINS)})")
+        with self._lock:
+            rollup = self._rollups.get(campaign)
+            if rollup is None:
+                cols = ["date", "views", "likes"] + (["views_ma7"] if grain == "D" else [])
+                return pd.DataFrame(columns=cols)
+            b = rollup.buckets[grain]
+            lo = b.origin if periods is None else max(b.origin, b.end - periods)
+            sl = slice(lo - b.origin, b.end - b.origin)
+            df = pd.DataFrame({
+                "date": pd.to_datetime(_period_start(np.arange(lo, b.end), grain)).date,
+                "views": b.views[sl].copy(),
+                "likes": b.likes[sl].copy(),
+            })
+            if grain == "D":
+                df["views_ma7"] = rollup.ma7[sl].round(0).astype(np.int64)
+        return df
+
+    @property
+    def version(self) -> int:
+        """append 할 때마다 증가 (rollup 에서 파생된 결과의 캐시 키)"""
+        return self._next_batch - 1
+
+    def matrix(self, grain: str = "D", periods: int = None, campaigns=None, field: str = "views"):
+        """
+        -> (캠페인 이름 목록, 날짜 배열, (캠페인, 버킷) 값 행렬). 캠페인마다 시작/끝이 달라도 같은 축 (없는 날은 0).
+        이상 감지처럼 모든 series 를 한 번에 보는 용도 (rollup 배열을 복사만, raw 스캔 없음).
+        """
+        with self._lock:
+            names = self.campaigns() if campaigns is None else [c for c in campaigns if c in self._rollups]
+            buckets = [self._rollups[c].buckets[grain] for c in names]
+            filled = [b for b in buckets if len(b.views)]
+            if not filled:
+                return names, np.array([], dtype="datetime64[D]"), np.zeros((len(names), 0), np.int64)
+            end = max(b.end for b in filled)
+            lo = min(b.origin for b in filled)
+            if periods is not None:
+                lo = max(lo, end - periods)  # 데이터보다 앞은 0 으로 채우지 않음 (기준선이 0 으로 끌려가지 않게)
+            out = np.zeros((len(names), end - lo), np.int64)
+            for i, b in enumerate(buckets):
+                a, z = max(b.origin, lo), b.end
+                if a < z:
+                    out[i, a - lo:z - lo] = getattr(b, field)[a - b.origin:z - b.origin]
+        return names, _period_start(np.arange(lo, end), grain), out
+
+    def stats(self) -> dict:
+        with self._lock:
+            days = self._rollups[ALL].buckets["D"] if ALL in self._rollups else None
+            return {
+                "campaigns": len(self._rollups) - (ALL in self._rollups),
+                "days": 0 if days is None else len(days.views),
+                "batches": self._next_batch - 1,
+                "files": len(self._files),
+                "last_ingest": self.last_ingest,
+            }
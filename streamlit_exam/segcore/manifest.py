@@ -0,0 +1,119 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from .prep import compute_cut_points
+from .store import cache_path_for, load_table, source_signature
+
+# =========================
+# Dataset manifest (sidecar JSON)
+# =========================
+# 데이터셋 버전(size-mtime)당 한 번 만드는 작은 JSON: 컬럼 dtype / 행 수 / 숫자 컬럼 min·max /
+# 범주형 컬럼의 distinct 값 / preprocess cut point (Purchase 분위수, Occupation -> 그룹).
+# 사이드바 선택지와 스키마 확인은 이 파일만 읽으면 되므로 데이터 스캔이 없다.
+#   data/.segcache/<csv>.manifest.json
+MANIFEST_VERSION = "1"
+MAX_DISTINCT = 500  # 이보다 값이 많은 컬럼(User_ID, Product_ID 등)은 distinct 목록을 저장하지 않음
+
+
+def manifest_path_for(source_path: str, cache_dir: str = None) -> str:
+    return cache_path_for(source_path, cache_dir, suffix=".manifest.json")
+
+
+def _py(v):
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _distinct(s: pd.Series):
+    """사이드바 pick() 과 같은 순서 (sorted). 정렬 불가(타입 혼합)면 문자열 기준."""
+    values = [_py(v) for v in s.dropna().unique().tolist()]
+    try:
+        return sorted(values)
+    except TypeError:
+        return sorted(values, key=str)
+
+
+def build_manifest(df: pd.DataFrame, source: str = None) -> dict:
+    """raw 프레임 (load_table 결과) -> manifest dict"""
+    columns = {}
+    for col in df.columns:
+        s = df[col]
+        info = {"dtype": str(s.dtype), "nulls": int(s.isna().sum())}
+        if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+            info["min"] = _py(s.min()) if len(s) else None
+            info["max"] = _py(s.max()) if len(s) else None
+        n_distinct = int(s.nunique(dropna=True))
+        info["n_distinct"] = n_distinct
+        if n_distinct <= MAX_DISTINCT:
+            info["distinct"] = _distinct(s)
+        columns[str(col)] = info
+
+    manifest = {"version": MANIFEST_VERSION, "source": source, "rows": int(len(df)), "columns": columns}
+    if "Purchase" in df.columns:
+        q1, q2, occ_map = compute_cut_points(df)
+        manifest["cut_points"] = {
+            "price": [float(q1), float(q2)],
+            # JSON key 는 문자열만 되므로 (Occupation, 그룹) 쌍 목록으로 (원래 타입 유지)
+            "occupation_groups": None if occ_map is None else [[_py(k), v] for k, v in occ_map.items()],
+        }
+    return manifest
+
+
+def read_manifest(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def write_manifest(manifest: dict, path: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def open_manifest(source_path: str, load=None, cache_dir: str = None) -> dict:
+    """
+    source_path 의 manifest. 원본 size/mtime 이 그대로면 JSON 만 읽고,
+    아니면 load() (기본: load_table, Arrow 캐시 사용) 로 raw 프레임을 읽어 다시 만든다.
+    """
+    path = manifest_path_for(source_path, cache_dir)
+    sig = source_signature(source_path)
+    manifest = read_manifest(path)
+    if manifest is not None and manifest.get("source") == sig:
+        return manifest
+
+    df = load() if load is not None else load_table(source_path, cache_dir)
+    manifest = build_manifest(df, sig)
+    try:
+        write_manifest(manifest, path)
+    except OSError:
+        pass  # 읽기 전용 위치: 이번 프로세스에서만 사용
+    return manifest
+
+
+def distinct_values(manifest: dict, col: str):
+    """저장된 distinct 목록 (컬럼이 없거나 값이 너무 많으면 None)"""
+    return (manifest or {}).get("columns", {}).get(col, {}).get("distinct")
+
+
+def missing_columns(manifest: dict, required) -> list:
+    columns = (manifest or {}).get("columns", {})
+    return [c for c in required if c not in columns]
+
+
+def cut_points(manifest: dict):
+    """-> preprocess(cuts=...) 용 (q1, q2, occ_map), 없으면 None"""
+    cp = (manifest or {}).get("cut_points")
+    if not cp:
+        return None
+    q1, q2 = cp["price"]
+    groups = cp.get("occupation_groups")
+    return q1, q2, None if groups is None else {k: v for k, v in groups}
@@ -0,0 +1,107 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .store import source_signature
+
+# =========================
+# Filter-state query cache
+# =========================
+# st.cache_data 에 DataFrame 을 인자로 넘기면 rerun 마다 프레임 전체를 해싱해서 키를 만든다.
+# 여기서는 키를 (dataset fingerprint, 질의 이름, 필터 튜플) 로 만들어 행 수와 무관하게
+# dict 조회 한 번으로 끝낸다. 크기 제한 LRU + hit/miss/eviction 카운터.
+FILTER_KEY_DIMS = ["City_Category", "Gender", "Age", "Marital_Status", "Stay_In_Current_City_Years"]
+DEFAULT_MAXSIZE = 256
+
+
+def _norm(v):
+    if v is None or (isinstance(v, str) and v == "All"):
+        return None
+    return str(v)
+
+
+def filter_key(filters: dict, dims=None) -> tuple:
+    """필터 dict -> 고정 순서 튜플 ("All"/None -> None, 값은 문자열로 정규화)"""
+    filters = filters or {}
+    dims = FILTER_KEY_DIMS if dims is None else dims
+    extra = sorted(k for k in filters if k not in dims)
+    return tuple(_norm(filters.get(k)) for k in dims) + tuple((k, _norm(filters[k])) for k in extra)
+
+
+def dataset_fingerprint(src) -> str:
+    """파일 경로 -> 경로|size-mtime, 업로드 파일 객체 -> 내용 sha1 (로드 시 한 번만 계산)"""
+    if hasattr(src, "getvalue"):
+        return "upload:" + hashlib.sha1(src.getvalue()).hexdigest()
+    if hasattr(src, "read"):
+        pos = src.tell()
+        digest = hashlib.sha1(src.read()).hexdigest()
+        src.seek(pos)
+        return "upload:" + digest
+    path = os.path.abspath(src)
+    return f"{path}|{source_signature(path)}"
+
+
+class QueryCache:
+    """
+    작은 결과(세그먼트 테이블, KPI 튜플 등)용 LRU 캐시. 세션/스레드 간 공유 가능.
+    copy=True 면 DataFrame 결과를 복사해서 돌려준다 (호출 측 수정이 캐시를 오염시키지 않게).
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, copy: bool = True):
+        self.maxsize = maxsize
+        self.copy = copy
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def _out(self, value):
+        return value.copy() if (self.copy and hasattr(value, "copy") and hasattr(value, "columns")) else value
+
+    def get_or_compute(self, key, fn):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._out(self._data[key])
+            self.misses += 1
+        # 계산은 lock 밖에서 (같은 키를 동시에 계산하면 나중 결과로 덮어씀)
+        value = fn()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return self._out(value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def discard(self, fingerprint) -> int:
+        """키 튜플에 fingerprint 가 들어 있는 항목만 제거 (바뀐 데이터셋에서 파생된 결과만 무효화)"""
+        with self._lock:
+            stale = [k for k in self._data if isinstance(k, tuple) and fingerprint in k]
+            for k in stale:
+                del self._data[k]
+        return len(stale)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,137 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .memo import QueryCache
+
+# =========================
+# Server-side paginated table + edit overlay
+# =========================
+# 큰 표를 st.data_editor 에 통째로 넘기면 모든 행이 브라우저로 간다. 표는 서버에 한 벌 두고
+# 정렬/필터/컬럼 선택은 여기서 처리, 브라우저에는 현재 페이지만 보낸다.
+#   - 필터 + 정렬 결과 = 행 번호 배열 (조건당 한 번 계산, LRU) -> 페이지 이동은 슬라이스만
+#   - 편집은 원본을 바꾸지 않고 (행 번호, 컬럼) -> 값 overlay 로 보관, 화면/내보내기 때만 덮어씀
+#   - 정렬/필터는 원본 값 기준 (편집한 값으로 행이 다른 페이지로 옮겨 가지 않음)
+# 필터 조건: (lo, hi) 튜플 = 범위, list/set = 값 목록, str = 부분 문자열 (대소문자 무시)
+DISTINCT_LIMIT = 200
+
+
+def _freeze(filters: dict) -> tuple:
+    out = []
+    for col, cond in sorted((filters or {}).items()):
+        if cond is None or (isinstance(cond, (list, set, tuple, str)) and len(cond) == 0):
+            continue
+        if isinstance(cond, (list, set)):
+            cond = ("in",) + tuple(sorted(cond, key=str))
+        out.append((col, cond))
+    return tuple(out)
+
+
+class TablePager:
+    def __init__(self, df: pd.DataFrame, cache_size: int = 32):
+        self.df = df.reset_index(drop=True)  # index = 행 번호 (overlay 키)
+        self._cache = QueryCache(maxsize=cache_size, copy=False)
+
+    def __len__(self):
+        return len(self.df)
+
+    def distinct(self, col: str, limit: int = DISTINCT_LIMIT):
+        """필터 선택지 (값이 limit 개보다 많으면 None -> 부분 문자열 검색)"""
+        return self._cache.get_or_compute(("distinct", col, limit), lambda: self._distinct(col, limit))
+
+    def _distinct(self, col: str, limit: int):
+        values = self.df[col].dropna().unique()
+        if len(values) > limit:
+            return None
+        try:
+            return sorted(values.tolist())
+        except TypeError:
+            return sorted(values.tolist(), key=str)
+
+    def value_range(self, col: str):
+        s = self.df[col]
+        return s.min(), s.max()
+
+    def _mask(self, col: str, cond) -> np.ndarray:
+        s = self.df[col]
+        if isinstance(cond, tuple) and cond and cond[0] == "in":
+            return s.isin(cond[1:]).to_numpy()
+        if isinstance(cond, tuple):
+            lo, hi = cond
+            return ((s >= lo) & (s <= hi)).to_numpy()
+        return s.astype(str).str.contains(str(cond), case=False, regex=False).to_numpy()
+
+    def rows(self, filters: dict = None, sort: str = None, ascending: bool = True) -> np.ndarray:
+        """필터 + 정렬 결과 행 번호 (같은 조건이면 캐시)"""
+        key = ("rows", _freeze(filters), sort, ascending)
+        return self._cache.get_or_compute(key, lambda: self._rows(key[1], sort, ascending))
+
+    def _rows(self, frozen: tuple, sort: str, ascending: bool) -> np.ndarray:
+        mask = np.ones(len(self.df), dtype=bool)
+        for col, cond in frozen:
+            mask &= self._mask(col, cond)
+        idx = np.flatnonzero(mask)
+        if sort is None:
+            return idx
+        # 같은 값은 원래 순서 유지 (내림차순도)
+        return self.df[sort].iloc[idx].sort_values(ascending=ascending, kind="stable").index.to_numpy()
+
+    @staticmethod
+    def n_pages(rows: np.ndarray, page_size: int) -> int:
+        return max(1, -(-len(rows) // page_size))
+
+    def page(self, rows: np.ndarray, page: int, page_size: int, columns=None, overlay=None) -> pd.DataFrame:
+        """page (0부터) 의 행만, columns 만 (overlay 편집 반영). index = 행 번호."""
+        ids = rows[page * page_size:(page + 1) * page_size]
+        out = self.df.iloc[ids] if columns is None else self.df.iloc[ids][list(columns)]
+        return overlay.apply(out) if overlay is not None else out
+
+    def frame(self, rows: np.ndarray, columns=None, overlay=None) -> pd.DataFrame:
+        """전체 조회 결과 (내보내기용, overlay 편집 반영)"""
+        out = self.df.iloc[rows] if columns is None else self.df.iloc[rows][list(columns)]
+        return overlay.apply(out) if overlay is not None else out
+
+    def stats(self) -> dict:
+        return {"rows": len(self.df), **self._cache.stats()}
+
+
+class EditOverlay:
+    """(행 번호, 컬럼) -> 편집 값. 원본 표는 그대로 (세션별 하나)."""
+
+    def __init__(self):
+        self.edits = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.edits)
+
+    def record(self, shown: pd.DataFrame, edited: pd.DataFrame) -> int:
+        """화면에 보낸 페이지 vs 편집 결과 -> 바뀐 셀만 overlay 에 (-> 바뀐 셀 수)"""
+        cols = [c for c in shown.columns if c in edited.columns]
+        a, b = shown[cols], edited.loc[shown.index, cols]
+        changed = (a != b) & ~(a.isna() & b.isna())
+        r, c = np.nonzero(changed.to_numpy())
+        with self._lock:
+            for i, j in zip(r, c):
+                self.edits[(a.index[i], cols[j])] = b.iat[i, j]
+        return len(r)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """df (index = 행 번호) 에 편집 반영한 복사본. 편집이 없으면 df 그대로."""
+        with self._lock:
+            edits = [(rid, col, v) for (rid, col), v in self.edits.items() if col in df.columns]
+        if not edits:
+            return df
+        present = df.index
+        edits = [(rid, col, v) for rid, col, v in edits if rid in present]
+        if not edits:
+            return df
+        out = df.copy()
+        for rid, col, v in edits:
+            out.at[rid, col] = v
+        return out
+
+    def clear(self):
+        with self._lock:
+            self.edits.clear()
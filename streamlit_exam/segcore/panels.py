@@ -0,0 +1,61 @@
+import os
+import json
+import time
+import threading
+import functools
+
+# =========================
+# Panel rerun profile
+# =========================
+# 대시보드 패널(= st.fragment 단위) 실행 횟수/시간 기록. 위젯 하나 바꿨을 때
+# 어떤 패널이 다시 계산됐는지 보려는 용도 (프로세스 내 모든 세션 공유).
+#   SEGCORE_FRAGMENTS=0   : fragment 끄기 (위젯 변경마다 전체 rerun, 비교 측정용)
+#   SEGCORE_PANEL_LOG=path: 패널 실행마다 JSON 한 줄 append (bench_ui.py 가 읽음)
+FRAGMENTS_ENV = "SEGCORE_FRAGMENTS"
+PANEL_LOG_ENV = "SEGCORE_PANEL_LOG"
+
+
+def fragments_enabled() -> bool:
+    return os.environ.get(FRAGMENTS_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+class PanelProfile:
+    def __init__(self, log_path: str = None):
+        self.log_path = os.environ.get(PANEL_LOG_ENV) if log_path is None else log_path
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            s = self._stats.setdefault(name, {"runs": 0, "total_ms": 0.0, "last_ms": 0.0})
+            s["runs"] += 1
+            s["total_ms"] += seconds * 1e3
+            s["last_ms"] = seconds * 1e3
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"panel": name, "ms": round(seconds * 1e3, 3), "pid": os.getpid()}) + "\n")
+
+    def track(self, name: str):
+        """패널 함수 데코레이터 (st.fragment 안쪽에 둔다: fragment rerun 도 기록되도록)"""
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - t0)
+            return wrapper
+        return deco
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {**s, "total_ms": round(s["total_ms"], 1), "last_ms": round(s["last_ms"], 1),
+                       "mean_ms": round(s["total_ms"] / s["runs"], 1)}
+                for name, s in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
@@ -0,0 +1,218 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, spawn
+
+import numpy as np
+import pandas as pd
+
+from .sketch import QuantileSketch
+
+# =========================
+# Multi-core sharded segment aggregation
+# =========================
+# 행을 User_ID 해시(= dense code % workers) 로 shard 에 나눈다.
+#   -> 한 고객은 한 shard 에만 있으므로 shard 별 nunique 를 그대로 더해도 정확
+# 컬럼 배열(segment code / user code / Purchase)은 shared memory 에 한 번만 올리고
+# worker 는 자기 구간만 attach 해서 부분 집계(합계 + (segment, 값) 개수)를 돌려준다.
+# median 은 (segment, 값) 개수를 병합해서 정확히 계산.
+# pool 은 forkserver 로 시작 (Streamlit 서버는 스레드가 여럿 -> 그 상태로 fork 하면 자식이 lock 을 쥔 채 멈출 수 있음)
+# forkserver 가 없는 플랫폼은 spawn. 세션 여럿이 동시에 와도 pool 은 하나만 (lock).
+# forkserver/spawn 자식은 원래 __main__ 을 다시 실행하는데, Streamlit 은 앱 스크립트를 __main__ 으로 실행하므로
+# 자식마다 대시보드 전체가 다시 돈다. worker 함수는 이 모듈에 있어 __main__ 이 필요 없으므로
+# segcore worker 프로세스(이름 접두사)만 준비 데이터에서 main 정보를 뺀다.
+WORKERS_ENV = "SEGCORE_WORKERS"
+WORKER_PREFIX = "segcore-worker-"
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    """SEGCORE_WORKERS 환경변수 (없으면 1 = 기존 단일 스레드 pandas 경로)"""
+    try:
+        return max(1, int(os.environ.get(WORKERS_ENV, "1")))
+    except ValueError:
+        return 1
+
+
+def parallel_workers() -> int:
+    """'parallel' 엔진을 고른 경우 worker 수: SEGCORE_WORKERS 가 있으면 그 값 그대로, 없으면 CPU 코어 수"""
+    if os.environ.get(WORKERS_ENV):
+        return default_workers()
+    return os.cpu_count() or 1
+
+
+_preparation_data = spawn.get_preparation_data
+
+
+def _worker_preparation_data(name):
+    d = _preparation_data(name)
+    if str(name).startswith(WORKER_PREFIX):
+        d.pop("init_main_from_path", None)
+        d.pop("init_main_from_name", None)
+    return d
+
+
+spawn.get_preparation_data = _worker_preparation_data
+
+
+_base_context = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class _WorkerProcess(_base_context.Process):  # 자식에게 pickle 되므로 모듈 수준
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = WORKER_PREFIX + self.name
+
+
+class _WorkerContext(type(_base_context)):
+    Process = _WorkerProcess
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_WorkerContext())
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    """
+    pool 종료. atexit 은 multiprocessing 자식 프로세스에서는 돌지 않으므로
+    자식에서 병렬 집계를 썼다면 run() 이 끝나기 전에 직접 호출해야 한다.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool, _pool_workers = None, 0
+
+
+def _to_shm(arr: np.ndarray):
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+    return shm, (shm.name, arr.dtype.str, arr.shape)
+
+
+def _attach(spec):
+    name, dtype, shape = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _aggregate_shard(specs: dict, start: int, stop: int):
+    """worker: [start, stop) 구간의 segment 별 부분 집계"""
+    handles, cols = [], {}
+    try:
+        for key, spec in specs.items():
+            shm, arr = _attach(spec)
+            handles.append(shm)
+            cols[key] = arr[start:stop]
+        frame = pd.DataFrame({"seg": cols["seg"], "user": cols["user"], "p": cols["p"]})
+        g = frame.groupby("seg", sort=False)
+        part = g.agg(
+            transactions=("p", "size"),
+            revenue=("p", "sum"),
+            purchase_n=("p", "count"),
+        )
+        known = frame[frame["user"] >= 0]
+        part["customers"] = known.groupby("seg", sort=False)["user"].nunique().reindex(part.index, fill_value=0)
+        counts = frame.dropna(subset=["p"]).groupby(["seg", "p"], sort=False).size()
+        return part, counts
+    finally:
+        del cols
+        for shm in handles:
+            shm.close()
+
+
+def _empty_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    revenue_dtype = np.int64 if pd.api.types.is_integer_dtype(df["Purchase"].dtype) else np.float64
+    return pd.DataFrame({
+        "customers": pd.Series(dtype=np.int64),
+        "transactions": pd.Series(dtype=np.int64),
+        "revenue": pd.Series(dtype=revenue_dtype),
+        "avg_purchase": pd.Series(dtype=np.float64),
+        "median_purchase": pd.Series(dtype=np.float64),
+    }, index=pd.Index([], name="Segment_AGOP"))
+
+
+def parallel_segment_aggregates(df: pd.DataFrame, workers: int = None) -> pd.DataFrame:
+    """
+    groupby("Segment_AGOP").agg(customers, transactions, revenue, avg_purchase, median_purchase) 와
+    같은 결과를 process pool 로 계산한다 (Segment_AGOP 순서 = 정렬 순서).
+    """
+    workers = workers or default_workers()
+
+    if isinstance(df["Segment_AGOP"].dtype, pd.CategoricalDtype):
+        seg_codes = df["Segment_AGOP"].cat.codes.to_numpy().astype(np.int32)
+        labels = df["Segment_AGOP"].cat.categories
+    else:
+        seg_codes, labels = pd.factorize(df["Segment_AGOP"], sort=True)
+        seg_codes = seg_codes.astype(np.int32)
+    purchase = df["Purchase"].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    if "User_ID" in df.columns:
+        user_codes, _ = pd.factorize(df["User_ID"])
+        user_codes = user_codes.astype(np.int32)
+        shard = np.where(user_codes >= 0, user_codes % workers, 0)
+    else:
+        user_codes = np.arange(len(df), dtype=np.int32)  # 행 = 고객 (customers = transactions)
+        shard = np.arange(len(df)) * workers // max(len(df), 1)
+
+    keep = seg_codes >= 0
+    if not keep.any():
+        # 필터 결과가 비었으면 shard 가 없다 (공유 메모리 0 바이트도 만들 수 없음) -> 같은 스키마의 빈 표
+        return _empty_aggregates(df)
+    order = np.argsort(shard[keep], kind="stable")
+    bounds = np.searchsorted(shard[keep][order], np.arange(workers + 1))
+
+    shms, specs = [], {}
+    try:
+        for key, arr in (("seg", seg_codes[keep][order]),
+                         ("user", user_codes[keep][order]),
+                         ("p", purchase[keep][order])):
+            shm, spec = _to_shm(arr)
+            shms.append(shm)
+            specs[key] = spec
+
+        ranges = [(bounds[k], bounds[k + 1]) for k in range(workers) if bounds[k + 1] > bounds[k]]
+        if workers == 1:
+            results = [_aggregate_shard(specs, a, b) for a, b in ranges]
+        else:
+            pool = _get_pool(workers)
+            results = list(pool.map(_aggregate_shard, [specs] * len(ranges), *zip(*ranges)))
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+    parts = pd.concat([r[0] for r in results]).groupby(level=0).sum().sort_index()
+    counts = pd.concat([r[1] for r in results]).groupby(level=[0, 1]).sum().sort_index()
+
+    medians = {}
+    for code, vc in counts.groupby(level=0):
+        # 압축 없이 병합 (distinct 값이 많아도 정확 -> 메모리는 segment 별 distinct 값 수만큼)
+        medians[code] = QuantileSketch.from_counts(vc.index.get_level_values(1), vc.to_numpy(), max_values=None).median()
+
+    out = pd.DataFrame({
+        "customers": parts["customers"].astype(np.int64),
+        "transactions": parts["transactions"].astype(np.int64),
+        "revenue": parts["revenue"],
+        "avg_purchase": parts["revenue"] / parts["purchase_n"],
+        "median_purchase": pd.Series(medians).reindex(parts.index),
+    })
+    if pd.api.types.is_integer_dtype(df["Purchase"].dtype):
+        out["revenue"] = out["revenue"].round().astype(np.int64)
+    out.index = pd.Index(np.asarray(labels)[parts.index.to_numpy()], name="Segment_AGOP")
+    return out
@@ -0,0 +1,88 @@
+import os
+
+# =========================
+# Path handling (robust)
+# =========================
+# walmart.py / CLI 공용. 기준 디렉터리 = 이 패키지의 상위 (streamlit_exam/)
+DEFAULT_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def safe_path(p: str) -> str:
+    return os.path.normpath(str(p).strip().strip('"').strip("'"))
+
+
+def resolve_path(user_path: str, base_dir: str = None) -> str:
+    """
+    Robust path resolver:
+    - Accepts absolute path
+    - Resolves relative to base_dir (기본: streamlit_exam/, walmart.py 위치)
+    - Resolves relative to CWD
+    - Auto-fixes duplicated folder like streamlit_exam\\streamlit_exam\\...
+    - If input begins with streamlit_exam\\..., tries stripping that prefix
+    - Tries common fallbacks (data/walmart.csv, streamlit_exam/data/walmart.csv)
+    """
+    p = safe_path(user_path)
+
+    # 1) absolute path
+    if os.path.isabs(p) and os.path.exists(p):
+        return p
+
+    BASE_DIR = base_dir or DEFAULT_BASE_DIR
+    CWD = os.getcwd()
+
+    candidates = []
+
+    # 2) as-is relative to BASE_DIR / CWD
+    candidates.append(os.path.join(BASE_DIR, p))
+    candidates.append(os.path.join(CWD, p))
+
+    # 3) auto-fix duplicated folder names in the combined paths
+    def dedupe_double_folder(path_str: str, folder_name: str) -> str:
+        token = f"{os.sep}{folder_name}{os.sep}{folder_name}{os.sep}"
+        repl  = f"{os.sep}{folder_name}{os.sep}"
+        return path_str.replace(token, repl)
+
+    for base in [BASE_DIR, CWD]:
+        candidates.append(dedupe_double_folder(os.path.join(base, p), "streamlit_exam"))
+
+    # 4) If user provided streamlit_exam\... but BASE_DIR already points inside that folder,
+    #    try stripping the first "streamlit_exam\" from the input
+    parts = p.split(os.sep)
+    if len(parts) >= 2 and parts[0].lower() == "streamlit_exam":
+        stripped = os.sep.join(parts[1:])
+        candidates.append(os.path.join(BASE_DIR, stripped))
+        candidates.append(os.path.join(CWD, stripped))
+
+    # 5) Common fallbacks (file-only)
+    file_only = os.path.basename(p)
+    candidates.extend([
+        os.path.join(BASE_DIR, "data", file_only),
+        os.path.join(BASE_DIR, "streamlit_exam", "data", file_only),
+        os.path.join(CWD, "data", file_only),
+        os.path.join(CWD, "streamlit_exam", "data", file_only),
+    ])
+
+    # normalize + unique
+    uniq, seen = [], set()
+    for c in candidates:
+        c = os.path.normpath(c)
+        if c not in seen:
+            uniq.append(c)
+            seen.add(c)
+
+    for c in uniq:
+        if os.path.exists(c):
+            return c
+
+    # detailed error
+    preview = "\n".join([f"- {c}" for c in uniq[:10]])
+    raise FileNotFoundError(
+        "경로에 파일이 없습니다.\n"
+        f"입력값: {user_path}\n\n"
+        "확인한 후보 경로(상위 10개):\n"
+        f"{preview}\n\n"
+        "가장 확실한 해결:\n"
+        "1) 좌측 업로드로 CSV 넣기\n"
+        "2) 절대경로 입력 (예: C:\\Users\\...\\walmart.csv)\n"
+        "3) 또는 Data path에 'data\\walmart.csv' 입력"
+    )
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# Segment vocabularies (code 순서 = categorical code)
+# =========================
+AGE_GROUPS = ["0–17", "18–25", "26–35", "36–45", "46+", "Unknown"]
+AGE_MID = {
+    "0-17": 8.5, "18-25": 21.5, "26-35": 30.5, "36-45": 40.5,
+    "46-50": 48.0, "51-55": 53.0, "55+": 58.0
+}
+PRICE_SEGMENTS = ["Price_Low", "Price_Mid", "Price_High", "nan"]  # "nan": Purchase 결측
+OCC_GROUPS = ["Occ_Low", "Occ_Mid", "Occ_High", "Occ_Other"]
+BUCKETS = ["Defend", "Grow", "Expand", "Other"]
+
+# BUCKET_LUT[occ_code, price_code] -> bucket code (bucketize_from_parts 규칙)
+BUCKET_LUT = np.full((len(OCC_GROUPS), len(PRICE_SEGMENTS)), BUCKETS.index("Other"), dtype=np.int8)
+BUCKET_LUT[OCC_GROUPS.index("Occ_High"), PRICE_SEGMENTS.index("Price_High")] = BUCKETS.index("Defend")
+BUCKET_LUT[OCC_GROUPS.index("Occ_Mid"), PRICE_SEGMENTS.index("Price_Mid")] = BUCKETS.index("Grow")
+BUCKET_LUT[OCC_GROUPS.index("Occ_Mid"), PRICE_SEGMENTS.index("Price_Low")] = BUCKETS.index("Expand")
+BUCKET_LUT[OCC_GROUPS.index("Occ_High"), PRICE_SEGMENTS.index("Price_Low")] = BUCKETS.index("Expand")
+
+
+def age_to_grp(age_str: str) -> str:
+    s = str(age_str)
+    if s == "0-17": return "0–17"
+    if s == "18-25": return "18–25"
+    if s == "26-35": return "26–35"
+    if s == "36-45": return "36–45"
+    if s in ["46-50", "51-55", "55+"]: return "46+"
+    return "Unknown"
+
+
+def age_mid(age_str: str) -> float:
+    return AGE_MID.get(str(age_str), np.nan)
+
+
+def _factorize(s: pd.Series):
+    """(codes, uniques) — categorical 이면 기존 code를 그대로 쓰므로 O(n) 한 번."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    return codes, list(uniques)
+
+
+def _lookup(codes: np.ndarray, per_unique, na_value):
+    """unique 값에만 계산한 결과를 code로 펼친다 (-1 = 결측은 마지막 칸)."""
+    table = np.asarray(list(per_unique) + [na_value])
+    return table[codes]
+
+
+def _cat(codes: np.ndarray, labels) -> pd.Categorical:
+    return pd.Categorical.from_codes(codes.astype(np.int16, copy=False), categories=labels)
+
+
+# =========================
+# Cut points (streaming/manifest 에서도 재사용)
+# =========================
+def price_cut_points(purchase: pd.Series):
+    q1, q2 = purchase.quantile([0.33, 0.66]).values
+    return q1, q2
+
+
+def occupation_group_map(occ_mean: pd.Series) -> dict:
+    """Occupation -> Occ_Low/Mid/High (평균 log_purchase 의 33/66% 분위 기준)."""
+    o1, o2 = occ_mean.quantile([0.33, 0.66]).values
+    out = {}
+    for occ, m in occ_mean.items():
+        if np.isnan(m):
+            out[occ] = "Occ_Other"
+        elif m <= o1:
+            out[occ] = "Occ_Low"
+        elif m <= o2:
+            out[occ] = "Occ_Mid"
+        else:
+            out[occ] = "Occ_High"
+    return out
+
+
+def price_codes(purchase: pd.Series, q1: float, q2: float) -> np.ndarray:
+    """pd.cut(bins=[-inf, q1, q2, inf]) 와 동일 (오른쪽 닫힘), 결측은 'nan' code."""
+    x = purchase.to_numpy(dtype=np.float64, na_value=np.nan)
+    codes = (x > q1).astype(np.int8) + (x > q2)
+    codes[np.isnan(x)] = PRICE_SEGMENTS.index("nan")
+    return codes
+
+
+def occupation_codes(occupation: pd.Series, occ_map: dict) -> np.ndarray:
+    codes, uniques = _factorize(occupation)
+    per_unique = [OCC_GROUPS.index(occ_map.get(u, "Occ_Other")) for u in uniques]
+    return _lookup(codes, per_unique, OCC_GROUPS.index("Occ_Other")).astype(np.int8)
+
+
+def segment_categorical(age_c, gender_c, gender_labels, occ_c, price_c) -> pd.Categorical:
+    """
+    Segment_AGOP = "Age_grp | Gender | Occupation_grp | Price_Segment"
+    - 4개 component code 를 하나의 정수 code 로 합치고
+    - 실제로 등장한 조합에만 문자열 label 을 만든다
+    - categories 는 label 사전순 (groupby 결과 순서를 기존과 동일하게 유지)
+    """
+    n_g, n_o, n_p = len(gender_labels), len(OCC_GROUPS), len(PRICE_SEGMENTS)
+    combined = ((age_c.astype(np.int64) * n_g + gender_c) * n_o + occ_c) * n_p + price_c
+    size = len(AGE_GROUPS) * n_g * n_o * n_p
+    present = np.flatnonzero(np.bincount(combined, minlength=size))
+
+    a, rest = np.divmod(present, n_g * n_o * n_p)
+    g, rest = np.divmod(rest, n_o * n_p)
+    o, p = np.divmod(rest, n_p)
+    labels = [
+        f"{AGE_GROUPS[ai]} | {gender_labels[gi]} | {OCC_GROUPS[oi]} | {PRICE_SEGMENTS[pi]}"
+        for ai, gi, oi, pi in zip(a, g, o, p)
+    ]
+    order = np.argsort(np.asarray(labels, dtype=object), kind="stable")
+    remap = np.full(size, -1, dtype=np.int32)
+    remap[present[order]] = np.arange(len(present), dtype=np.int32)
+    return pd.Categorical.from_codes(remap[combined], categories=[labels[i] for i in order])
+
+
+def compute_cut_points(df: pd.DataFrame, log_purchase: pd.Series = None):
+    """전체 데이터 기준 cut point -> (q1, q2, occ_map) (Purchase 분위수 / Occupation 평균 log_purchase)"""
+    q1, q2 = price_cut_points(df["Purchase"])
+    occ_map = None
+    if "Occupation" in df.columns:
+        log_purchase = np.log1p(df["Purchase"]) if log_purchase is None else log_purchase
+        occ_mean = log_purchase.groupby(df["Occupation"], observed=True).mean()
+        occ_map = occupation_group_map(occ_mean)
+    return q1, q2, occ_map
+
+
+def preprocess(df: pd.DataFrame, cuts=None) -> pd.DataFrame:
+    """
+    raw walmart.csv -> Age_grp / Price_Segment / Occupation_grp / bucket / Segment_AGOP
+    (행 단위 Python 호출 없이 unique 값 + code 연산으로 처리, 결과 label은 categorical)
+    cuts: 미리 구한 (q1, q2, occ_map) (dataset manifest) -> 분위수/groupby 재계산 생략
+    """
+    if "Purchase" not in df.columns:
+        raise ValueError(f"필수 컬럼 'Purchase'가 없습니다. 현재 컬럼 예시: {list(df.columns)[:20]}")
+
+    df = df.copy()
+    df["log_purchase"] = np.log1p(df["Purchase"])
+
+    q1, q2, occ_map = compute_cut_points(df, df["log_purchase"]) if cuts is None else cuts
+    return assign_segments(df, q1, q2, occ_map)
+
+
+def assign_segments(df: pd.DataFrame, q1: float, q2: float, occ_map: dict = None) -> pd.DataFrame:
+    """
+    주어진 cut point 로 세그먼트 컬럼을 붙인다 (df 를 직접 수정).
+    chunk 단위 streaming 처럼 cut point 를 따로 구한 경우에도 같은 규칙을 쓰기 위해 분리.
+    """
+    n = len(df)
+    if "log_purchase" not in df.columns:
+        df["log_purchase"] = np.log1p(df["Purchase"])
+
+    if "Age" in df.columns:
+        codes, uniques = _factorize(df["Age"])
+        age_c = _lookup(codes, [AGE_GROUPS.index(age_to_grp(u)) for u in uniques],
+                        AGE_GROUPS.index("Unknown")).astype(np.int8)
+        df["Age_grp"] = _cat(age_c, AGE_GROUPS)
+        df["Age_mid"] = _lookup(codes, [age_mid(u) for u in uniques], np.nan).astype(np.float64)
+    else:
+        age_c = np.full(n, AGE_GROUPS.index("Unknown"), dtype=np.int8)
+        df["Age_grp"] = _cat(age_c, AGE_GROUPS)
+        df["Age_mid"] = np.nan
+
+    if "Gender" not in df.columns:
+        df["Gender"] = "Unknown"
+    codes, uniques = _factorize(df["Gender"])
+    g_ids, gender_labels = pd.factorize(np.asarray([str(u) for u in uniques] + ["nan"], dtype=object))
+    gender_c = g_ids[codes].astype(np.int16)
+    gender_labels = list(gender_labels)
+
+    # Price segment from Purchase quantiles
+    price_c = price_codes(df["Purchase"], q1, q2)
+    df["Price_Segment"] = _cat(price_c, PRICE_SEGMENTS)
+
+    # Occupation group from Occupation mean(log_purchase)
+    if occ_map is not None and "Occupation" in df.columns:
+        occ_c = occupation_codes(df["Occupation"], occ_map)
+    else:
+        occ_c = np.full(n, OCC_GROUPS.index("Occ_Other"), dtype=np.int8)
+    df["Occupation_grp"] = _cat(occ_c, OCC_GROUPS)
+
+    # Strategy bucket rule (lookup table)
+    df["bucket"] = _cat(BUCKET_LUT[occ_c, price_c], BUCKETS)
+
+    df["Segment_AGOP"] = segment_categorical(age_c, gender_c, gender_labels, occ_c, price_c)
+    return df
@@ -0,0 +1,53 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# Formatting / export helpers
+# =========================
+KPI_NAMES = ["customers", "revenue", "aov", "avg_purchases", "clv_proxy"]
+OUTPUT_FORMATS = ["csv", "json", "parquet"]
+
+
+def fmt_k(x):
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return "-"
+    x = float(x)
+    ax = abs(x)
+    if ax >= 1e9:  return f"{x/1e9:.2f}B"
+    if ax >= 1e6:  return f"{x/1e6:.2f}M"
+    if ax >= 1e3:  return f"{x/1e3:.2f}K"
+    return f"{x:.0f}"
+
+
+def kpis_to_dict(kpis) -> dict:
+    """calc_kpis() 튜플 -> {이름: 값} (JSON 직렬화 가능한 python 숫자, NaN -> None)"""
+    out = {}
+    for name, v in zip(KPI_NAMES, kpis):
+        v = v.item() if isinstance(v, np.generic) else v
+        out[name] = None if (isinstance(v, float) and np.isnan(v)) else v
+    return out
+
+
+def write_segment_table(seg: pd.DataFrame, path: str, fmt: str = "csv") -> str:
+    if fmt == "csv":
+        seg.to_csv(path, index=False)
+    elif fmt == "json":
+        seg.to_json(path, orient="records", indent=2, force_ascii=False)
+    elif fmt == "parquet":
+        seg.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"지원하지 않는 형식: {fmt} (가능: {', '.join(OUTPUT_FORMATS)})")
+    return path
+
+
+def write_outputs(seg: pd.DataFrame, kpis, out_dir: str, fmt: str = "csv", meta: dict = None) -> dict:
+    """out_dir/segments.<fmt> + out_dir/kpis.json 저장 -> {종류: 경로}"""
+    os.makedirs(out_dir, exist_ok=True)
+    seg_path = write_segment_table(seg, os.path.join(out_dir, f"segments.{fmt}"), fmt)
+    kpi_path = os.path.join(out_dir, "kpis.json")
+    with open(kpi_path, "w", encoding="utf-8") as f:
+        json.dump({"kpis": kpis_to_dict(kpis), **(meta or {})}, f, indent=2, ensure_ascii=False)
+    return {"segments": seg_path, "kpis": kpi_path}
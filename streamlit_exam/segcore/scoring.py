@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from .segments import minmax
+
+# =========================
+# Target score engine
+# =========================
+# 필터 상태마다 세그먼트별 정규화 지표 행렬(n_segments x 4)을 한 번 만들어 두고,
+# 가중치를 바꾸면 행렬-벡터 곱 한 번으로 다시 점수를 매긴다 (groupby/정규화 재계산 없음).
+# Top-N 은 전체 정렬 대신 argpartition 으로 N 개만 고른 뒤 그 N 개만 정렬.
+NORM_METRICS = {"rev_n": "revenue", "cust_n": "customers", "tx_n": "transactions", "aov_n": "avg_purchase"}
+DEFAULT_WEIGHTS = {"rev_n": 0.45, "cust_n": 0.25, "tx_n": 0.20, "aov_n": 0.10}  # walmart.py 기본식
+FORMULAS = {
+    "weighted": "Weighted (normalized metrics)",
+    "share_x_aov": "Revenue share × relative AOV",  # app.py 식
+}
+
+
+class ScoreMatrix:
+    def __init__(self, norm: np.ndarray, share: np.ndarray, aov_rel: np.ndarray):
+        self.norm = norm
+        self.share = share
+        self.aov_rel = aov_rel
+
+    def __len__(self):
+        return len(self.norm)
+
+    @classmethod
+    def from_segments(cls, seg: pd.DataFrame) -> "ScoreMatrix":
+        """세그먼트 테이블(build_segment_table / create_segment_summary 스키마) -> 정규화 행렬"""
+        norm = np.empty((len(seg), len(NORM_METRICS)), dtype=np.float64, order="F")  # 열 연속
+        for j, (name, col) in enumerate(NORM_METRICS.items()):
+            norm[:, j] = seg[name].to_numpy(dtype=np.float64) if name in seg.columns else minmax(seg[col]).to_numpy(dtype=np.float64)
+
+        revenue = seg["revenue"].to_numpy(dtype=np.float64)
+        total = revenue.sum()
+        share = revenue / total if total else np.zeros(len(seg))
+        aov = seg["avg_purchase"].to_numpy(dtype=np.float64)
+        aov_max = np.nanmax(aov) if len(aov) else np.nan
+        aov_rel = aov / aov_max if len(aov) else aov
+        return cls(norm, share, aov_rel)
+
+    def score(self, weights: dict = None, formula: str = "weighted") -> np.ndarray:
+        if formula == "share_x_aov":
+            return self.share * self.aov_rel
+        if formula != "weighted":
+            raise ValueError(f"알 수 없는 score 식: {formula} (가능: {', '.join(FORMULAS)})")
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        # 행렬-벡터 곱을 열 단위 누적으로: 기본 가중치면 finish_segment_table 의 식과 비트 단위로 같다
+        out = np.zeros(len(self.norm))
+        for j, k in enumerate(NORM_METRICS):
+            w = float(weights.get(k, 0.0))
+            if w:
+                out += w * self.norm[:, j]
+        return out
+
+
+def top_n_indices(values, n: int, mask=None, ascending: bool = False) -> np.ndarray:
+    """
+    values 기준 상위 n 개의 위치 인덱스 (정렬됨). mask 가 있으면 True 인 위치만 후보.
+    NaN 은 맨 뒤 (sort_values 와 같음). 동점은 원래 순서 유지.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    idx = np.flatnonzero(mask) if mask is not None else np.arange(len(values))
+    if n <= 0 or len(idx) == 0:
+        return idx[:0]
+    key = values[idx] if ascending else -values[idx]
+    key = np.where(np.isnan(key), np.inf, key)
+    if n < len(idx):
+        part = np.argpartition(key, n - 1)[:n]
+        # 경계값과 같은 값이 잘린 쪽에도 있으면 안정 순서를 위해 경계값 전체를 후보로
+        kth = key[part].max()
+        part = np.flatnonzero(key <= kth) if np.count_nonzero(key == kth) > np.count_nonzero(key[part] == kth) else part
+    else:
+        part = np.arange(len(idx))
+    order = part[np.lexsort((part, key[part]))][:n]
+    return idx[order]
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+
+def minmax(s):
+    return (s - s.min()) / (s.max() - s.min() + 1e-9)
+
+
+def bucketize(seg_str: str):
+    if ("Occ_High" in seg_str) and ("Price_High" in seg_str):
+        return "Defend"
+    if ("Occ_Mid" in seg_str) and ("Price_Mid" in seg_str):
+        return "Grow"
+    if (("Occ_Mid" in seg_str) or ("Occ_High" in seg_str)) and ("Price_Low" in seg_str):
+        return "Expand"
+    return "Other"
+
+
+def finish_segment_table(seg: pd.DataFrame) -> pd.DataFrame:
+    """
+    Segment_AGOP 별 집계(customers/transactions/revenue/avg/median) 에
+    revenue_share, bucket, 정규화 지표, target_score 를 붙인다.
+    (raw groupby / cube / streaming 경로가 모두 같은 스키마를 내도록 공유)
+    """
+    seg["revenue_share"] = seg["revenue"] / seg["revenue"].sum()
+    seg["bucket"] = seg["Segment_AGOP"].apply(bucketize)
+
+    seg["rev_n"]  = minmax(seg["revenue"])
+    seg["cust_n"] = minmax(seg["customers"])
+    seg["tx_n"]   = minmax(seg["transactions"])
+    seg["aov_n"]  = minmax(seg["avg_purchase"])
+
+    seg["target_score"] = 0.45*seg["rev_n"] + 0.25*seg["cust_n"] + 0.20*seg["tx_n"] + 0.10*seg["aov_n"]
+    return seg
+
+
+def build_segment_table(df: pd.DataFrame, workers: int = None) -> pd.DataFrame:
+    """workers > 1 (또는 SEGCORE_WORKERS) 이면 User_ID shard 병렬 집계, 아니면 pandas groupby"""
+    from .parallel import default_workers, parallel_segment_aggregates
+
+    workers = workers or default_workers()
+    if workers > 1:
+        return finish_segment_table(parallel_segment_aggregates(df, workers).reset_index())
+
+    customers = ("User_ID", "nunique") if "User_ID" in df.columns else ("Segment_AGOP", "size")
+
+    seg = (
+        df.groupby("Segment_AGOP", observed=True)
+          .agg(
+              customers=customers,
+              transactions=("Segment_AGOP", "size"),
+              revenue=("Purchase", "sum"),
+              avg_purchase=("Purchase", "mean"),
+              median_purchase=("Purchase", "median"),
+          )
+          .reset_index()
+    )
+    return finish_segment_table(seg)
+
+
+def calc_kpis(df: pd.DataFrame):
+    customers = df["User_ID"].nunique() if "User_ID" in df.columns else len(df)
+    transactions = len(df)
+    revenue = df["Purchase"].sum()
+    aov = df["Purchase"].mean()
+    return kpis_from_totals(customers, transactions, revenue, aov)
+
+
+def kpis_from_totals(customers, transactions, revenue, aov):
+    avg_purchases = (transactions / customers) if customers else np.nan
+    clv_proxy = (revenue / customers) if customers else np.nan
+    return customers, revenue, aov, avg_purchases, clv_proxy
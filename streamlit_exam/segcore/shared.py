@@ -0,0 +1,180 @@
+import os
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .store import cache_path_for, source_signature
+
+# =========================
+# Shared read-only dataset (memory-mapped columns)
+# =========================
+# 전처리된 프레임을 컬럼별 .npy (categorical 은 codes + categories) 로 한 번 써 두고
+# np.load(mmap_mode="r") 로 연다. 데이터 페이지는 OS page cache 에 한 번만 올라가므로
+# 같은 호스트의 모든 Streamlit 프로세스/세션이 복사 없이 같은 메모리를 본다.
+#   - 배열은 읽기 전용: 새 컬럼 추가/필터 결과는 각자 새 배열 (copy-on-write)
+#   - 원본이 바뀌면 (size/mtime) 다시 만든다
+SHARED_VERSION = "1"
+SHARED_ENV = "SEGCORE_SHARED"  # "0" 이면 끔 (프로세스마다 pandas 프레임)
+
+
+def shared_enabled() -> bool:
+    return os.environ.get(SHARED_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def shared_path_for(source_path: str, tag: str = "shared", cache_dir: str = None) -> str:
+    return cache_path_for(source_path, cache_dir, suffix=f".{tag}")
+
+
+def _column_spec(s: pd.Series):
+    """-> (저장할 numpy 배열, 메타). 문자열/object 컬럼은 categorical 로 저장."""
+    if not isinstance(s.dtype, pd.CategoricalDtype) and not (
+        pd.api.types.is_numeric_dtype(s.dtype) or pd.api.types.is_bool_dtype(s.dtype)
+    ):
+        s = s.astype(str).astype("category")
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        cats = s.cat.categories
+        return np.asarray(s.array.codes), {
+            "kind": "category",
+            "categories": [c.item() if isinstance(c, np.generic) else c for c in cats.tolist()],
+            "categories_dtype": str(cats.dtype),
+            "ordered": bool(s.cat.ordered),
+        }
+    arr = s.to_numpy()
+    return arr, {"kind": "numeric", "dtype": arr.dtype.str}
+
+
+def write_shared(df: pd.DataFrame, path: str, meta: dict = None) -> str:
+    """df 를 path/ (컬럼별 .npy + meta.json) 로 저장. tmp 디렉터리에 쓰고 교체."""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    for i, col in enumerate(df.columns):
+        arr, spec = _column_spec(df[col])
+        fn = f"c{i:03d}.npy"
+        np.save(os.path.join(tmp, fn), np.ascontiguousarray(arr))
+        columns.append({"name": str(col), "file": fn, **spec})
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": SHARED_VERSION, "rows": int(len(df)), "columns": columns, **(meta or {})}, f)
+
+    if os.path.exists(path):
+        shutil.rmtree(path, ignore_errors=True)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # 다른 프로세스가 먼저 만들었으면 그쪽 결과를 쓴다
+        shutil.rmtree(tmp, ignore_errors=True)
+    return path
+
+
+def _read_meta(path: str) -> dict:
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def open_shared(path: str) -> pd.DataFrame:
+    """memory-map 으로 열린 읽기 전용 DataFrame (컬럼 데이터 복사 없음)"""
+    meta = _read_meta(path)
+    data = {}
+    for c in meta["columns"]:
+        arr = np.load(os.path.join(path, c["file"]), mmap_mode="r").view(np.ndarray)
+        if c["kind"] == "category":
+            cats = pd.Index(c["categories"], dtype=c["categories_dtype"])
+            dtype = pd.CategoricalDtype(cats, ordered=c["ordered"])
+            data[c["name"]] = pd.Series(pd.Categorical.from_codes(arr, dtype=dtype), copy=False)
+        else:
+            data[c["name"]] = pd.Series(arr, copy=False)
+    return pd.DataFrame(data, copy=False)
+
+
+def open_shared_dataset(source_path: str, build, tag: str = "shared", cache_dir: str = None) -> pd.DataFrame:
+    """
+    source_path 에서 파생된 프레임(build() 결과)을 .segcache/<name>.<tag>/ 에 두고 memory-map 으로 연다.
+    원본 size/mtime 이 그대로면 build() 를 호출하지 않는다.
+    SEGCORE_SHARED=0 이거나 쓰기 실패 시 build() 결과를 그대로 반환.
+    """
+    if not shared_enabled():
+        return build()
+    path = shared_path_for(source_path, tag, cache_dir)
+    sig = source_signature(source_path)
+    try:
+        meta = _read_meta(path)
+        if meta.get("version") == SHARED_VERSION and meta.get("source") == sig:
+            return open_shared(path)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    df = build()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_shared(df, path, {"source": sig})
+        return open_shared(path)
+    except (OSError, ValueError, TypeError):
+        return df  # 읽기 전용 위치/직렬화 불가 컬럼: 메모리 프레임 사용
+
+
+# =========================
+# Per-process memory reporting
+# =========================
+def _read_kb_fields(path: str) -> dict:
+    out = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                parts = rest.split()
+                if len(parts) >= 1 and parts[0].isdigit():
+                    out[key.strip()] = int(parts[0])
+    except OSError:
+        pass
+    return out
+
+
+def _mapped_kb(prefix: str) -> dict:
+    """/proc/self/smaps 에서 prefix 아래 파일 매핑의 Rss/Pss 합계 (kB)"""
+    rss = pss = 0
+    current = False
+    try:
+        with open("/proc/self/smaps") as f:
+            for line in f:
+                first = line.split(maxsplit=6)
+                if "-" in first[0] and len(first) >= 5 and ":" not in first[0]:
+                    current = len(first) == 6 and first[5].strip().startswith(prefix)
+                elif current and line.startswith("Rss:"):
+                    rss += int(first[1])
+                elif current and line.startswith("Pss:"):
+                    pss += int(first[1])
+    except OSError:
+        pass
+    return {"rss": rss, "pss": pss}
+
+
+def process_memory(shared_path: str = None) -> dict:
+    """
+    현재 프로세스 메모리 (MB). Linux 외에는 ru_maxrss 만.
+      rss: 상주 전체, pss: 공유 페이지를 나눠 가진 비례 몫, private: 이 프로세스만의 페이지
+      dataset_rss / dataset_pss: shared_path 아래 memory-map 된 데이터셋 부분
+    """
+    roll = _read_kb_fields("/proc/self/smaps_rollup")
+    if not roll:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"pid": os.getpid(), "peak_rss_mb": peak / 1024}
+
+    def mb(kb):
+        return round(kb / 1024, 1)
+
+    out = {
+        "pid": os.getpid(),
+        "rss_mb": mb(roll.get("Rss", 0)),
+        "pss_mb": mb(roll.get("Pss", 0)),
+        "private_mb": mb(roll.get("Private_Clean", 0) + roll.get("Private_Dirty", 0)),
+        "shared_mb": mb(roll.get("Shared_Clean", 0) + roll.get("Shared_Dirty", 0)),
+    }
+    if shared_path:
+        m = _mapped_kb(os.path.abspath(shared_path))
+        out["dataset_rss_mb"] = mb(m["rss"])
+        out["dataset_pss_mb"] = mb(m["pss"])
+    return out
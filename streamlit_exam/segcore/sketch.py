@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# Mergeable quantile sketch
+# =========================
+DEFAULT_MAX_VALUES = 1 << 16
+
+
+class QuantileSketch:
+    """
+    값 -> 개수 를 누적하는 병합 가능한 분위수 스케치.
+    - distinct 값이 max_values 이하이면 정확 (Purchase 처럼 정수 금액이면 보통 여기에 해당)
+    - 넘으면 인접 값을 가중 평균 centroid 로 합쳐 max_values 개로 압축 (근사)
+    - max_values=None 이면 압축하지 않음 (항상 정확, 메모리는 distinct 값 수만큼)
+    quantile() 은 pandas/numpy 의 linear 보간과 같은 규칙.
+    """
+
+    def __init__(self, max_values: int = DEFAULT_MAX_VALUES):
+        self.max_values = max_values
+        self.values = np.empty(0, dtype=np.float64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.exact = True
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, x) -> "QuantileSketch":
+        x = np.asarray(x, dtype=np.float64)
+        x = x[~np.isnan(x)]
+        v, c = np.unique(x, return_counts=True)
+        return self._merge_arrays(v, c)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        self.exact = self.exact and other.exact
+        return self._merge_arrays(other.values, other.counts)
+
+    def _merge_arrays(self, v, c) -> "QuantileSketch":
+        if len(v) == 0:
+            return self
+        allv = np.concatenate([self.values, v])
+        allc = np.concatenate([self.counts, c])
+        self.values, inv = np.unique(allv, return_inverse=True)
+        self.counts = np.bincount(inv, weights=allc, minlength=len(self.values)).astype(np.int64)
+        if self.max_values is not None and len(self.values) > self.max_values:
+            self._compact()
+        return self
+
+    def _compact(self):
+        cum = np.cumsum(self.counts)
+        b = np.minimum((cum - 1) * self.max_values // cum[-1], self.max_values - 1)
+        w = np.bincount(b, weights=self.counts * self.values)
+        c = np.bincount(b, weights=self.counts).astype(np.int64)
+        keep = c > 0
+        self.values, self.counts = w[keep] / c[keep], c[keep]
+        self.exact = False
+
+    def _value_at(self, rank: np.ndarray) -> np.ndarray:
+        cum = np.cumsum(self.counts)
+        return self.values[np.searchsorted(cum, rank, side="right")]
+
+    def quantile(self, qs):
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        n = self.n
+        if n == 0:
+            return np.full(len(qs), np.nan)
+        h = (n - 1) * qs
+        lo = np.floor(h).astype(np.int64)
+        hi = np.minimum(lo + 1, n - 1)
+        vlo, vhi = self._value_at(lo), self._value_at(hi)
+        # numpy 의 _lerp 와 같은 식 (비트 단위로 pandas quantile 과 일치)
+        t = h - lo
+        diff = vhi - vlo
+        return np.where(t >= 0.5, vhi - diff * (1 - t), vlo + diff * t)
+
+    def median(self) -> float:
+        return float(self.quantile(0.5)[0])
+
+    @classmethod
+    def from_counts(cls, values, counts, max_values: int = DEFAULT_MAX_VALUES) -> "QuantileSketch":
+        """이미 집계된 (값, 개수) 로부터 생성 (shard 별 부분 집계 병합용)"""
+        return cls(max_values)._merge_arrays(np.asarray(values, dtype=np.float64), np.asarray(counts, dtype=np.int64))
+
+    @classmethod
+    def from_series(cls, s: pd.Series, max_values: int = DEFAULT_MAX_VALUES) -> "QuantileSketch":
+        return cls(max_values).update(s.to_numpy(dtype=np.float64, na_value=np.nan))
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+from .paths import resolve_path
+from .store import file_sha1, source_signature
+
+# =========================
+# Data source registry
+# =========================
+# 입력 경로 -> 실제 파일은 한 번만 찾고 (resolve_path 후보 탐색을 rerun 마다 반복하지 않음),
+# 파일 버전(size-mtime)을 지켜보다가 내용이 바뀐 파일에서 파생된 캐시만 비운다 (전체 cache clear 없음).
+#   - check() 는 check_interval_s 안에서는 stat 도 생략
+#   - 버전이 바뀌면 sha1 로 내용 비교 (복사/touch 는 무효화하지 않음, HASH_MAX_BYTES 이하 파일만)
+#   - 무효화 이벤트 (경로, 이전/새 버전, 실행한 콜백별 ms) 는 메모리에 최근 50건 +
+#     SEGCORE_SOURCE_LOG=path 면 JSON 한 줄씩 append
+SOURCE_LOG_ENV = "SEGCORE_SOURCE_LOG"
+CHECK_INTERVAL_S = 1.0
+HASH_MAX_BYTES = 64 << 20  # 이보다 큰 파일은 sha1 생략 (mtime 변경 = 내용 변경)
+
+
+class SourceRegistry:
+    def __init__(self, log_path: str = None, check_interval_s: float = CHECK_INTERVAL_S, base_dir: str = None):
+        self.log_path = os.environ.get(SOURCE_LOG_ENV) if log_path is None else log_path
+        self.check_interval_s = check_interval_s
+        self.base_dir = base_dir
+        self._lock = threading.RLock()
+        self._resolved = {}   # 입력 문자열 -> 절대 경로
+        self._sources = {}    # 절대 경로 -> {"signature", "sha1", "checked", "callbacks"}
+        self._events = deque(maxlen=50)
+
+    def resolve(self, user_path: str) -> str:
+        """resolve_path 결과를 기억 (파일이 사라졌을 때만 다시 탐색). 못 찾으면 FileNotFoundError."""
+        with self._lock:
+            hit = self._resolved.get(user_path)
+        if hit is not None and os.path.exists(hit):
+            return hit
+        real = resolve_path(user_path, self.base_dir)
+        with self._lock:
+            self._resolved[user_path] = real
+        return real
+
+    def watch(self, path: str, name: str = None, on_change=None) -> str:
+        """
+        path 를 감시 대상으로 등록하고 현재 버전을 반환. on_change(event) 는 name 별로 하나
+        (rerun 마다 다시 등록해도 최신 함수로 교체될 뿐 쌓이지 않는다).
+        """
+        with self._lock:
+            src = self._sources.get(path)
+            if src is None:
+                src = self._sources[path] = {"signature": source_signature(path), "sha1": self._sha1(path),
+                                             "checked": time.monotonic(), "callbacks": {}}
+            if on_change is not None:
+                src["callbacks"][name or getattr(on_change, "__name__", "callback")] = on_change
+            return src["signature"]
+
+    def version(self, path: str) -> str:
+        with self._lock:
+            src = self._sources.get(path)
+        return src["signature"] if src is not None else self.watch(path)
+
+    @staticmethod
+    def _sha1(path: str):
+        try:
+            return file_sha1(path) if os.path.getsize(path) <= HASH_MAX_BYTES else None
+        except OSError:
+            return None
+
+    def check(self, path: str, force: bool = False):
+        """
+        바뀌었으면 등록된 콜백을 실행하고 이벤트 dict 반환, 아니면 None.
+        내용은 같고 mtime 만 바뀐 경우는 버전만 갱신 (콜백 없음).
+        """
+        now = time.monotonic()
+        with self._lock:
+            src = self._sources.get(path)
+            if src is None:
+                self.watch(path)
+                return None
+            if not force and now - src["checked"] < self.check_interval_s:
+                return None
+            src["checked"] = now
+            try:
+                new_sig = source_signature(path)
+            except OSError:
+                return None  # 교체 중(삭제 후 재생성) -> 다음 check 에서
+            if new_sig == src["signature"]:
+                return None
+
+            old_sig = src["signature"]
+            old_sha1, new_sha1 = src["sha1"], self._sha1(path)
+            src["signature"], src["sha1"] = new_sig, new_sha1
+            if old_sha1 is not None and old_sha1 == new_sha1:
+                return None
+            callbacks = list(src["callbacks"].items())
+
+        # old_fingerprint: 이전 버전의 dataset_fingerprint (QueryCache/FigureCache.discard 용)
+        event = {"ts": round(time.time(), 3), "path": path, "old": old_sig, "new": new_sig,
+                 "old_fingerprint": f"{os.path.abspath(path)}|{old_sig}", "ms": {}, "errors": []}
+        t_start = time.perf_counter()
+        for name, fn in callbacks:
+            t0 = time.perf_counter()
+            try:
+                fn(event)
+            except Exception as e:
+                event["errors"].append(f"{name}: {type(e).__name__}: {e}")
+            event["ms"][name] = round((time.perf_counter() - t0) * 1e3, 2)
+        event["total_ms"] = round((time.perf_counter() - t_start) * 1e3, 2)
+        self._log(event)
+        return event
+
+    def _log(self, event: dict):
+        with self._lock:
+            self._events.append(event)
+            if self.log_path:
+                try:
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                except OSError:
+                    pass
+
+    def events(self) -> list:
+        with self._lock:
+            return list(self._events)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sources": {p: s["signature"] for p, s in self._sources.items()},
+                "resolved": len(self._resolved),
+                "invalidations": len(self._events),
+            }
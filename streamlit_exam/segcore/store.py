@@ -0,0 +1,125 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow 없으면 캐시 없이 CSV만 사용
+    pa = None
+    feather = None
+
+# =========================
+# Columnar cache (Arrow IPC / Feather v2)
+# =========================
+CACHE_DIRNAME = ".segcache"
+CACHE_VERSION = "1"
+
+CATEGORY_COLS = ["Age", "Gender", "City_Category", "Stay_In_Current_City_Years"]
+INT32_COLS = ["Purchase", "Occupation"]
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Black Friday 스키마 기준으로 컬럼 타입을 좁힌다 (없는 컬럼은 건너뜀)."""
+    for col in CATEGORY_COLS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str).astype("category")
+    for col in INT32_COLS:
+        if col in df.columns and df[col].notna().all():
+            df[col] = df[col].astype(np.int32)
+    return df
+
+
+def read_csv_typed(src) -> pd.DataFrame:
+    """CSV 경로 또는 업로드 파일 객체를 읽고 타입을 적용한다."""
+    dtype = {c: str for c in CATEGORY_COLS}
+    return apply_schema(pd.read_csv(src, dtype=dtype))
+
+
+def file_sha1(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_signature(path: str) -> str:
+    """파생 산출물(cube 등)의 신선도 확인용: size + mtime."""
+    st_ = os.stat(path)
+    return f"{st_.st_size}-{st_.st_mtime_ns}"
+
+
+def cache_path_for(path: str, cache_dir: str = None, suffix: str = ".arrow") -> str:
+    path = os.path.abspath(path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(path), CACHE_DIRNAME)
+    return os.path.join(cache_dir, os.path.basename(path) + suffix)
+
+
+def _read_meta(cache_path: str) -> dict:
+    with pa.memory_map(cache_path, "r") as source:
+        meta = pa.ipc.open_file(source).schema.metadata or {}
+    return {k.decode(): v.decode() for k, v in meta.items()}
+
+
+def _is_fresh(path: str, cache_path: str) -> bool:
+    """
+    캐시 유효성 검사:
+    - size + mtime 이 같으면 그대로 사용
+    - mtime만 바뀌고 내용(sha1)이 같으면 (복사/touch) 역시 사용
+    """
+    if not os.path.exists(cache_path):
+        return False
+    try:
+        meta = _read_meta(cache_path)
+    except (OSError, pa.ArrowInvalid):
+        return False
+    if meta.get("cache_version") != CACHE_VERSION:
+        return False
+
+    st_ = os.stat(path)
+    if meta.get("source_size") != str(st_.st_size):
+        return False
+    if meta.get("source_mtime_ns") == str(st_.st_mtime_ns):
+        return True
+    return meta.get("source_sha1") == file_sha1(path)
+
+
+def _write_cache(df: pd.DataFrame, path: str, cache_path: str) -> None:
+    st_ = os.stat(path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        "cache_version": CACHE_VERSION,
+        "source_size": str(st_.st_size),
+        "source_mtime_ns": str(st_.st_mtime_ns),
+        "source_sha1": file_sha1(path),
+    })
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # 다른 프로세스가 반쯤 쓴 파일을 읽지 않도록 tmp에 쓰고 교체
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, cache_path)
+
+
+def load_table(path: str, cache_dir: str = None, use_cache: bool = True) -> pd.DataFrame:
+    """
+    CSV를 읽되, 옆에 Arrow 캐시(.segcache/<name>.arrow)를 만들어 두고
+    다음부터는 memory-map 으로 읽는다. 원본 mtime/size/sha1 이 바뀌면 다시 만든다.
+    """
+    if not use_cache or feather is None:
+        return read_csv_typed(path)
+
+    cache_path = cache_path_for(path, cache_dir)
+    if _is_fresh(path, cache_path):
+        table = feather.read_table(cache_path, memory_map=True)
+        return table.to_pandas(split_blocks=True)
+
+    df = read_csv_typed(path)
+    try:
+        _write_cache(df, path, cache_path)
+    except OSError:
+        pass  # 읽기 전용 위치 등: 캐시 없이 진행
+    return df
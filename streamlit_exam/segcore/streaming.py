@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from .distinct import bitmaps_from_codes, popcount
+from .prep import assign_segments, occupation_group_map
+from .segments import finish_segment_table, kpis_from_totals
+from .sketch import QuantileSketch
+
+# =========================
+# Out-of-core (chunked) segmentation
+# =========================
+# 메모리에 올리는 것은 chunk 1개 + 세그먼트 단위 누적값뿐이다.
+#   pass 1: Purchase 분위수(스케치), Occupation 별 log_purchase 합/개수, User_ID 사전
+#   pass 2: chunk 마다 세그먼트 부여 -> 세그먼트별 합계/스케치/고객 비트맵 누적
+# Purchase 가 정수 금액이면 스케치가 정확하므로 결과는 preprocess + build_segment_table /
+# calc_kpis 와 같다.
+STREAM_COLUMNS = ["User_ID", "Age", "Gender", "Occupation", "Purchase"]
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+def iter_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    return pd.read_csv(
+        path,
+        chunksize=chunksize,
+        usecols=lambda c: c in STREAM_COLUMNS,
+        dtype={"Age": str, "Gender": str},
+    )
+
+
+def scan_cut_points(path: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    """pass 1 -> (q1, q2, occ_map, users, totals)"""
+    price = QuantileSketch()
+    occ_sum = pd.Series(dtype=np.float64)
+    occ_cnt = pd.Series(dtype=np.int64)
+    users = np.empty(0)
+    has_user = has_occ = False
+    totals = {"transactions": 0, "revenue": 0, "purchase_n": 0}
+
+    for chunk in iter_chunks(path, chunksize):
+        if "Purchase" not in chunk.columns:
+            raise ValueError(f"필수 컬럼 'Purchase'가 없습니다. 현재 컬럼 예시: {list(chunk.columns)[:20]}")
+        purchase = chunk["Purchase"]
+        price.update(purchase.to_numpy(dtype=np.float64, na_value=np.nan))
+        totals["transactions"] += len(chunk)
+        totals["revenue"] += purchase.sum()
+        totals["purchase_n"] += int(purchase.count())
+
+        if "Occupation" in chunk.columns:
+            has_occ = True
+            g = np.log1p(purchase).groupby(chunk["Occupation"])
+            occ_sum = pd.concat([occ_sum, g.sum()]).groupby(level=0).sum()
+            occ_cnt = pd.concat([occ_cnt, g.count()]).groupby(level=0).sum()
+
+        if "User_ID" in chunk.columns:
+            has_user = True
+            users = np.union1d(users, chunk["User_ID"].dropna().unique())
+
+    q1, q2 = price.quantile([0.33, 0.66])
+    occ_map = None
+    if has_occ:
+        occ_mean = (occ_sum / occ_cnt.replace(0, np.nan)).sort_index()
+        occ_map = occupation_group_map(occ_mean)
+    return q1, q2, occ_map, (users if has_user else None), totals
+
+
+def stream_segment_table(path: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    큰 CSV 를 chunk 단위로 두 번 읽어 (segment table, kpis) 를 만든다.
+    반환값은 build_segment_table(preprocess(df)), calc_kpis(preprocess(df)) 와 같은 형태.
+    """
+    q1, q2, occ_map, users, totals = scan_cut_points(path, chunksize)
+
+    sums = []
+    sketches = {}
+    bitmaps = {}
+    for chunk in iter_chunks(path, chunksize):
+        chunk = assign_segments(chunk, q1, q2, occ_map)
+        g = chunk.groupby("Segment_AGOP", observed=True)
+        part = g.agg(
+            transactions=("Purchase", "size"),
+            revenue=("Purchase", "sum"),
+            purchase_n=("Purchase", "count"),
+        )
+        part.index = part.index.astype(str)
+        sums.append(part)
+
+        for label, vals in g["Purchase"]:
+            sketches.setdefault(str(label), QuantileSketch()).update(vals.to_numpy(dtype=np.float64, na_value=np.nan))
+
+        if users is not None:
+            seg_codes = chunk["Segment_AGOP"].cat.codes.to_numpy()
+            user_codes = np.searchsorted(users, chunk["User_ID"].to_numpy())
+            user_codes[chunk["User_ID"].isna().to_numpy()] = -1
+            cats = chunk["Segment_AGOP"].cat.categories
+            bits = bitmaps_from_codes(seg_codes, user_codes, len(cats), len(users))
+            for i, label in enumerate(cats):
+                acc = bitmaps.get(label)
+                bitmaps[label] = bits[i] if acc is None else np.bitwise_or(acc, bits[i])
+
+        # 다음 chunk 전에 참조 해제 (메모리 상한 = chunk 1개)
+        del chunk, g
+
+    seg = pd.concat(sums).groupby(level=0).sum().sort_index()
+    seg.index.name = "Segment_AGOP"
+    if users is not None:
+        seg.insert(0, "customers", [int(popcount(bitmaps[label])) for label in seg.index])
+    else:
+        seg.insert(0, "customers", seg["transactions"])
+    seg["avg_purchase"] = seg["revenue"] / seg["purchase_n"]
+    seg["median_purchase"] = [sketches[label].median() for label in seg.index]
+    seg = finish_segment_table(seg.drop(columns="purchase_n").reset_index())
+
+    transactions = totals["transactions"]
+    customers = len(users) if users is not None else transactions
+    aov = totals["revenue"] / totals["purchase_n"] if totals["purchase_n"] else np.nan
+    kpis = kpis_from_totals(customers, transactions, totals["revenue"], aov)
+    return seg, kpis
@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# Synthetic Black Friday (walmart.csv) data
+# =========================
+# 원본 규모: 550,068 행 / 고객 5,891 명 / 상품 3,631 개
+# scale 배만큼 행/고객/상품 수를 늘린다. 고객 속성(성별/연령/직업/도시/거주기간/결혼)은
+# 고객마다 고정, 구매액은 상품 카테고리 평균 + 노이즈 (정수 금액).
+BASE_ROWS = 550_068
+BASE_USERS = 5_891
+BASE_PRODUCTS = 3_631
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+COLUMNS = [
+    "User_ID", "Product_ID", "Gender", "Age", "Occupation", "City_Category",
+    "Stay_In_Current_City_Years", "Marital_Status", "Product_Category", "Purchase",
+]
+
+AGES = np.array(["0-17", "18-25", "26-35", "36-45", "46-50", "51-55", "55+"])
+AGE_P = [0.03, 0.18, 0.40, 0.20, 0.08, 0.07, 0.04]
+GENDERS = np.array(["F", "M"])
+GENDER_P = [0.25, 0.75]
+CITIES = np.array(["A", "B", "C"])
+CITY_P = [0.27, 0.42, 0.31]
+STAYS = np.array(["0", "1", "2", "3", "4+"])
+STAY_P = [0.14, 0.35, 0.19, 0.17, 0.15]
+N_OCCUPATIONS = 21
+N_CATEGORIES = 20
+
+
+def _choice(rng, values, p, size):
+    return np.asarray(values)[rng.choice(len(values), size=size, p=p)]
+
+
+def _users(rng, n_users: int) -> pd.DataFrame:
+    """고객별 고정 속성"""
+    return pd.DataFrame({
+        "User_ID": 1_000_001 + np.arange(n_users, dtype=np.int64),
+        "Gender": _choice(rng, GENDERS, GENDER_P, n_users),
+        "Age": _choice(rng, AGES, AGE_P, n_users),
+        "Occupation": rng.integers(0, N_OCCUPATIONS, n_users),
+        "City_Category": _choice(rng, CITIES, CITY_P, n_users),
+        "Stay_In_Current_City_Years": _choice(rng, STAYS, STAY_P, n_users),
+        "Marital_Status": rng.integers(0, 2, n_users),
+        # 고객별 구매 빈도 (롱테일)
+        "weight": rng.pareto(1.5, n_users) + 1.0,
+    })
+
+
+def _products(rng, n_products: int) -> pd.DataFrame:
+    width = max(6, len(str(n_products)))
+    ids = pd.Series(np.arange(n_products)).astype(str).str.zfill(width)
+    return pd.DataFrame({
+        "Product_ID": ("P" + ids).to_numpy(),
+        "Product_Category": rng.integers(1, N_CATEGORIES + 1, n_products),
+        "weight": rng.pareto(1.2, n_products) + 1.0,
+    })
+
+
+def iter_synthetic_chunks(scale: float = 1.0, seed: int = 0, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """scale 배 크기의 합성 데이터를 chunk_rows 행씩 생성 (같은 seed -> 같은 데이터)"""
+    rng = np.random.default_rng(seed)
+    n_rows = int(round(BASE_ROWS * scale))
+    users = _users(rng, max(1, int(round(BASE_USERS * scale))))
+    products = _products(rng, max(1, int(round(BASE_PRODUCTS * scale))))
+
+    user_p = (users["weight"] / users["weight"].sum()).to_numpy()
+    prod_p = (products["weight"] / products["weight"].sum()).to_numpy()
+    # 카테고리별 평균 구매액 / 직업별 배율
+    cat_mean = rng.uniform(1_500, 19_000, N_CATEGORIES + 1)
+    occ_lift = rng.uniform(0.9, 1.1, N_OCCUPATIONS)
+
+    user_cols = users.drop(columns="weight")
+    prod_cols = products.drop(columns="weight")
+    for start in range(0, n_rows, chunk_rows):
+        size = min(chunk_rows, n_rows - start)
+        u = rng.choice(len(users), size=size, p=user_p)
+        p = rng.choice(len(products), size=size, p=prod_p)
+        chunk = user_cols.take(u).reset_index(drop=True)
+        prod = prod_cols.take(p).reset_index(drop=True)
+        chunk.insert(1, "Product_ID", prod["Product_ID"])
+        chunk["Product_Category"] = prod["Product_Category"]
+
+        mean = cat_mean[chunk["Product_Category"].to_numpy()] * occ_lift[chunk["Occupation"].to_numpy()]
+        purchase = mean * rng.lognormal(0.0, 0.35, size)
+        chunk["Purchase"] = np.clip(np.rint(purchase), 12, 23_961).astype(np.int64)
+        yield chunk[COLUMNS]
+
+
+def make_synthetic_frame(scale: float = 1.0, seed: int = 0) -> pd.DataFrame:
+    return pd.concat(list(iter_synthetic_chunks(scale, seed)), ignore_index=True)
+
+
+def write_synthetic_csv(path: str, scale: float = 1.0, seed: int = 0,
+                        chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    """chunk 단위로 CSV 에 append (100x 도 chunk 1개 만큼의 메모리로 생성) -> 행 수"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    n = 0
+    with open(tmp, "w", newline="") as f:
+        for i, chunk in enumerate(iter_synthetic_chunks(scale, seed, chunk_rows)):
+            chunk.to_csv(f, header=(i == 0), index=False)
+            n += len(chunk)
+    os.replace(tmp, path)
+    return n
+
+
+# =========================
+# Synthetic KPI events (app3.py inbox)
+# =========================
+CAMPAIGNS = ["Brand Film", "Short Form", "Teaser", "Launch", "Performance"]
+
+
+def make_synthetic_events(days: int = 365, campaigns=None, end=None, seed: int = 7) -> pd.DataFrame:
+    """캠페인 x 일 단위 이벤트 (ts, campaign, views, likes) - make_daily_kpi 와 비슷한 추세 + 노이즈"""
+    rng = np.random.default_rng(seed)
+    campaigns = CAMPAIGNS if campaigns is None else list(campaigns)
+    dates = pd.date_range(end=end or pd.Timestamp.today().normalize(), periods=days, freq="D")
+    frames = []
+    for i, name in enumerate(campaigns):
+        base = np.linspace(120_000, 420_000, days) / len(campaigns) * rng.uniform(0.5, 1.5)
+        views = np.maximum(1_000, (base + rng.normal(0, 22_000 / len(campaigns), days)).astype(np.int64))
+        likes = np.maximum(0, (views * rng.uniform(0.012, 0.028, days)).astype(np.int64))
+        frames.append(pd.DataFrame({"ts": dates.date, "campaign": name, "views": views, "likes": likes}))
+    return pd.concat(frames, ignore_index=True).sort_values(["ts", "campaign"], kind="stable", ignore_index=True)
+
+
+def write_synthetic_events(path: str, days: int = 365, campaigns=None, end=None, seed: int = 7) -> int:
+    """app3.py inbox 용 이벤트 CSV -> 행 수"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    df = make_synthetic_events(days, campaigns, end, seed)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return len(df)
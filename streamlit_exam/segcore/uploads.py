@@ -0,0 +1,96 @@
+import os
+import hashlib
+import tempfile
+import threading
+
+from .warmup import Warmup
+
+# =========================
+# Upload spool (content-addressed)
+# =========================
+# 업로드 파일을 rerun 마다 메모리에서 해싱/파싱하지 않고, chunk 단위로 디스크에 쓰면서 sha1 을 계산해
+# <upload_dir>/<sha1>.csv 로 둔다. 이후로는 디스크 소스와 똑같이 취급 (Arrow 캐시 / manifest / 전처리 memory-map / cube).
+#   - 같은 내용은 누가 올려도 같은 파일 -> 변환은 한 번, 다음부터는 캐시를 바로 연다
+#   - 변환(stages)은 daemon 스레드에서 단계별로 실행, 세션은 status() 로 진행률만 본다
+#   SEGCORE_UPLOAD_DIR: 저장 위치 (기본 <tmp>/segcore-uploads)
+UPLOAD_DIR_ENV = "SEGCORE_UPLOAD_DIR"
+CHUNK_BYTES = 1 << 20
+
+
+def default_upload_dir() -> str:
+    return os.environ.get(UPLOAD_DIR_ENV) or os.path.join(tempfile.gettempdir(), "segcore-uploads")
+
+
+def spool_upload(fileobj, dest_dir: str, chunk_bytes: int = CHUNK_BYTES):
+    """
+    파일 객체 -> (sha1, <dest_dir>/<sha1>.csv). 쓰면서 해싱 (전체를 한 번에 bytes 로 만들지 않음).
+    같은 내용이 이미 있으면 새로 쓴 파일은 버리고 기존 파일 사용 (mtime 유지 -> 서버 재시작 후에도 파생 캐시 유효).
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    h = hashlib.sha1()
+    tmp = os.path.join(dest_dir, f".spool-{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as out:
+            for block in iter(lambda: fileobj.read(chunk_bytes), b""):
+                h.update(block)
+                out.write(block)
+        digest = h.hexdigest()
+        path = os.path.join(dest_dir, digest + ".csv")
+        if not os.path.exists(path):
+            os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return digest, path
+
+
+class UploadStore:
+    """
+    업로드 sha1 -> 디스크 원본 + 변환 작업 (프로세스 내 모든 세션 공유).
+    stages(path) -> [(label, fn)]: 백그라운드에서 실행할 변환 단계 (Streamlit 호출 없이 디스크 캐시만 채울 것).
+    """
+
+    def __init__(self, stages=None, upload_dir: str = None, chunk_bytes: int = CHUNK_BYTES):
+        self.stages = stages
+        self.upload_dir = upload_dir or default_upload_dir()
+        self.chunk_bytes = chunk_bytes
+        self._lock = threading.Lock()
+        self._by_id = {}  # 업로더 file_id -> sha1 (같은 업로드의 rerun 은 다시 해싱하지 않음)
+        self._jobs = {}   # sha1 -> Warmup (변환 작업)
+        self.hits = 0     # 이미 변환 작업이 있던 내용 (다른 세션/분석가가 올린 같은 파일)
+        self.misses = 0
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.upload_dir, digest + ".csv")
+
+    def ingest(self, fileobj):
+        """-> (sha1, 디스크 경로, 변환 작업). 작업은 이미 시작된 상태 (같은 내용이면 기존 작업 그대로)."""
+        file_id = getattr(fileobj, "file_id", None)
+        with self._lock:
+            digest = self._by_id.get(file_id) if file_id is not None else None
+            if digest is not None:
+                return digest, self.path(digest), self._jobs[digest]
+
+        digest, path = spool_upload(fileobj, self.upload_dir, self.chunk_bytes)
+        with self._lock:
+            if file_id is not None:
+                self._by_id[file_id] = digest
+            job = self._jobs.get(digest)
+            if job is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                stages = self.stages
+                job = self._jobs[digest] = Warmup(
+                    lambda: stages(path) if stages is not None else [],
+                    name=f"segcore-upload-{digest[:8]}", pause_s=0, nice=0,
+                )
+        return digest, path, job.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            states = [j.status()["state"] for j in self._jobs.values()]
+        return {"uploads": len(states), "converting": sum(s != "done" for s in states),
+                "hits": self.hits, "misses": self.misses, "dir": self.upload_dir}
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import threading
+from collections import Counter
+
+from .memo import FILTER_KEY_DIMS
+from .store import cache_path_for
+
+# =========================
+# Background warm-up
+# =========================
+# 서버 프로세스가 처음 뜨면 기본 화면(필터 All) + 접근 로그에서 가장 많이 요청된 필터 조합 N 개를
+# daemon 스레드에서 미리 계산해 QueryCache / FigureCache 를 채운다. 세션 처리 스레드는 기다리지 않는다.
+#   SEGCORE_WARMUP=N : 기본 화면 외에 미리 계산할 인기 조합 수 (기본 5, "0"/"off" 면 warm-up 끔)
+# 접근 로그 = data/.segcache/<csv>.<app>.access.jsonl (세션이 필터를 바꿀 때마다 한 줄 append, 재시작 후에도 유지)
+WARMUP_ENV = "SEGCORE_WARMUP"
+DEFAULT_TOP_N = 5
+TAIL_BYTES = 1 << 20  # 인기 조합 집계는 로그 끝 1MB (최근 ~1만 건) 만
+
+
+def warmup_top_n():
+    """-> 인기 조합 수 (0 이상), warm-up 을 끈 경우 None"""
+    raw = os.environ.get(WARMUP_ENV, "").strip().lower()
+    if raw in ("0", "false", "no", "off"):
+        return None
+    try:
+        return max(0, int(raw)) if raw else DEFAULT_TOP_N
+    except ValueError:
+        return DEFAULT_TOP_N
+
+
+def access_log_path(source_path: str, tag: str, cache_dir: str = None) -> str:
+    return cache_path_for(source_path, cache_dir, suffix=f".{tag}.access.jsonl")
+
+
+def _as_key(v):
+    return tuple(_as_key(x) for x in v) if isinstance(v, list) else v
+
+
+class AccessLog:
+    """filter_key 튜플 요청 기록 (JSON 한 줄씩 append). 여러 프로세스가 같은 파일에 append 해도 됨."""
+
+    def __init__(self, path: str, tail_bytes: int = TAIL_BYTES):
+        self.path = path
+        self.tail_bytes = tail_bytes
+        self._lock = threading.Lock()
+
+    def record(self, key: tuple):
+        line = json.dumps({"ts": round(time.time(), 3), "filters": list(key)}, ensure_ascii=False)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError:
+                pass  # 읽기 전용 위치: 기록 생략 (warm-up 은 기본 화면만)
+
+    def counts(self) -> Counter:
+        try:
+            with open(self.path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - self.tail_bytes))
+                lines = f.read().splitlines()
+        except OSError:
+            return Counter()
+        if size > self.tail_bytes:
+            lines = lines[1:]  # 잘린 첫 줄
+        out = Counter()
+        for line in lines:
+            try:
+                out[_as_key(json.loads(line)["filters"])] += 1
+            except (ValueError, KeyError, TypeError):
+                continue  # 쓰는 중이던 줄 / 깨진 줄
+        return out
+
+    def popular(self, n: int, exclude=()) -> list:
+        """가장 많이 요청된 필터 조합 n 개 (exclude 제외, 많은 순)"""
+        exclude = set(exclude)
+        return [k for k, _ in self.counts().most_common() if k not in exclude][:n]
+
+
+def restore_filters(key: tuple, options: dict, dims=None):
+    """
+    filter_key 튜플 -> 위젯 값 dict (options 의 원래 타입으로, None -> "All").
+    options 에 없는 차원은 None 이어야 하고, 현재 데이터에 없는 값이 있으면 None 반환 (warm-up 생략).
+    """
+    dims = FILTER_KEY_DIMS if dims is None else dims
+    if len(key) != len(dims):
+        return None
+    out = {}
+    for dim, v in zip(dims, key):
+        if dim not in options:
+            if v is not None:
+                return None
+            continue
+        if v is None:
+            out[dim] = "All"
+            continue
+        match = [o for o in options[dim] if str(o) == v]
+        if not match:
+            return None
+        out[dim] = match[0]
+    return out
+
+
+def describe_key(key: tuple, dims=None) -> str:
+    dims = FILTER_KEY_DIMS if dims is None else dims
+    parts = [f"{d}={v}" for d, v in zip(dims, key) if v is not None]
+    return ", ".join(parts) if parts else "default"
+
+
+def warmup_plan(log: AccessLog, options: dict, n: int, dims=None) -> list:
+    """[기본 화면, 인기 조합 ...] -> [(label, filters dict)] (현재 데이터로 복원 안 되는 조합은 건너뜀)"""
+    dims = FILTER_KEY_DIMS if dims is None else dims
+    default = (None,) * len(dims)
+    plan = [("default", restore_filters(default, options, dims))]
+    if log is not None and n:
+        for key in log.popular(n * 2, exclude=[default]):  # 복원 실패분 여유
+            filters = restore_filters(key, options, dims)
+            if filters is not None:
+                plan.append((describe_key(key, dims), filters))
+            if len(plan) > n:
+                break
+    return plan
+
+
+class Warmup:
+    """
+    plan() -> [(label, fn)] 를 daemon 스레드에서 순서대로 실행. 작업 하나가 실패해도 나머지는 계속.
+    세션 처리 스레드에 양보하도록 스레드 OS 우선순위를 낮추고 (Linux nice, 스레드 단위) 작업 사이에 쉰다.
+    """
+
+    def __init__(self, plan, name: str = "segcore-warmup", pause_s: float = 0.05, nice: int = 10):
+        self.plan = plan
+        self.name = name
+        self.pause_s = pause_s
+        self.nice = nice
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {"state": "pending", "done": 0, "total": 0, "current": None,
+                        "errors": [], "timings_ms": {}, "elapsed_s": 0.0}
+
+    def start(self) -> "Warmup":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self._status["state"] == "done"
+
+    def _lower_priority(self):
+        if not self.nice or not hasattr(os, "setpriority"):
+            return
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+        except (OSError, AttributeError):
+            pass
+
+    def _run(self):
+        self._lower_priority()
+        t_start = time.perf_counter()
+        with self._lock:
+            self._status["state"] = "running"
+        try:
+            tasks = list(self.plan())
+        except Exception as e:
+            tasks = []
+            with self._lock:
+                self._status["errors"].append(f"plan: {type(e).__name__}: {e}")
+        with self._lock:
+            self._status["total"] = len(tasks)
+
+        for label, fn in tasks:
+            with self._lock:
+                self._status["current"] = label
+            t0 = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                with self._lock:
+                    self._status["errors"].append(f"{label}: {type(e).__name__}: {e}")
+            with self._lock:
+                self._status["done"] += 1
+                self._status["timings_ms"][label] = round((time.perf_counter() - t0) * 1e3, 1)
+            time.sleep(self.pause_s)
+
+        with self._lock:
+            self._status.update(state="done", current=None, elapsed_s=round(time.perf_counter() - t_start, 2))
+
+    def status(self) -> dict:
+        with self._lock:
+            s = dict(self._status, errors=list(self._status["errors"]), timings_ms=dict(self._status["timings_ms"]))
+        return s
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# segcore 는 streamlit_exam/ 아래 패키지 (앱과 같은 방식으로 import)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
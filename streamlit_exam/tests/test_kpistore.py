@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from segcore.kpistore import ALL, KpiStore
+
+
+def _events(days, views, campaign="c1"):
+    days = np.asarray(days, dtype=np.int64)
+    return pd.DataFrame({
+        "day": days,
+        "campaign": campaign,
+        "views": np.asarray(views, dtype=np.int64),
+        "likes": np.zeros(len(days), np.int64),
+    })
+
+
+def _expected_ma7(batches) -> pd.Series:
+    """전체 이벤트 -> 빈 날을 0 으로 채운 일별 views 의 rolling(7, min_periods=1)"""
+    ev = pd.concat(batches)
+    daily = ev.groupby("day")["views"].sum()
+    daily = daily.reindex(range(daily.index.min(), daily.index.max() + 1), fill_value=0)
+    return daily.rolling(7, min_periods=1).mean().round(0).astype(np.int64).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("batches", [
+    # 뒤로 빈 날을 두고 추가
+    [_events([100, 101, 102], [10, 20, 30]), _events([110], [5])],
+    # 앞으로 빈 날을 두고 추가
+    [_events([110, 111], [40, 50]), _events([100, 101, 102], [10, 20, 30])],
+    # 기존 구간과 겹치는 batch
+    [_events(range(100, 120), np.arange(20) * 3 + 1), _events([105, 106, 118, 119, 121], [7, 9, 11, 13, 15])],
+    # 앞/뒤 동시 확장
+    [_events([105, 106], [8, 8]), _events([95, 116], [100, 200])],
+])
+def test_views_ma7_matches_full_rolling(tmp_path, batches):
+    store = KpiStore(str(tmp_path / "store"))
+    for batch in batches:
+        store.append(batch)
+    for campaign in ("c1", ALL):
+        got = store.frame("D", campaign)["views_ma7"].reset_index(drop=True)
+        pd.testing.assert_series_equal(got, _expected_ma7(batches), check_names=False)
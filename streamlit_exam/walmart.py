@@ -1,9 +1,23 @@
-import os
-import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 
+from segcore.store import load_table
+from segcore.paths import resolve_path
+from segcore.report import fmt_k
+from segcore.prep import preprocess
+from segcore.manifest import cut_points, distinct_values, missing_columns, open_manifest
+from segcore.cube import CubeView, load_or_build_cube
+from segcore.memo import QueryCache, dataset_fingerprint, filter_key
+from segcore.figures import FigureCache
+from segcore.exports import EXPORT_FORMATS, ExportCache
+from segcore.scoring import DEFAULT_WEIGHTS, FORMULAS, ScoreMatrix, top_n_indices
+from segcore.panels import PanelProfile, fragments_enabled
+from segcore.sources import SourceRegistry
+from segcore.uploads import UploadStore, spool_upload
+from segcore.warmup import AccessLog, Warmup, access_log_path, warmup_plan, warmup_top_n
+from segcore.shared import open_shared_dataset, process_memory, shared_enabled, shared_path_for
+
 # =========================
 # Page config
 # =========================
@@ -49,232 +63,83 @@ st.markdown(
 unsafe_allow_html=True
 )
 
-# =========================
-# Path handling (robust)
-# =========================
-def safe_path(p: str) -> str:
-    return os.path.normpath(str(p).strip().strip('"').strip("'"))
-
-def resolve_path(user_path: str) -> str:
-    """
-    Robust path resolver:
-    - Accepts absolute path
-    - Resolves relative to script dir (walmart.py)
-    - Resolves relative to CWD
-    - Auto-fixes duplicated folder like streamlit_exam\\streamlit_exam\\...
-    - If input begins with streamlit_exam\\..., tries stripping that prefix
-    - Tries common fallbacks (data/walmart.csv, streamlit_exam/data/walmart.csv)
-    """
-    p = safe_path(user_path)
-
-    # 1) absolute path
-    if os.path.isabs(p) and os.path.exists(p):
-        return p
-
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # walmart.py 위치
-    CWD = os.getcwd()
-
-    candidates = []
-
-    # 2) as-is relative to BASE_DIR / CWD
-    candidates.append(os.path.join(BASE_DIR, p))
-    candidates.append(os.path.join(CWD, p))
-
-    # 3) auto-fix duplicated folder names in the combined paths
-    def dedupe_double_folder(path_str: str, folder_name: str) -> str:
-        token = f"{os.sep}{folder_name}{os.sep}{folder_name}{os.sep}"
-        repl  = f"{os.sep}{folder_name}{os.sep}"
-        return path_str.replace(token, repl)
-
-    for base in [BASE_DIR, CWD]:
-        candidates.append(dedupe_double_folder(os.path.join(base, p), "streamlit_exam"))
-
-    # 4) If user provided streamlit_exam\... but BASE_DIR already points inside that folder,
-    #    try stripping the first "streamlit_exam\" from the input
-    parts = p.split(os.sep)
-    if len(parts) >= 2 and parts[0].lower() == "streamlit_exam":
-        stripped = os.sep.join(parts[1:])
-        candidates.append(os.path.join(BASE_DIR, stripped))
-        candidates.append(os.path.join(CWD, stripped))
-
-    # 5) Common fallbacks (file-only)
-    file_only = os.path.basename(p)
-    candidates.extend([
-        os.path.join(BASE_DIR, "data", file_only),
-        os.path.join(BASE_DIR, "streamlit_exam", "data", file_only),
-        os.path.join(CWD, "data", file_only),
-        os.path.join(CWD, "streamlit_exam", "data", file_only),
-    ])
-
-    # normalize + unique
-    uniq, seen = [], set()
-    for c in candidates:
-        c = os.path.normpath(c)
-        if c not in seen:
-            uniq.append(c)
-            seen.add(c)
-
-    for c in uniq:
-        if os.path.exists(c):
-            return c
-
-    # detailed error
-    preview = "\n".join([f"- {c}" for c in uniq[:10]])
-    raise FileNotFoundError(
-        "경로에 파일이 없습니다.\n"
-        f"입력값: {user_path}\n\n"
-        "확인한 후보 경로(상위 10개):\n"
-        f"{preview}\n\n"
-        "가장 확실한 해결:\n"
-        "1) 좌측 업로드로 CSV 넣기\n"
-        "2) 절대경로 입력 (예: C:\\Users\\...\\walmart.csv)\n"
-        "3) 또는 Data path에 'data\\walmart.csv' 입력"
-    )
-
-@st.cache_data
 def load_csv_any(path_or_uploaded):
-    if hasattr(path_or_uploaded, "read"):  # uploaded file object
-        return pd.read_csv(path_or_uploaded)
+    if hasattr(path_or_uploaded, "read"):  # uploaded file object -> sha1 이름으로 디스크에 spool 후 경로처럼
+        _, real_path = spool_upload(path_or_uploaded, load_upload_store().upload_dir)
+        return load_table(real_path)
     real_path = resolve_path(path_or_uploaded)
-    return pd.read_csv(real_path)
-
-# =========================
-# Analytics helpers
-# =========================
-def fmt_k(x):
-    if x is None or (isinstance(x, float) and np.isnan(x)):
-        return "-"
-    x = float(x)
-    ax = abs(x)
-    if ax >= 1e9:  return f"{x/1e9:.2f}B"
-    if ax >= 1e6:  return f"{x/1e6:.2f}M"
-    if ax >= 1e3:  return f"{x/1e3:.2f}K"
-    return f"{x:.0f}"
-
-def age_to_grp(age_str: str) -> str:
-    s = str(age_str)
-    if s == "0-17": return "0–17"
-    if s == "18-25": return "18–25"
-    if s == "26-35": return "26–35"
-    if s == "36-45": return "36–45"
-    if s in ["46-50", "51-55", "55+"]: return "46+"
-    return "Unknown"
-
-def age_mid(age_str: str) -> float:
-    s = str(age_str)
-    mapping = {
-        "0-17": 8.5, "18-25": 21.5, "26-35": 30.5, "36-45": 40.5,
-        "46-50": 48.0, "51-55": 53.0, "55+": 58.0
-    }
-    return mapping.get(s, np.nan)
-
-def minmax(s):
-    return (s - s.min()) / (s.max() - s.min() + 1e-9)
-
-def preprocess(df: pd.DataFrame) -> pd.DataFrame:
-    if "Purchase" not in df.columns:
-        raise ValueError(f"필수 컬럼 'Purchase'가 없습니다. 현재 컬럼 예시: {list(df.columns)[:20]}")
-
-    df = df.copy()
-    df["log_purchase"] = np.log1p(df["Purchase"])
-
-    if "Age" in df.columns:
-        df["Age_grp"] = df["Age"].apply(age_to_grp)
-        df["Age_mid"] = df["Age"].apply(age_mid)
-    else:
-        df["Age_grp"] = "Unknown"
-        df["Age_mid"] = np.nan
-
-    if "Gender" not in df.columns:
-        df["Gender"] = "Unknown"
-
-    # Price segment from Purchase quantiles
-    q1, q2 = df["Purchase"].quantile([0.33, 0.66]).values
-    df["Price_Segment"] = pd.cut(
-        df["Purchase"],
-        bins=[-np.inf, q1, q2, np.inf],
-        labels=["Price_Low", "Price_Mid", "Price_High"]
-    ).astype(str)
-
-    # Occupation group from Occupation mean(log_purchase)
-    if "Occupation" in df.columns:
-        occ_mean = df.groupby("Occupation")["log_purchase"].mean()
-        o1, o2 = occ_mean.quantile([0.33, 0.66]).values
-
-        def occ_group(occ):
-            m = occ_mean.get(occ, np.nan)
-            if np.isnan(m):
-                return "Occ_Other"
-            if m <= o1:
-                return "Occ_Low"
-            elif m <= o2:
-                return "Occ_Mid"
-            else:
-                return "Occ_High"
-
-        df["Occupation_grp"] = df["Occupation"].apply(occ_group)
-    else:
-        df["Occupation_grp"] = "Occ_Other"
-
-    # Strategy bucket rule
-    def bucketize_from_parts(occ_grp: str, price_seg: str) -> str:
-        if (occ_grp == "Occ_High") and (price_seg == "Price_High"):
-            return "Defend"
-        if (occ_grp == "Occ_Mid") and (price_seg == "Price_Mid"):
-            return "Grow"
-        if (occ_grp in ["Occ_Mid", "Occ_High"]) and (price_seg == "Price_Low"):
-            return "Expand"
-        return "Other"
-
-    df["bucket"] = [bucketize_from_parts(o, p) for o, p in zip(df["Occupation_grp"], df["Price_Segment"])]
-
-    df["Segment_AGOP"] = df[["Age_grp", "Gender", "Occupation_grp", "Price_Segment"]].astype(str).agg(" | ".join, axis=1)
-    return df
-
-@st.cache_data
-def build_segment_table(df: pd.DataFrame) -> pd.DataFrame:
-    customers = ("User_ID", "nunique") if "User_ID" in df.columns else ("Segment_AGOP", "size")
-
-    seg = (
-        df.groupby("Segment_AGOP")
-          .agg(
-              customers=customers,
-              transactions=("Segment_AGOP", "size"),
-              revenue=("Purchase", "sum"),
-              avg_purchase=("Purchase", "mean"),
-              median_purchase=("Purchase", "median"),
-          )
-          .reset_index()
-    )
-    seg["revenue_share"] = seg["revenue"] / seg["revenue"].sum()
-
-    def bucketize(seg_str: str):
-        if ("Occ_High" in seg_str) and ("Price_High" in seg_str):
-            return "Defend"
-        if ("Occ_Mid" in seg_str) and ("Price_Mid" in seg_str):
-            return "Grow"
-        if (("Occ_Mid" in seg_str) or ("Occ_High" in seg_str)) and ("Price_Low" in seg_str):
-            return "Expand"
-        return "Other"
-
-    seg["bucket"] = seg["Segment_AGOP"].apply(bucketize)
-
-    seg["rev_n"]  = minmax(seg["revenue"])
-    seg["cust_n"] = minmax(seg["customers"])
-    seg["tx_n"]   = minmax(seg["transactions"])
-    seg["aov_n"]  = minmax(seg["avg_purchase"])
-
-    seg["target_score"] = 0.45*seg["rev_n"] + 0.25*seg["cust_n"] + 0.20*seg["tx_n"] + 0.10*seg["aov_n"]
-    return seg
-
-def calc_kpis(df: pd.DataFrame):
-    customers = df["User_ID"].nunique() if "User_ID" in df.columns else len(df)
-    transactions = len(df)
-    revenue = df["Purchase"].sum()
-    aov = df["Purchase"].mean()
-    avg_purchases = (transactions / customers) if customers else np.nan
-    clv_proxy = (revenue / customers) if customers else np.nan
-    return customers, revenue, aov, avg_purchases, clv_proxy
+    # data/.segcache/*.arrow 캐시 사용 (원본 변경 시 자동 재생성)
+    return load_table(real_path)
+
+@st.cache_resource(show_spinner=False)
+def load_manifest(source):
+    """dtype/행 수/distinct 값/cut point sidecar (data/.segcache/<csv>.manifest.json, 데이터 버전당 한 번 생성)"""
+    return open_manifest(source, lambda: load_csv_any(source))
+
+def build_segments(source, manifest):
+    # cut point 는 manifest 에서 (분위수/groupby 재계산 없음)
+    return preprocess(load_table(source), cuts=cut_points(manifest))
+
+@st.cache_resource(show_spinner=False)
+def load_segment_data(source):
+    """raw 로드 + preprocess + 세그먼트 큐브 + dataset fingerprint (소스당 한 번, 세션 간 공유)"""
+    # 전처리 결과를 data/.segcache/*.segments/ 에 컬럼별 memory-map -> 모든 프로세스/세션이 같은 페이지 공유
+    df = open_shared_dataset(source, lambda: build_segments(source, load_manifest(source)), tag="segments")
+    cube = load_or_build_cube(df, source)  # data/.segcache/*.cube/ 에 저장
+    return df, cube, dataset_fingerprint(source)
+
+def upload_stages(source):
+    """업로드 변환 단계 (백그라운드 스레드: st 캐시 함수 없이 디스크 캐시만 만든다)"""
+    def segments():
+        df = open_shared_dataset(source, lambda: build_segments(source, open_manifest(source)), tag="segments")
+        load_or_build_cube(df, source)
+    return [
+        ("columnar cache", lambda: load_table(source)),
+        ("manifest", lambda: open_manifest(source)),
+        ("segments + cube", segments),
+    ]
+
+@st.cache_resource
+def load_upload_store():
+    """업로드 sha1 -> <tmp>/segcore-uploads/<sha1>.csv + 변환 작업 (같은 파일은 누가 올려도 한 번만 변환)"""
+    return UploadStore(stages=upload_stages)
+
+@st.cache_resource
+def load_query_cache():
+    """(dataset fingerprint, 질의, 필터 튜플) -> 결과 LRU (프로세스 내 모든 세션 공유)"""
+    return QueryCache(maxsize=512)
+
+@st.cache_resource
+def load_figure_cache():
+    """(차트, fingerprint, 필터 튜플) -> 직렬화된 plotly figure (프로세스 내 모든 세션 공유)"""
+    return FigureCache(maxsize=256)
+
+@st.cache_resource
+def load_export_cache():
+    """content key -> export 파일 (다운로드 클릭 시에만 생성, 프로세스/세션 공유)"""
+    return ExportCache()
+
+@st.cache_resource
+def load_access_log(source):
+    """세션별 필터 조합 요청 기록 -> 다음 서버 시작 시 warm-up 대상 (data/.segcache/<csv>.walmart.access.jsonl)"""
+    return AccessLog(access_log_path(source, "walmart"))
+
+@st.cache_resource
+def load_source_registry():
+    """입력 경로 -> 파일 (한 번만 탐색) + 파일 버전 감시 (프로세스 내 모든 세션 공유)"""
+    return SourceRegistry()
+
+def watch_source(sources, source):
+    """원본 내용이 바뀌면 그 파일에서 파생된 캐시만 비운다 (다른 데이터셋 / 전체 cache 는 그대로)"""
+    sources.watch(source, "segment_data", lambda ev: load_segment_data.clear(ev["path"]))
+    sources.watch(source, "manifest", lambda ev: load_manifest.clear(ev["path"]))
+    sources.watch(source, "query_cache", lambda ev: load_query_cache().discard(ev["old_fingerprint"]))
+    sources.watch(source, "figure_cache", lambda ev: load_figure_cache().discard(ev["old_fingerprint"]))
+
+@st.cache_resource
+def load_panel_profile():
+    """패널별 실행 횟수/시간 (프로세스 내 모든 세션 공유)"""
+    return PanelProfile()
 
 # =========================
 # Sidebar
@@ -287,112 +152,136 @@ default_path = r"data\walmart.csv"
 path = st.sidebar.text_input("Data path", value=default_path)
 up = st.sidebar.file_uploader("or Upload CSV", type=["csv"])
 
+sources = load_source_registry()
+uploads = load_upload_store()
+manifest = source = None
 try:
-    raw = load_csv_any(up) if up is not None else load_csv_any(path)
+    if up is None:
+        source = sources.resolve(path)  # 후보 경로 탐색은 입력값당 한 번
+        watch_source(sources, source)
+        sources.check(source)  # 파일이 바뀌었으면 여기서 파생 캐시 무효화 (stat 은 1초에 한 번)
+    else:
+        # 업로드는 sha1 이름으로 디스크에 spool -> 이후 디스크 소스와 같은 경로 (처음 보는 내용만 백그라운드 변환)
+        digest, source, job = uploads.ingest(up)
+        if not job.wait(0):
+            bar = st.sidebar.progress(0.0, text="Converting upload…")
+            while not job.wait(0.2):
+                js = job.status()
+                bar.progress(js["done"] / max(js["total"], 1), text=f"Converting upload: {js['current'] or '…'}")
+            bar.empty()
+    # 스키마 확인은 manifest 만으로 (필수 컬럼이 없으면 전체 로드 전에 중단)
+    manifest = load_manifest(source)
+    missing = missing_columns(manifest, ["Purchase"])
+    if missing:
+        raise ValueError(f"필수 컬럼 '{', '.join(missing)}'가 없습니다. 현재 컬럼 예시: {list(manifest['columns'])[:20]}")
+    df, cube, fingerprint = load_segment_data(source)
     # show resolved absolute path for transparency
     if up is None:
-        st.sidebar.success(f"Loaded file:\n{resolve_path(path)}")
+        st.sidebar.success(f"Loaded file:\n{source}")
     else:
-        st.sidebar.success("Loaded file: (uploaded)")
-    df = preprocess(raw)
+        st.sidebar.success(f"Loaded file: {up.name} (uploaded, sha1 {digest[:12]})")
 except Exception as e:
     st.error(str(e))
     st.stop()
 
-st.sidebar.markdown("---")
-bucket = st.sidebar.selectbox("Strategy Bucket", ["All", "Defend", "Grow", "Expand", "Other"], index=0)
-rank_by = st.sidebar.selectbox(
-    "Ranking Metric",
-    ["target_score", "revenue", "revenue_share", "customers", "transactions", "avg_purchase"],
-    index=0
-)
-min_tx = st.sidebar.slider("MIN_TX (min transactions per segment)", 200, 3000, 500, 50)
-top_n = st.sidebar.selectbox("Top N", [10, 20, 50, 100], index=1)
-
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Demographics / Context")
 
-def pick(df_, col, label):
-    if col not in df_.columns:
+def column_options(df_, manifest, col):
+    """선택지: manifest 의 distinct 목록 (스캔 없음), 업로드/manifest 에 없는 컬럼만 df 스캔"""
+    opts = distinct_values(manifest, col)
+    if opts is None and col in df_.columns:
+        opts = sorted(df_[col].dropna().unique().tolist())
+    return opts
+
+def pick(df_, manifest, col, label):
+    opts = column_options(df_, manifest, col)
+    if opts is None:
         return "All"
-    opts = ["All"] + sorted(df_[col].dropna().unique().tolist())
-    return st.sidebar.selectbox(label, opts, index=0)
-
-f_age = pick(df, "Age", "Age (raw)")
-f_gender = pick(df, "Gender", "Gender")
-f_marital = pick(df, "Marital_Status", "Marital (0/1)")
-f_city = pick(df, "City_Category", "City_Category")
-f_stay = pick(df, "Stay_In_Current_City_Years", "Stay Years")
-
-# Apply row filters
-df_f = df.copy()
-if f_age != "All": df_f = df_f[df_f["Age"] == f_age]
-if f_gender != "All": df_f = df_f[df_f["Gender"] == f_gender]
-if f_marital != "All" and "Marital_Status" in df_f.columns: df_f = df_f[df_f["Marital_Status"] == f_marital]
-if f_city != "All" and "City_Category" in df_f.columns: df_f = df_f[df_f["City_Category"] == f_city]
-if f_stay != "All" and "Stay_In_Current_City_Years" in df_f.columns: df_f = df_f[df_f["Stay_In_Current_City_Years"] == f_stay]
-
-seg = build_segment_table(df_f)
-seg_f = seg[seg["transactions"] >= min_tx].copy()
-if bucket != "All":
-    seg_f = seg_f[seg_f["bucket"] == bucket].copy()
-seg_f = seg_f.sort_values(rank_by, ascending=False)
+    return st.sidebar.selectbox(label, ["All"] + opts, index=0)
+
+f_age = pick(df, manifest, "Age", "Age (raw)")
+f_gender = pick(df, manifest, "Gender", "Gender")
+f_marital = pick(df, manifest, "Marital_Status", "Marital (0/1)")
+f_city = pick(df, manifest, "City_Category", "City_Category")
+f_stay = pick(df, manifest, "Stay_In_Current_City_Years", "Stay Years")
+
+filters = {
+    "Age": f_age, "Gender": f_gender, "Marital_Status": f_marital,
+    "City_Category": f_city, "Stay_In_Current_City_Years": f_stay,
+}
+# 필터 조합이 바뀔 때만 접근 로그에 한 줄 (같은 세션의 다른 위젯 rerun 은 제외)
+if st.session_state.get("_access_key") != filter_key(filters):
+    st.session_state["_access_key"] = filter_key(filters)
+    load_access_log(source).record(filter_key(filters))
+# 필터 조합 = 큐브 셀 합산 + 고객 비트맵 합집합 (원본 행 스캔 없음), 같은 조합은 캐시에서
+query_cache = load_query_cache()
+view = CubeView(cube, filters, query_cache, fingerprint)
+
+seg = view.segment_table()
+# 정규화 지표 행렬은 필터 상태당 한 번 -> 가중치/식 변경은 행렬-벡터 곱 한 번
+matrix = query_cache.get_or_compute(
+    (fingerprint, "score_matrix", filter_key(filters)), lambda: ScoreMatrix.from_segments(seg)
+)
 
 # =========================
-# Main UI
+# Main UI (패널 단위 함수, 위젯이 있는 패널은 st.fragment)
 # =========================
+profile = load_panel_profile()
+figure_cache = load_figure_cache()
+fragment = st.fragment if fragments_enabled() else (lambda fn: fn)
+
 st.markdown('<div class="topbar">CUSTOMER SEGMENTATION DASHBOARD</div>', unsafe_allow_html=True)
 
-customers, revenue, aov, avg_purchases, clv_proxy = calc_kpis(df_f)
-k1, k2, k3, k4, k5 = st.columns(5)
-
-with k1:
-    st.markdown(f"""
-    <div class="kpi">
-      <div class="kpi-title">Total Customers</div>
-      <div class="kpi-value">{fmt_k(customers)}</div>
-      <div class="kpi-sub">Unique customers (User_ID)</div>
-    </div>""", unsafe_allow_html=True)
-
-with k2:
-    st.markdown(f"""
-    <div class="kpi">
-      <div class="kpi-title">Total Gross Sales</div>
-      <div class="kpi-value">{fmt_k(revenue)}</div>
-      <div class="kpi-sub">Sum of Purchase</div>
-    </div>""", unsafe_allow_html=True)
-
-with k3:
-    st.markdown(f"""
-    <div class="kpi">
-      <div class="kpi-title">Avg Order Value (AOV)</div>
-      <div class="kpi-value">{fmt_k(aov)}</div>
-      <div class="kpi-sub">Mean Purchase per transaction</div>
-    </div>""", unsafe_allow_html=True)
-
-with k4:
-    st.markdown(f"""
-    <div class="kpi">
-      <div class="kpi-title">Avg No. of Purchases</div>
-      <div class="kpi-value">{avg_purchases:.2f}</div>
-      <div class="kpi-sub">Transactions / Customers</div>
-    </div>""", unsafe_allow_html=True)
-
-with k5:
-    st.markdown(f"""
-    <div class="kpi">
-      <div class="kpi-title">Customer Value (Proxy)</div>
-      <div class="kpi-value">{fmt_k(clv_proxy)}</div>
-      <div class="kpi-sub">Gross Sales / Customers</div>
-    </div>""", unsafe_allow_html=True)
+@profile.track("kpis")
+def kpi_panel(view):
+    customers, revenue, aov, avg_purchases, clv_proxy = view.kpis()
+    k1, k2, k3, k4, k5 = st.columns(5)
+
+    with k1:
+        st.markdown(f"""
+        <div class="kpi">
+          <div class="kpi-title">Total Customers</div>
+          <div class="kpi-value">{fmt_k(customers)}</div>
+          <div class="kpi-sub">Unique customers (User_ID)</div>
+        </div>""", unsafe_allow_html=True)
+
+    with k2:
+        st.markdown(f"""
+        <div class="kpi">
+          <div class="kpi-title">Total Gross Sales</div>
+          <div class="kpi-value">{fmt_k(revenue)}</div>
+          <div class="kpi-sub">Sum of Purchase</div>
+        </div>""", unsafe_allow_html=True)
+
+    with k3:
+        st.markdown(f"""
+        <div class="kpi">
+          <div class="kpi-title">Avg Order Value (AOV)</div>
+          <div class="kpi-value">{fmt_k(aov)}</div>
+          <div class="kpi-sub">Mean Purchase per transaction</div>
+        </div>""", unsafe_allow_html=True)
+
+    with k4:
+        st.markdown(f"""
+        <div class="kpi">
+          <div class="kpi-title">Avg No. of Purchases</div>
+          <div class="kpi-value">{avg_purchases:.2f}</div>
+          <div class="kpi-sub">Transactions / Customers</div>
+        </div>""", unsafe_allow_html=True)
+
+    with k5:
+        st.markdown(f"""
+        <div class="kpi">
+          <div class="kpi-title">Customer Value (Proxy)</div>
+          <div class="kpi-value">{fmt_k(clv_proxy)}</div>
+          <div class="kpi-sub">Gross Sales / Customers</div>
+        </div>""", unsafe_allow_html=True)
 
-st.write("")
 
 # Charts (reference-like layout)
-row1_left, row1_right = st.columns([1.05, 1.25])
-
-with row1_left:
-    st.markdown('<div class="panel"><div class="panel-title">Total Amount Spent by Strategy Bucket</div>', unsafe_allow_html=True)
+# Figures (FigureCache miss 일 때만 호출)
+def fig_bucket_revenue(seg):
     bucket_rev = (
         seg.groupby("bucket")["revenue"].sum()
            .sort_values(ascending=False)
@@ -401,101 +290,232 @@ with row1_left:
     fig = px.bar(bucket_rev, x="bucket", y="revenue", text=bucket_rev["revenue"].apply(fmt_k))
     fig.update_traces(textposition="outside")
     fig.update_layout(height=340, margin=dict(l=10, r=10, t=10, b=10), yaxis_title="Gross Sales", xaxis_title="")
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    return fig
+
+def fig_age_bucket(age_bucket):
+    fig = px.line(age_bucket, x="Age_mid", y="Purchase", color="bucket", markers=True)
+    fig.update_layout(height=340, margin=dict(l=10, r=10, t=10, b=10),
+                      xaxis_title="Age (approx midpoint)", yaxis_title="Gross Sales")
+    return fig
+
+def fig_bucket_customers(cust_bucket):
+    fig = px.pie(cust_bucket, names="bucket", values="customers", hole=0.25)
+    fig.update_layout(height=340, margin=dict(l=10, r=10, t=10, b=10))
+    return fig
+
+def fig_product_top8(top_pc):
+    top_pc["rank"] = top_pc.groupby("bucket", observed=True)["Purchase"].rank(method="first", ascending=False)
+    top_pc = top_pc[top_pc["rank"] <= 8].copy()
+    fig = px.bar(
+        top_pc.sort_values(["bucket", "Purchase"], ascending=[True, False]),
+        x="Purchase",
+        y=top_pc["Product_Category"].astype(str),
+        color="bucket",
+        orientation="h"
+    )
+    fig.update_layout(height=340, margin=dict(l=10, r=10, t=10, b=10),
+                      xaxis_title="Gross Sales", yaxis_title="Product_Category (Top 8 per bucket)")
+    return fig
+
+
+@profile.track("charts")
+def charts_panel(view, seg, figures, fingerprint, filters):
+    """figure 는 (차트, fingerprint, 필터) 단위로 FigureCache 에서 (다른 세션이 만든 것도 재사용)"""
+    row1_left, row1_right = st.columns([1.05, 1.25])
+
+    with row1_left:
+        st.markdown('<div class="panel"><div class="panel-title">Total Amount Spent by Strategy Bucket</div>', unsafe_allow_html=True)
+        fig = figures.get_or_build("bucket_revenue", fingerprint, filters, lambda: fig_bucket_revenue(seg))
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with row1_right:
+        st.markdown('<div class="panel"><div class="panel-title">Bucket Spend by Age (Raw Age as X-axis)</div>', unsafe_allow_html=True)
+        age_bucket = view.age_bucket_revenue()
+        if len(age_bucket):
+            fig2 = figures.get_or_build("age_bucket", fingerprint, filters, lambda: fig_age_bucket(age_bucket))
+            st.plotly_chart(fig2, use_container_width=True)
+        else:
+            st.info("Age 컬럼이 없어 추세 차트를 표시할 수 없습니다.")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    row2_left, row2_right = st.columns([1.05, 1.25])
+
+    with row2_left:
+        st.markdown('<div class="panel"><div class="panel-title">Total Customers by Strategy Bucket</div>', unsafe_allow_html=True)
+        fig3 = figures.get_or_build("bucket_customers", fingerprint, filters,
+                                    lambda: fig_bucket_customers(view.bucket_customers()))
+        st.plotly_chart(fig3, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with row2_right:
+        st.markdown('<div class="panel"><div class="panel-title">Revenue Breakdown (Bucket → Top Product Categories)</div>', unsafe_allow_html=True)
+        top_pc = view.product_revenue()
+        if top_pc is not None:
+            fig4 = figures.get_or_build("product_top8", fingerprint, filters, lambda: fig_product_top8(top_pc))
+            st.plotly_chart(fig4, use_container_width=True)
+        else:
+            st.info("Product_Category 컬럼이 없어 Revenue Breakdown을 표시할 수 없습니다.")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+# Warm-up (백그라운드 스레드: st.* 호출 없이 캐시만 채운다)
+FILTER_COLS = ["Age", "Gender", "Marital_Status", "City_Category", "Stay_In_Current_City_Years"]
+
+def warm_view(cube, query_cache, figures, fingerprint, filters):
+    """한 필터 조합의 집계/점수 행렬/차트 4개를 세션이 쓰는 것과 같은 키로 캐시에 넣는다"""
+    view = CubeView(cube, filters, query_cache, fingerprint)
+    seg = view.segment_table()
+    query_cache.get_or_compute((fingerprint, "score_matrix", filter_key(filters)), lambda: ScoreMatrix.from_segments(seg))
+    view.kpis()
+    figures.get_or_build("bucket_revenue", fingerprint, filters, lambda: fig_bucket_revenue(seg))
+    age_bucket = view.age_bucket_revenue()
+    if len(age_bucket):
+        figures.get_or_build("age_bucket", fingerprint, filters, lambda: fig_age_bucket(age_bucket))
+    figures.get_or_build("bucket_customers", fingerprint, filters, lambda: fig_bucket_customers(view.bucket_customers()))
+    top_pc = view.product_revenue()
+    if top_pc is not None:
+        figures.get_or_build("product_top8", fingerprint, filters, lambda: fig_product_top8(top_pc))
+
+@st.cache_resource(show_spinner=False)
+def start_warmup(fingerprint, _df, _manifest, _cube, _query_cache, _figures, _access_log):
+    """
+    데이터셋(fingerprint)당 한 번, 첫 화면을 그린 뒤 시작: 기본 화면 + 접근 로그 상위 N 개 조합을
+    daemon 스레드에서 계산. 세션은 기다리지 않고, 아직 안 채워진 조합은 평소처럼 직접 계산한다.
+    """
+    n = warmup_top_n()
 
-with row1_right:
-    st.markdown('<div class="panel"><div class="panel-title">Bucket Spend by Age (Raw Age as X-axis)</div>', unsafe_allow_html=True)
-    if df_f["Age_mid"].notna().any():
-        age_bucket = (
-            df_f.dropna(subset=["Age_mid"])
-               .groupby(["Age_mid", "bucket"])["Purchase"].sum()
-               .reset_index()
-               .sort_values("Age_mid")
-        )
-        fig2 = px.line(age_bucket, x="Age_mid", y="Purchase", color="bucket", markers=True)
-        fig2.update_layout(height=340, margin=dict(l=10, r=10, t=10, b=10),
-                           xaxis_title="Age (approx midpoint)", yaxis_title="Gross Sales")
-        st.plotly_chart(fig2, use_container_width=True)
-    else:
-        st.info("Age 컬럼이 없어 추세 차트를 표시할 수 없습니다.")
-    st.markdown('</div>', unsafe_allow_html=True)
+    def plan():
+        options = {c: column_options(_df, _manifest, c) for c in FILTER_COLS}
+        options = {c: v for c, v in options.items() if v is not None}
+        return [
+            (label, lambda f=f: warm_view(_cube, _query_cache, _figures, fingerprint, f))
+            for label, f in warmup_plan(_access_log, options, n)
+        ]
 
-row2_left, row2_right = st.columns([1.05, 1.25])
+    warmup = Warmup(plan, name="walmart-warmup")
+    return warmup.start() if n is not None else warmup
 
-with row2_left:
-    st.markdown('<div class="panel"><div class="panel-title">Total Customers by Strategy Bucket</div>', unsafe_allow_html=True)
-    if "User_ID" in df_f.columns:
-        cust_bucket = df_f.groupby("bucket")["User_ID"].nunique().reset_index(name="customers")
-    else:
-        cust_bucket = df_f.groupby("bucket").size().reset_index(name="customers")
-    fig3 = px.pie(cust_bucket, names="bucket", values="customers", hole=0.25)
-    fig3.update_layout(height=340, margin=dict(l=10, r=10, t=10, b=10))
-    st.plotly_chart(fig3, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
 
-with row2_right:
-    st.markdown('<div class="panel"><div class="panel-title">Revenue Breakdown (Bucket → Top Product Categories)</div>', unsafe_allow_html=True)
-    if "Product_Category" in df_f.columns:
-        top_pc = df_f.groupby(["bucket", "Product_Category"])["Purchase"].sum().reset_index()
-        top_pc["rank"] = top_pc.groupby("bucket")["Purchase"].rank(method="first", ascending=False)
-        top_pc = top_pc[top_pc["rank"] <= 8].copy()
-        fig4 = px.bar(
-            top_pc.sort_values(["bucket", "Purchase"], ascending=[True, False]),
-            x="Purchase",
-            y=top_pc["Product_Category"].astype(str),
-            color="bucket",
-            orientation="h"
-        )
-        fig4.update_layout(height=340, margin=dict(l=10, r=10, t=10, b=10),
-                           xaxis_title="Gross Sales", yaxis_title="Product_Category (Top 8 per bucket)")
-        st.plotly_chart(fig4, use_container_width=True)
+# Targets
+WEIGHT_LABELS = {"rev_n": "Revenue", "cust_n": "Customers", "tx_n": "Transactions", "aov_n": "AOV"}
+
+@fragment
+@profile.track("top_targets")
+def top_targets_panel(seg, matrix, exports, median_exact=True):
+    """랭킹/Top-N/가중치 위젯은 이 패널 안에만 -> 바꿔도 이 패널만 다시 실행 (집계/KPI/차트 그대로)"""
+    st.write("")
+    st.markdown('<div class="panel"><div class="panel-title">Top Targets (Segment_AGOP)</div>', unsafe_allow_html=True)
+    # 큐브 median 은 Purchase 구간 히스토그램 보간 (distinct 값이 구간 수보다 많으면 근사)
+    median_label = "Median" if median_exact else "Median (≈)"
+
+    c1, c2, c3, c4 = st.columns([1, 1.2, 1.6, 0.8])
+    bucket = c1.selectbox("Strategy Bucket", ["All", "Defend", "Grow", "Expand", "Other"], index=0)
+    rank_by = c2.selectbox(
+        "Ranking Metric",
+        ["target_score", "revenue", "revenue_share", "customers", "transactions", "avg_purchase"],
+        index=0
+    )
+    min_tx = c3.slider("MIN_TX (min transactions per segment)", 200, 3000, 500, 50)
+    top_n = c4.selectbox("Top N", [10, 20, 50, 100], index=1)
+    with st.expander("Target Score (what-if)"):
+        score_formula = st.selectbox("Formula", list(FORMULAS), format_func=FORMULAS.get, index=0)
+        wcols = st.columns(len(WEIGHT_LABELS))
+        weights = {
+            k: wcols[i].slider(f"w · {label}", 0.0, 1.0, DEFAULT_WEIGHTS[k], 0.05, disabled=score_formula != "weighted")
+            for i, (k, label) in enumerate(WEIGHT_LABELS.items())
+        }
+
+    seg = seg.assign(target_score=matrix.score(weights, score_formula))
+    mask = (seg["transactions"] >= min_tx).to_numpy()
+    if bucket != "All":
+        mask = mask & (seg["bucket"] == bucket).to_numpy()
+    n_qualified = int(mask.sum())
+    # 전체 정렬 대신 Top-N 만 부분 선택 (argpartition)
+    seg_f = seg.iloc[top_n_indices(seg[rank_by].to_numpy(), top_n, mask)]
+    exp = seg.iloc[top_n_indices(seg["revenue"].to_numpy(), 1, mask & (seg["bucket"] == "Expand").to_numpy())]
+
+    if len(seg_f) == 0:
+        st.info("현재 필터 조건에서 세그먼트가 없습니다. MIN_TX 또는 필터를 조정하세요.")
     else:
-        st.info("Product_Category 컬럼이 없어 Revenue Breakdown을 표시할 수 없습니다.")
+        cA, cB = st.columns(2)
+        top1 = seg_f.iloc[0]
+        with cA:
+            st.markdown("**Top Target (Current Ranking)**")
+            st.code(top1["Segment_AGOP"])
+            st.write(f"- Bucket: **{top1['bucket']}**")
+            st.write(f"- Customers: {int(top1['customers']):,}")
+            st.write(f"- Transactions: {int(top1['transactions']):,}")
+            st.write(f"- Gross Sales: {fmt_k(top1['revenue'])} | Share: {top1['revenue_share']:.2%}")
+            st.write(f"- AOV: {top1['avg_purchase']:.2f} | {median_label}: {top1['median_purchase']:.2f}")
+            st.write(f"- Target Score: {top1['target_score']:.3f}")
+
+        with cB:
+            st.markdown("**Urgent Target (Expand • Gross Sales TOP)**")
+            if len(exp) == 0:
+                st.write("Expand 세그먼트가 없습니다.")
+            else:
+                urgent = exp.iloc[0]
+                st.code(urgent["Segment_AGOP"])
+                st.write(f"- Bucket: **{urgent['bucket']}**")
+                st.write(f"- Customers: {int(urgent['customers']):,}")
+                st.write(f"- Transactions: {int(urgent['transactions']):,}")
+                st.write(f"- Gross Sales: {fmt_k(urgent['revenue'])} | Share: {urgent['revenue_share']:.2%}")
+                st.write(f"- AOV: {urgent['avg_purchase']:.2f} | {median_label}: {urgent['median_purchase']:.2f}")
+                st.write(f"- Target Score: {urgent['target_score']:.3f}")
+
+        st.markdown("---")
+        cols = ["Segment_AGOP", "bucket", "customers", "transactions", "revenue", "revenue_share",
+                "avg_purchase", "median_purchase", "target_score"]
+        table = seg_f[cols].copy()
+        st.caption(f"{n_qualified:,} segments pass MIN_TX / bucket · showing top {len(table)} by {rank_by}")
+        column_config = None if median_exact else {
+            "median_purchase": st.column_config.NumberColumn("median_purchase (≈)", help="구간 히스토그램 기반 근사 median")
+        }
+        st.dataframe(table, use_container_width=True, hide_index=True, column_config=column_config)
+
+        # 파일은 클릭했을 때만 만든다 (rerun 마다 to_csv 하지 않음). 전체 세그먼트 export 도 클릭 시점에 정렬.
+        d1, d2, d3 = st.columns([0.8, 1, 1.4])
+        export_fmt = d1.selectbox("Export format", list(EXPORT_FORMATS), format_func=lambda f: EXPORT_FORMATS[f][0],
+                                  label_visibility="collapsed")
+        _, ext, mime = EXPORT_FORMATS[export_fmt]
+        d2.download_button(f"Download Top-N {EXPORT_FORMATS[export_fmt][0]}", data=exports.deferred(table, export_fmt),
+                           file_name=f"top_targets{ext}", mime=mime)
+        def all_ranked():
+            return seg.iloc[top_n_indices(seg[rank_by].to_numpy(), n_qualified, mask)][cols]
+
+        d3.download_button(f"Download all {n_qualified:,} qualified segments", data=exports.deferred(all_ranked, export_fmt),
+                           file_name=f"segments_by_{rank_by}{ext}", mime=mime)
+
     st.markdown('</div>', unsafe_allow_html=True)
 
-# Targets
-st.write("")
-st.markdown('<div class="panel"><div class="panel-title">Top Targets (Segment_AGOP)</div>', unsafe_allow_html=True)
 
-if len(seg_f) == 0:
-    st.info("현재 필터 조건에서 세그먼트가 없습니다. MIN_TX 또는 필터를 조정하세요.")
+kpi_panel(view)
+st.write("")
+charts_panel(view, seg, figure_cache, fingerprint, filters)
+top_targets_panel(seg, matrix, load_export_cache(), cube.meta.get("median_exact", True))
+
+warmup = start_warmup(fingerprint, df, manifest, cube, query_cache, figure_cache,
+                      load_access_log(source))
+
+with st.sidebar.expander("Memory (this process)"):
+    # /proc/self/smaps 파싱은 진단용 -> 버튼을 눌렀을 때만 (expander 안쪽도 rerun 마다 실행됨)
+    if st.button("Measure", key="measure_memory"):
+        st.json(process_memory(shared_path_for(source, "segments") if shared_enabled() else None))
+cs = query_cache.stats()
+st.sidebar.caption(f"Query cache: {cs['hits']} hit / {cs['misses']} miss · {cs['size']}/{cs['maxsize']} entries")
+fs = figure_cache.stats()
+st.sidebar.caption(
+    f"Figure cache: {fs['hits']} hit / {fs['misses']} miss · {fs['size']}/{fs['maxsize']} figures · {fs['payload_kb']:,.0f} KB"
+)
+ws = warmup.status()
+if warmup_top_n() is None:
+    st.sidebar.caption("Warm-up: off")
 else:
-    cA, cB = st.columns(2)
-    top1 = seg_f.iloc[0]
-    with cA:
-        st.markdown("**Top Target (Current Ranking)**")
-        st.code(top1["Segment_AGOP"])
-        st.write(f"- Bucket: **{top1['bucket']}**")
-        st.write(f"- Customers: {int(top1['customers']):,}")
-        st.write(f"- Transactions: {int(top1['transactions']):,}")
-        st.write(f"- Gross Sales: {fmt_k(top1['revenue'])} | Share: {top1['revenue_share']:.2%}")
-        st.write(f"- AOV: {top1['avg_purchase']:.2f} | Median: {top1['median_purchase']:.2f}")
-        st.write(f"- Target Score: {top1['target_score']:.3f}")
-
-    exp = seg_f[seg_f["bucket"] == "Expand"].sort_values("revenue", ascending=False)
-    with cB:
-        st.markdown("**Urgent Target (Expand • Gross Sales TOP)**")
-        if len(exp) == 0:
-            st.write("Expand 세그먼트가 없습니다.")
-        else:
-            urgent = exp.iloc[0]
-            st.code(urgent["Segment_AGOP"])
-            st.write(f"- Bucket: **{urgent['bucket']}**")
-            st.write(f"- Customers: {int(urgent['customers']):,}")
-            st.write(f"- Transactions: {int(urgent['transactions']):,}")
-            st.write(f"- Gross Sales: {fmt_k(urgent['revenue'])} | Share: {urgent['revenue_share']:.2%}")
-            st.write(f"- AOV: {urgent['avg_purchase']:.2f} | Median: {urgent['median_purchase']:.2f}")
-            st.write(f"- Target Score: {urgent['target_score']:.3f}")
-
-    st.markdown("---")
-    cols = ["Segment_AGOP", "bucket", "customers", "transactions", "revenue", "revenue_share",
-            "avg_purchase", "median_purchase", "target_score"]
-    table = seg_f[cols].head(top_n).copy()
-    st.dataframe(table, use_container_width=True, hide_index=True)
-
-    csv = table.to_csv(index=False).encode("utf-8-sig")
-    st.download_button("Download Top-N CSV", data=csv, file_name="top_targets.csv", mime="text/csv")
-
-st.markdown('</div>', unsafe_allow_html=True)
+    st.sidebar.caption(f"Warm-up: {ws['state']} · {ws['done']}/{ws['total']} views"
+                       + (f" · {ws['elapsed_s']:.1f}s" if ws["state"] == "done" else ""))
+with st.sidebar.expander(f"Data sources ({len(sources.events())} invalidations)"):
+    st.json({**sources.stats(), "uploads": uploads.stats(), "events": sources.events()[-5:]})
+with st.sidebar.expander(f"Rerun profile (fragments {'on' if fragments_enabled() else 'off'})"):
+    st.json(profile.stats())
 st.caption("Note: raw walmart.csv(Black Friday 형태) 기준 자동으로 Age_grp/Price_Segment/Occupation_grp/Segment_AGOP를 생성합니다.")